@@ -0,0 +1,40 @@
+"""add_price_table_company_and_notes
+
+Revision ID: 025d4bfe4b7e
+Revises: 3e3fecefa010
+Create Date: 2026-10-18 09:12:40.311502
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '025d4bfe4b7e'
+down_revision: Union[str, None] = '3e3fecefa010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 단가표 회사 및 비고 컬럼 추가
+    op.add_column('price_tables', sa.Column('company_id', sa.Integer(), nullable=True))
+    op.add_column('price_tables', sa.Column('notes', sa.Text(), nullable=True))
+    op.create_foreign_key(
+        'fk_price_tables_company_id',
+        'price_tables', 'companies',
+        ['company_id'], ['id']
+    )
+    op.create_index(
+        op.f('ix_price_tables_company_id'),
+        'price_tables',
+        ['company_id']
+    )
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_price_tables_company_id'), table_name='price_tables')
+    op.drop_constraint('fk_price_tables_company_id', 'price_tables', type_='foreignkey')
+    op.drop_column('price_tables', 'notes')
+    op.drop_column('price_tables', 'company_id')
@@ -0,0 +1,40 @@
+"""add_price_table_validity_indexes
+
+Revision ID: 03f2ee895a5a
+Revises: 025d4bfe4b7e
+Create Date: 2026-10-18 11:02:17.845330
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '03f2ee895a5a'
+down_revision: Union[str, None] = '025d4bfe4b7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 유효 단가 조회용 복합 B-tree 인덱스
+    op.create_index(
+        'ix_price_tables_effective',
+        'price_tables',
+        ['company_id', 'name', 'unit', 'valid_from', 'valid_until']
+    )
+
+    # PostgreSQL: 회사 + 유효기간 범위 GiST 인덱스
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+        op.execute(
+            "CREATE INDEX ix_price_tables_validity_gist ON price_tables "
+            "USING gist (company_id, daterange(valid_from, valid_until, '[]'))"
+        )
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_price_tables_validity_gist')
+    op.drop_index('ix_price_tables_effective', table_name='price_tables')
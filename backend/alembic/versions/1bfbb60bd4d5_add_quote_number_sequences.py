@@ -0,0 +1,31 @@
+"""add_quote_number_sequences
+
+Revision ID: 1bfbb60bd4d5
+Revises: 3c719fdb7958
+Create Date: 2026-10-18 14:26:08.503917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1bfbb60bd4d5'
+down_revision: Union[str, None] = '3c719fdb7958'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 일자별 견적서 번호 카운터
+    op.create_table(
+        'quote_number_sequences',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('last_value', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('day')
+    )
+
+def downgrade() -> None:
+    op.drop_table('quote_number_sequences')
@@ -0,0 +1,29 @@
+"""add_quotation_version_snapshots
+
+Revision ID: 3593c608d5f7
+Revises: 1bfbb60bd4d5
+Create Date: 2026-10-18 15:48:31.270458
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3593c608d5f7'
+down_revision: Union[str, None] = '1bfbb60bd4d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 버전 행 종류 (전체 스냅샷 / 델타), 기존 행은 자유 형식이므로 델타로 간주
+    op.add_column(
+        'quotation_versions',
+        sa.Column('is_snapshot', sa.Boolean(), nullable=False, server_default=sa.false())
+    )
+
+def downgrade() -> None:
+    op.drop_column('quotation_versions', 'is_snapshot')
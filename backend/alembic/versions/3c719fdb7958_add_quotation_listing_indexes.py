@@ -0,0 +1,36 @@
+"""add_quotation_listing_indexes
+
+Revision ID: 3c719fdb7958
+Revises: 03f2ee895a5a
+Create Date: 2026-10-18 13:40:52.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c719fdb7958'
+down_revision: Union[str, None] = '03f2ee895a5a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 견적서 목록 키셋 페이지네이션 인덱스
+    op.create_index(
+        'ix_quotations_created_by_created_at',
+        'quotations',
+        ['created_by', 'created_at', 'id']
+    )
+    op.create_index(
+        'ix_quotations_created_at',
+        'quotations',
+        ['created_at', 'id']
+    )
+
+def downgrade() -> None:
+    op.drop_index('ix_quotations_created_at', table_name='quotations')
+    op.drop_index('ix_quotations_created_by_created_at', table_name='quotations')
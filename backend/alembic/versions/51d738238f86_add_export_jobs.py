@@ -0,0 +1,56 @@
+"""add_export_jobs
+
+Revision ID: 51d738238f86
+Revises: 617414093662
+Create Date: 2026-10-18 19:40:12.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '51d738238f86'
+down_revision: Union[str, None] = '617414093662'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 백그라운드 내보내기 작업 큐
+    op.create_table(
+        'export_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=False),
+        sa.Column('params_hash', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('progress', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('result_path', sa.String(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_export_jobs_id', 'export_jobs', ['id'])
+    op.create_index('ix_export_jobs_status', 'export_jobs', ['status', 'id'])
+    # 같은 사용자의 동일한 대기/실행 중 작업 중복 방지 (부분 유니크 인덱스)
+    op.create_index(
+        'uq_export_jobs_active',
+        'export_jobs',
+        ['user_id', 'params_hash'],
+        unique=True,
+        postgresql_where=sa.text("status IN ('pending', 'running')"),
+        sqlite_where=sa.text("status IN ('pending', 'running')")
+    )
+
+def downgrade() -> None:
+    op.drop_index('uq_export_jobs_active', table_name='export_jobs')
+    op.drop_index('ix_export_jobs_status', table_name='export_jobs')
+    op.drop_index('ix_export_jobs_id', table_name='export_jobs')
+    op.drop_table('export_jobs')
@@ -0,0 +1,26 @@
+"""add_quotation_version_change_count
+
+Revision ID: 617414093662
+Revises: c6949f26faf3
+Create Date: 2026-10-18 17:12:44.930175
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '617414093662'
+down_revision: Union[str, None] = 'c6949f26faf3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 이력 요약용 변경 건수 (기존 행은 비워 둠)
+    op.add_column('quotation_versions', sa.Column('change_count', sa.Integer(), nullable=True))
+
+def downgrade() -> None:
+    op.drop_column('quotation_versions', 'change_count')
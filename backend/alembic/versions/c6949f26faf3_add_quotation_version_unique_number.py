@@ -0,0 +1,60 @@
+"""add_quotation_version_unique_number
+
+Revision ID: c6949f26faf3
+Revises: 3593c608d5f7
+Create Date: 2026-10-18 16:35:12.604219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6949f26faf3'
+down_revision: Union[str, None] = '3593c608d5f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 동시 저장으로 중복된 버전 번호가 있는 견적서는 (번호, id) 순으로 다시 매김
+    op.execute("""
+        UPDATE quotation_versions
+        SET version_number = renumbered.rn
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY quotation_id ORDER BY version_number, id
+            ) AS rn
+            FROM quotation_versions
+            WHERE quotation_id IN (
+                SELECT quotation_id FROM quotation_versions
+                GROUP BY quotation_id, version_number
+                HAVING COUNT(*) > 1
+            )
+        ) AS renumbered
+        WHERE quotation_versions.id = renumbered.id
+    """)
+
+    # 견적서 버전 카운터가 기존 이력보다 뒤처지지 않도록 맞춤
+    op.execute("""
+        UPDATE quotations
+        SET version = (
+            SELECT MAX(version_number) FROM quotation_versions
+            WHERE quotation_versions.quotation_id = quotations.id
+        )
+        WHERE version IS NULL OR version < (
+            SELECT MAX(version_number) FROM quotation_versions
+            WHERE quotation_versions.quotation_id = quotations.id
+        )
+    """)
+
+    op.create_unique_constraint(
+        'uq_quotation_versions_number',
+        'quotation_versions',
+        ['quotation_id', 'version_number']
+    )
+
+def downgrade() -> None:
+    op.drop_constraint('uq_quotation_versions_number', 'quotation_versions', type_='unique')
@@ -1,100 +1,214 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Response
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from datetime import datetime
 import os
-from tempfile import NamedTemporaryFile
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.orm import Session
 
 from app.core.auth import get_current_user
+from app.core.export_cache import etag_matches, export_cache
 from app.core.permissions import require_permissions, Permission
-from fastapi.background import BackgroundTasks
+from app.core.render_pool import RenderPoolBusy, RenderTimeout
 from app.db.base import get_db
-from app.models.models import User, Quotation
-from app.services.quotation import get_quotation
-from app.utils.excel_generator import ExcelGenerator
-from app.utils.pdf_generator import PDFGenerator
+from app.models.models import ExportJob, User
+from app.schemas.export_job import ExportJobCreate, ExportJobResponse
+from app.schemas.quotation import QuotationArchiveRequest
+from app.services import export_jobs, quotation_export
 
 router = APIRouter()
 
-def _prepare_quotation_data(quotation: Quotation) -> dict:
-    """견적서 데이터 준비"""
-    return {
-        "quote_number": quotation.quote_number,
-        "date": quotation.created_at.strftime("%Y-%m-%d"),
-        "valid_until": quotation.valid_until.strftime("%Y-%m-%d"),
-        "customer_name": quotation.customer.name,
-        "project_description": quotation.project_description,
-        "items": [
-            {
-                "name": item.price_table.name,
-                "quantity": item.quantity,
-                "unit_price": item.unit_price,
-                "discount_amount": item.discount_amount,
-                "remark": item.remark
-            }
-            for item in quotation.items
-        ],
-        "total_amount": quotation.total_amount,
-    }
+async def _export_response(
+    db: Session,
+    quotation_id: int,
+    format: str,
+    current_user: User,
+    if_none_match: Optional[str]
+) -> Response:
+    """견적서 내보내기 응답 (렌더링 캐시 + ETag/If-None-Match)"""
+    header = quotation_export.get_export_header(db, quotation_id)
+    if not header:
+        raise HTTPException(status_code=404, detail="Quotation not found")
+    
+    if current_user.role != "admin" and header.created_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    # 같은 버전, 같은 이름이면 렌더링/파일 읽기 없이 304
+    etag = export_cache.etag(
+        quotation_export.export_key(quotation_id, header.version, format, header.names)
+    )
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    media_type = quotation_export.EXPORT_FORMATS[format][1]
+    filename = f"quotation_{header.quote_number}.{format}"
+    try:
+        if export_cache.enabled:
+            cached = await quotation_export.get_quotation_export(
+                db, quotation_id, header.version, format, header.names
+            )
+            return FileResponse(
+                cached.path,
+                media_type=media_type,
+                filename=filename,
+                headers={"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+            )
+        # 캐시를 끄면 렌더링 버퍼에서 바로 스트리밍
+        key, content = await quotation_export.render_quotation_export(db, quotation_id, format)
+    except RenderPoolBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Export queue is full, try again later",
+            headers={"Retry-After": "5"}
+        )
+    except RenderTimeout:
+        raise HTTPException(status_code=504, detail="Export rendering timed out")
+
+    return StreamingResponse(
+        quotation_export.iter_chunks(content),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(quotation_export.file_size(content)),
+            "ETag": export_cache.etag(key),
+            "Cache-Control": "private, no-cache",
+        }
+    )
 
 @router.get("/quotations/{quotation_id}/export/excel")
 @require_permissions([Permission.VIEW_QUOTATION])
 async def export_quotation_excel(
     quotation_id: int,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None)
 ):
     """견적서 Excel 다운로드"""
-    quotation = get_quotation(db, quotation_id)
-    if not quotation:
-        raise HTTPException(status_code=404, detail="Quotation not found")
-    
-    if not current_user.is_admin and quotation.created_by != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
-    # Excel 생성
-    generator = ExcelGenerator()
-    workbook = generator.generate_quotation(_prepare_quotation_data(quotation))
-    
-    # 임시 파일로 저장
-    temp_file = NamedTemporaryFile(delete=False, suffix='.xlsx')
-    workbook.save(temp_file.name)
-    
-    # 파일 응답
-    filename = f"quotation_{quotation.quote_number}.xlsx"
-    background_tasks.add_task(os.unlink, temp_file.name)
-    return FileResponse(
-        temp_file.name,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        filename=filename
-    )
+    return await _export_response(db, quotation_id, "xlsx", current_user, if_none_match)
 
 @router.get("/quotations/{quotation_id}/export/pdf")
 @require_permissions([Permission.VIEW_QUOTATION])
 async def export_quotation_pdf(
     quotation_id: int,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None)
 ):
     """견적서 PDF 다운로드"""
-    quotation = get_quotation(db, quotation_id)
-    if not quotation:
-        raise HTTPException(status_code=404, detail="Quotation not found")
-    
-    if not current_user.is_admin and quotation.created_by != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
-    # PDF 생성
-    generator = PDFGenerator()
-    pdf_path = generator.generate_quotation(_prepare_quotation_data(quotation))
-    
-    # 파일 응답
-    filename = f"quotation_{quotation.quote_number}.pdf"
-    background_tasks.add_task(os.unlink, pdf_path)
+    return await _export_response(db, quotation_id, "pdf", current_user, if_none_match)
+
+@router.post("/exports/quotations/archive")
+@require_permissions([Permission.VIEW_QUOTATION])
+async def export_quotation_archive(
+    *,
+    db: Session = Depends(get_db),
+    archive_in: QuotationArchiveRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """필터에 맞는 견적서 PDF/Excel을 ZIP 하나로 스트리밍"""
+    try:
+        headers = quotation_export.find_archive_quotations(
+            db,
+            archive_in,
+            user_id=current_user.id,
+            is_admin=current_user.role == "admin"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not headers:
+        raise HTTPException(status_code=404, detail="No quotations match the filter")
+
+    filename = f"quotations_{datetime.now():%Y%m%d}.zip"
+    return StreamingResponse(
+        quotation_export.iter_quotation_archive(db, headers, archive_in.formats),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+def _job_response(job: ExportJob) -> ExportJobResponse:
+    return ExportJobResponse(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        progress=job.progress,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        download_url=(
+            f"/api/exports/jobs/{job.id}/download" if job.status == "completed" else None
+        )
+    )
+
+def _get_user_job(db: Session, job_id: int, current_user: User) -> ExportJob:
+    job = export_jobs.get_export_job(db, job_id)
+    # 다른 사용자의 작업은 존재 여부도 드러내지 않음
+    if not job or (current_user.role != "admin" and job.user_id != current_user.id):
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
+@router.post("/exports/jobs", response_model=ExportJobResponse, status_code=202)
+@require_permissions([Permission.VIEW_QUOTATION])
+async def submit_export_job(
+    *,
+    db: Session = Depends(get_db),
+    job_in: ExportJobCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """백그라운드 내보내기 작업 등록 (같은 작업이 진행 중이면 그 작업 반환)"""
+    if not export_jobs.export_job_runner.running:
+        # 서버리스 진입점처럼 startup 이벤트 없이 뜬 프로세스에서는 작업을 처리할 수 없음
+        raise HTTPException(
+            status_code=503,
+            detail="Background export jobs are not available on this deployment"
+        )
+    try:
+        job = export_jobs.submit_export_job(
+            db,
+            job_in.kind,
+            job_in.params,
+            user_id=current_user.id,
+            is_admin=current_user.role == "admin"
+        )
+    except export_jobs.ExportJobLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _job_response(job)
+
+@router.get("/exports/jobs/{job_id}", response_model=ExportJobResponse)
+@require_permissions([Permission.VIEW_QUOTATION])
+async def read_export_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """내보내기 작업 상태/진행률 조회 (완료되면 download_url 포함)"""
+    return _job_response(_get_user_job(db, job_id, current_user))
+
+@router.get("/exports/jobs/{job_id}/download")
+@require_permissions([Permission.VIEW_QUOTATION])
+async def download_export_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """완료된 내보내기 작업 결과 다운로드"""
+    job = _get_user_job(db, job_id, current_user)
+    if job.status == "expired":
+        raise HTTPException(status_code=410, detail="Export result is no longer available")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail="Export job is not completed")
+    if not job.result_path or not os.path.exists(job.result_path):
+        raise HTTPException(status_code=410, detail="Export result is no longer available")
+
+    extension = export_jobs.job_extension(job)
+    media_type = (
+        "application/zip" if extension == "zip"
+        else quotation_export.EXPORT_FORMATS[extension][1]
+    )
     return FileResponse(
-        pdf_path,
-        media_type="application/pdf",
-        filename=filename
-    )
\ No newline at end of file
+        job.result_path,
+        media_type=media_type,
+        filename=f"export_{job.id}.{extension}"
+    )
@@ -1,24 +1,46 @@
 from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import date
-import io
 
 from app.db.base import get_db
 from app.core.auth import get_current_active_user, get_current_active_superuser
 from app.core.permissions import require_permissions, Permission
+from app.core.price_cache import price_cache
 from app.services import price_table as price_table_service
 from app.schemas.price_table import (
+    EffectivePrice,
+    EffectivePriceRequest,
     PriceTable,
     PriceTableCreate,
     PriceTableUpdate,
-    PriceTableImport
+    PriceTableImport,
+    PriceTableValidationResult
 )
 from app.schemas.user import User
 
 router = APIRouter()
 
+# 내보내기 형식별 (생성 함수, MIME 타입)
+EXPORT_FORMATS = {
+    "xlsx": (
+        price_table_service.iter_price_tables_xlsx,
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    ),
+    "csv": (price_table_service.iter_price_tables_csv, "text/csv; charset=utf-8"),
+    "parquet": (price_table_service.iter_price_tables_parquet, "application/vnd.apache.parquet"),
+    "arrow": (price_table_service.iter_price_tables_arrow, "application/vnd.apache.arrow.stream"),
+}
+
+@router.get("/cache/stats")
+@require_permissions([Permission.VIEW_PRICE_TABLES])
+async def read_price_cache_stats(
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """유효 단가 캐시 적중/미스 통계"""
+    return price_cache.stats()
+
 @router.get("/{company_id}", response_model=List[PriceTable])
 @require_permissions([Permission.VIEW_PRICE_TABLES])
 async def read_price_tables(
@@ -38,6 +60,49 @@ async def read_price_tables(
         valid_date=valid_date
     )
 
+@router.get("/{company_id}/effective", response_model=PriceTable)
+@require_permissions([Permission.VIEW_PRICE_TABLES])
+async def read_effective_price(
+    company_id: int,
+    name: str,
+    unit: str,
+    valid_date: date = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """항목의 유효 단가 조회"""
+    price_table = price_table_service.get_effective_price(
+        db,
+        company_id=company_id,
+        name=name,
+        unit=unit,
+        valid_date=valid_date or date.today()
+    )
+    if not price_table:
+        raise HTTPException(status_code=404, detail="Price table not found")
+    return price_table
+
+@router.post("/{company_id}/effective", response_model=List[EffectivePrice])
+@require_permissions([Permission.VIEW_PRICE_TABLES])
+async def read_effective_prices(
+    company_id: int,
+    request: EffectivePriceRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """여러 항목의 유효 단가 일괄 조회"""
+    keys = [(item.name, item.unit) for item in request.items]
+    prices = price_table_service.get_effective_prices(
+        db,
+        company_id=company_id,
+        items=keys,
+        valid_date=request.valid_date or date.today()
+    )
+    return [
+        {"name": name, "unit": unit, "price_table": prices.get((name, unit))}
+        for name, unit in keys
+    ]
+
 @router.post("/{company_id}", response_model=PriceTable)
 @require_permissions([Permission.MANAGE_PRICE_TABLES])
 async def create_price_table(
@@ -84,52 +149,81 @@ async def import_price_tables(
     file: UploadFile = File(...),
     valid_from: date = None,
     valid_until: date = None,
+    mode: str = "append",
+    close_missing: bool = True,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_superuser)
 ) -> Any:
-    """엑셀 파일에서 단가표 가져오기"""
-    contents = await file.read()
+    """엑셀 파일에서 단가표 가져오기
+
+    mode=append는 모든 행을 추가하고, mode=diff는 기존 단가표와 비교해
+    변경된 행만 추가/수정/마감한다.
+    """
+    if mode not in ["append", "diff"]:
+        raise HTTPException(status_code=400, detail="Invalid import mode")
     
     try:
-        # 데이터 파싱
-        data = price_table_service.parse_excel_file(contents)
+        # 업로드 파일(xlsx, parquet, arrow)을 청크 단위로 스트리밍 파싱
+        chunks = price_table_service.iter_import_chunks(file.file, file.filename)
         
-        # 데이터 유효성 검사
-        if not price_table_service.validate_price_table_data(data):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid file format or data"
-            )
-        
-        # 데이터 가져오기
+        # 청크별 검증/변환 후 단일 트랜잭션으로 일괄 저장
         import_data = PriceTableImport(
             company_id=company_id,
             valid_from=valid_from or date.today(),
             valid_until=valid_until,
-            file_content=data
+            file_content=[]
         )
         
-        price_tables = price_table_service.import_price_tables(db, import_data)
-        return {"message": f"Successfully imported {len(price_tables)} price tables"}
-        
+        if mode == "diff":
+            result = price_table_service.diff_import_price_table_chunks(
+                db, import_data, chunks, close_missing=close_missing
+            )
+        else:
+            result = price_table_service.import_price_table_chunks(
+                db, import_data, chunks
+            )
     except Exception as e:
         raise HTTPException(
             status_code=400,
             detail=f"Failed to import price tables: {str(e)}"
         )
+    
+    if result.errors:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "message": "Invalid file format or data",
+                "errors": [error.dict() for error in result.errors]
+            }
+        )
+    
+    if mode == "diff":
+        return {
+            "message": (
+                f"Inserted {result.inserted}, updated {result.updated}, "
+                f"closed {result.closed} price tables"
+            ),
+            **result.dict(exclude={"errors"})
+        }
+    
+    return {
+        "message": f"Successfully imported {result.imported} price tables",
+        "imported": result.imported
+    }
 
 @router.post("/{company_id}/import/preview")
 @require_permissions([Permission.MANAGE_PRICE_TABLES])
 async def preview_price_table_import(
     company_id: int,
     file: UploadFile = File(...),
+    rows: int = Query(price_table_service.PREVIEW_ROWS, ge=1, le=100),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     """단가표 가져오기 미리보기"""
-    contents = await file.read()
-    
     try:
-        preview_data = price_table_service.preview_price_table_import(contents)
+        preview_data = price_table_service.preview_price_table_import(
+            file.file, limit=rows
+        )
         return {"preview": preview_data}
     except Exception as e:
         raise HTTPException(
@@ -137,17 +231,51 @@ async def preview_price_table_import(
             detail=f"Failed to preview price tables: {str(e)}"
         )
 
+@router.post("/{company_id}/import/validate", response_model=PriceTableValidationResult)
+@require_permissions([Permission.MANAGE_PRICE_TABLES])
+async def validate_price_table_import(
+    company_id: int,
+    file: UploadFile = File(...),
+    valid_from: date = None,
+    valid_until: date = None,
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """단가표 가져오기 검증 (행별 오류 마스크)"""
+    try:
+        return price_table_service.validate_price_table_file(
+            file.file,
+            valid_from=valid_from or date.today(),
+            valid_until=valid_until,
+            filename=file.filename
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Failed to validate price tables: {str(e)}"
+        )
+
 @router.get("/{company_id}/export")
 @require_permissions([Permission.VIEW_PRICE_TABLES])
 async def export_price_tables(
     company_id: int,
     start_date: date = None,
     end_date: date = None,
+    format: str = "xlsx",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
-    """단가표 내보내기"""
-    excel_data = price_table_service.export_price_tables(
+    """단가표 내보내기 (xlsx, csv, parquet, arrow)"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid export format")
+    
+    exporter, media_type = EXPORT_FORMATS[format]
+    if format in ("parquet", "arrow"):
+        try:
+            price_table_service.require_pyarrow()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    content = exporter(
         db,
         company_id=company_id,
         start_date=start_date,
@@ -155,9 +283,9 @@ async def export_price_tables(
     )
     
     return StreamingResponse(
-        io.BytesIO(excel_data),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        content,
+        media_type=media_type,
         headers={
-            "Content-Disposition": f"attachment; filename=price_tables_{company_id}.xlsx"
+            "Content-Disposition": f"attachment; filename=price_tables_{company_id}.{format}"
         }
-    )
\ No newline at end of file
+    )
@@ -1,11 +1,21 @@
-from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from app.db.base import get_db
 from app.core.auth import get_current_active_user
+from app.core.config import settings
 from app.core.permissions import require_permissions, Permission
 from app.services import quotation as quotation_service
-from app.schemas.quotation import Quotation, QuotationCreate, QuotationUpdate
+from app.schemas.quotation import (
+    Quotation,
+    QuotationCreate,
+    QuotationUpdate,
+    QuotationItemsPatch,
+    QuotationBatchCreate,
+    QuotationBatchResult,
+    QuotationPreviewRequest,
+    QuotationPreview,
+)
 from app.schemas.user import User
 
 router = APIRouter()
@@ -13,19 +23,30 @@ router = APIRouter()
 @router.get("/", response_model=List[Quotation])
 @require_permissions([Permission.VIEW_QUOTATION])
 async def read_quotations(
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=100)
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None
 ) -> Any:
-    """견적서 목록 조회"""
-    quotations = quotation_service.get_quotations(
-        db,
-        user_id=current_user.id,
-        skip=skip,
-        limit=limit,
-        is_admin=(current_user.role == "admin")
-    )
+    """견적서 목록 조회
+
+    다음 페이지 커서는 X-Next-Cursor 헤더로 반환한다.
+    """
+    try:
+        quotations = quotation_service.get_quotations(
+            db,
+            user_id=current_user.id,
+            skip=skip,
+            limit=limit,
+            is_admin=(current_user.role == "admin"),
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(quotations) == limit:
+        response.headers["X-Next-Cursor"] = quotation_service.encode_cursor(quotations[-1])
     return quotations
 
 @router.post("/", response_model=Quotation)
@@ -49,6 +70,45 @@ async def create_quotation(
     )
     return quotation
 
+@router.post("/batch", response_model=QuotationBatchResult)
+@require_permissions([Permission.CREATE_QUOTATION])
+async def create_quotations_batch(
+    *,
+    db: Session = Depends(get_db),
+    batch_in: QuotationBatchCreate,
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """견적서 일괄 생성 (건별 결과 반환)"""
+    if current_user.role not in ["admin", "project_manager"]:
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions to create quotation"
+        )
+    if len(batch_in.quotations) > settings.QUOTATION_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many quotations (max {settings.QUOTATION_BATCH_MAX_SIZE})"
+        )
+    return quotation_service.create_quotations_batch(
+        db,
+        quotations=batch_in.quotations,
+        user_id=current_user.id
+    )
+
+@router.post("/preview", response_model=QuotationPreview)
+@require_permissions([Permission.CREATE_QUOTATION])
+async def preview_quotation(
+    *,
+    db: Session = Depends(get_db),
+    preview_in: QuotationPreviewRequest,
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """견적 금액 미리보기 (저장/버전 증가 없음)"""
+    try:
+        return quotation_service.preview_quotation(db, preview_in)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/{quotation_id}", response_model=Quotation)
 @require_permissions([Permission.VIEW_QUOTATION])
 async def read_quotation(
@@ -58,7 +118,9 @@ async def read_quotation(
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     """견적서 상세 조회"""
-    quotation = quotation_service.get_quotation(db, quotation_id=quotation_id)
+    quotation = quotation_service.get_quotation(
+        db, quotation_id=quotation_id, load="detail"
+    )
     if not quotation:
         raise HTTPException(status_code=404, detail="Quotation not found")
     if (current_user.role != "admin" and
@@ -87,6 +149,30 @@ async def update_quotation(
         raise HTTPException(status_code=404, detail="Quotation not found")
     return quotation
 
+@router.patch("/{quotation_id}/items", response_model=Quotation)
+@require_permissions([Permission.EDIT_QUOTATION])
+async def patch_quotation_items(
+    *,
+    db: Session = Depends(get_db),
+    quotation_id: int,
+    patch_in: QuotationItemsPatch,
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """견적서 항목 부분 수정 (추가/수정/삭제)"""
+    try:
+        quotation = quotation_service.patch_quotation_items(
+            db,
+            quotation_id=quotation_id,
+            patch=patch_in,
+            user_id=current_user.id,
+            is_admin=(current_user.role == "admin")
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not quotation:
+        raise HTTPException(status_code=404, detail="Quotation not found")
+    return quotation
+
 @router.delete("/{quotation_id}")
 @require_permissions([Permission.DELETE_QUOTATION])
 async def delete_quotation(
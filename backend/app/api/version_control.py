@@ -1,33 +1,145 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.db.base import get_db
-from app.core.auth import get_current_active_user
-from app.models.models import User, QuotationVersion
-from app.schemas.quotation import VersionCreate, VersionResponse
+from app.core.auth import get_current_active_user, get_current_active_superuser
+from app.core.permissions import require_permissions, Permission
+from app.models.models import User, Quotation, QuotationVersion
+from app.schemas.quotation import (
+    VersionCreate,
+    VersionResponse,
+    VersionSummary,
+    VersionDiff,
+    VersionCompactionResult,
+)
 from app.services.version_service import VersionService
+from app.services.version_compaction import compact_versions
 
 router = APIRouter()
 
+def _check_quotation_access(db: Session, quotation_id: int, current_user: User) -> None:
+    """견적서 작성자 또는 관리자만 버전 내용 조회 가능"""
+    quotation = (
+        db.query(Quotation.id, Quotation.created_by)
+        .filter(Quotation.id == quotation_id)
+        .first()
+    )
+    if not quotation:
+        raise HTTPException(status_code=404, detail="Quotation not found")
+    if current_user.role != "admin" and quotation.created_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
 @router.post("/quotations/{quotation_id}/versions", response_model=VersionResponse)
+@require_permissions([Permission.EDIT_QUOTATION])
 async def create_version(
     quotation_id: int,
     version_data: VersionCreate,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
+    """버전 직접 기록 (견적서 버전 번호가 오르므로 작성자/관리자만)"""
+    _check_quotation_access(db, quotation_id, current_user)
     version_service = VersionService(db)
-    return version_service.create_version(
-        quotation_id=quotation_id,
-        changes=version_data.changes,
-        user_id=current_user.id
-    )
+    try:
+        version = version_service.create_version(
+            quotation_id=quotation_id,
+            changes=version_data.changes,
+            user_id=current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if version is None:
+        raise HTTPException(status_code=404, detail="Quotation not found")
+    return version
 
 @router.get("/quotations/{quotation_id}/versions", response_model=List[VersionResponse])
+@require_permissions([Permission.VIEW_QUOTATION])
 async def get_version_history(
     quotation_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """버전 히스토리 조회 (최신순, 다음 페이지 커서는 X-Next-Cursor 헤더)"""
+    _check_quotation_access(db, quotation_id, current_user)
+    version_service = VersionService(db)
+    versions = version_service.get_version_history(quotation_id, limit=limit, before=cursor)
+    if len(versions) == limit:
+        response.headers["X-Next-Cursor"] = str(versions[-1].version_number)
+    return versions
+
+@router.get("/quotations/{quotation_id}/versions/summary", response_model=List[VersionSummary])
+@require_permissions([Permission.VIEW_QUOTATION])
+async def get_version_summaries(
+    quotation_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """버전 요약 목록 (번호, 작성자, 시각, 변경 건수만)"""
+    _check_quotation_access(db, quotation_id, current_user)
+    version_service = VersionService(db)
+    summaries = version_service.get_version_summaries(quotation_id, limit=limit, before=cursor)
+    if len(summaries) == limit:
+        response.headers["X-Next-Cursor"] = str(summaries[-1]["version_number"])
+    return summaries
+
+@router.get("/quotations/{quotation_id}/versions/diff", response_model=VersionDiff)
+@require_permissions([Permission.VIEW_QUOTATION])
+async def get_version_diff(
+    quotation_id: int,
+    from_version: int = Query(..., alias="from", ge=1),
+    to_version: int = Query(..., alias="to", ge=1),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """두 버전 사이의 변경 내용 조회 (서버에서 재생/비교)"""
+    _check_quotation_access(db, quotation_id, current_user)
+    if from_version > to_version:
+        raise HTTPException(status_code=400, detail="'from' must not be greater than 'to'")
+    version_service = VersionService(db)
+    diff = version_service.diff_versions(quotation_id, from_version, to_version)
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return diff
+
+@router.post("/admin/versions/compact", response_model=VersionCompactionResult)
+async def compact_version_history(
+    older_than_days: Optional[int] = Query(None, ge=0),
+    batch_size: Optional[int] = Query(None, ge=1, le=1000),
+    max_batches: int = Query(10, ge=1, le=100),
+    after_id: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_active_superuser),
+    db: Session = Depends(get_db)
+):
+    """오래된 견적서 버전 이력 압축 (관리자, 요청당 max_batches 배치까지)
+
+    finished가 false면 last_quotation_id를 after_id로 넘겨 이어서 실행한다.
+    """
+    return compact_versions(
+        db,
+        older_than_days=older_than_days,
+        batch_size=batch_size,
+        max_batches=max_batches,
+        after_id=after_id
+    )
+
+@router.get("/quotations/{quotation_id}/versions/{version_number}", response_model=VersionResponse)
+@require_permissions([Permission.VIEW_QUOTATION])
+async def get_version(
+    quotation_id: int,
+    version_number: int,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
+    """특정 버전 전체 내용 조회"""
+    _check_quotation_access(db, quotation_id, current_user)
     version_service = VersionService(db)
-    return version_service.get_version_history(quotation_id)
\ No newline at end of file
+    version = version_service.get_version(quotation_id, version_number)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return version
@@ -0,0 +1,48 @@
+"""오래된 견적서 버전 이력 압축
+
+사용법: python -m app.cli.compact_versions --days 180 --batch-size 100
+"""
+import argparse
+import sys
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.schemas.quotation import VersionCompactionResult
+from app.services.version_compaction import compact_versions
+
+def report(result: VersionCompactionResult) -> None:
+    print(
+        f"batch {result.batches}: quotations={result.quotations} "
+        f"deleted={result.versions_deleted} snapshots={result.snapshots_written} "
+        f"last_id={result.last_quotation_id}",
+        flush=True
+    )
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="견적서 버전 이력 압축")
+    parser.add_argument("--days", type=int, default=settings.VERSION_COMPACTION_AGE_DAYS,
+                        help="마지막 수정 후 경과 일수 기준")
+    parser.add_argument("--batch-size", type=int, default=settings.VERSION_COMPACTION_BATCH_SIZE,
+                        help="배치(커밋)당 견적서 수")
+    parser.add_argument("--max-batches", type=int, default=None,
+                        help="최대 배치 수 (기본: 모두 처리)")
+    parser.add_argument("--after-id", type=int, default=0,
+                        help="이 견적서 ID 다음부터 처리 (중단 후 재개)")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        result = compact_versions(
+            db,
+            older_than_days=args.days,
+            batch_size=args.batch_size,
+            max_batches=args.max_batches,
+            after_id=args.after_id,
+            on_progress=report
+        )
+    finally:
+        db.close()
+    print(f"done: {result.json()}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
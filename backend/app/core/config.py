@@ -1,4 +1,5 @@
 from typing import Optional
+from decimal import Decimal
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -21,6 +22,60 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # 단가표 가져오기 시 허용하는 단위 목록 (비어 있으면 제한 없음)
+    PRICE_TABLE_UNITS: list = []
+
+    # 유효 단가 스냅샷 캐시 (프로세스별)
+    PRICE_CACHE_MAX_ENTRIES: int = 256
+    PRICE_CACHE_TTL_SECONDS: int = 300
+
+    # 견적서 번호를 DB에서 한 번에 예약하는 개수 (프로세스별)
+    QUOTE_NUMBER_BLOCK_SIZE: int = 20
+
+    # 견적서 일괄 생성 요청당 최대 건수
+    QUOTATION_BATCH_MAX_SIZE: int = 500
+
+    # 견적서 버전 이력: N 버전마다 전체 스냅샷 저장 (그 사이는 델타)
+    QUOTATION_SNAPSHOT_INTERVAL: int = 10
+
+    # 버전 이력 압축: 마지막 수정 후 N일 지난 견적서 대상, 배치당 견적서 수
+    VERSION_COMPACTION_AGE_DAYS: int = 180
+    VERSION_COMPACTION_BATCH_SIZE: int = 100
+
+    # 견적 미리보기 기본 부가세율 / 통화 (통화가 비어 있으면 소수 2자리)
+    QUOTATION_VAT_RATE: Decimal = Decimal("0.1")
+    QUOTATION_CURRENCY: Optional[str] = None
+
+    # 견적서 내보내기 렌더링 캐시 (비우면 시스템 임시 디렉터리 사용)
+    # /tmp가 작은 서버리스 환경에서는 끄고 메모리에서 바로 스트리밍
+    EXPORT_CACHE_ENABLED: bool = True
+    EXPORT_CACHE_DIR: Optional[str] = None
+    EXPORT_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # 렌더링 결과를 메모리에 두는 최대 크기 (넘으면 임시 파일로 전환)
+    EXPORT_SPOOL_MAX_BYTES: int = 8 * 1024 * 1024
+
+    # 견적서 렌더링 프로세스 풀 (0이면 스레드 하나), 대기열 길이, 제한 시간(초)
+    EXPORT_RENDER_WORKERS: int = 2
+    EXPORT_RENDER_QUEUE_LIMIT: int = 16
+    EXPORT_RENDER_TIMEOUT_SECONDS: float = 60
+
+    # 견적서 ZIP 일괄 내보내기: 요청당 최대 견적서 수, 동시 렌더링 수
+    EXPORT_ARCHIVE_MAX_QUOTATIONS: int = 1000
+    EXPORT_ARCHIVE_CONCURRENCY: int = 4
+
+    # 백그라운드 내보내기 작업: 결과 디렉터리(비우면 임시 디렉터리), 동시 실행 수,
+    # 사용자별 동시 실행 수 / 대기 작업 한도, 작업 확인 주기(초),
+    # 이 시간(초)보다 오래 실행 중인 작업은 중단된 것으로 보고 실패 처리 (주기적으로 확인)
+    EXPORT_JOB_DIR: Optional[str] = None
+    EXPORT_JOB_WORKERS: int = 2
+    EXPORT_JOB_USER_CONCURRENCY: int = 1
+    EXPORT_JOB_USER_QUEUE_LIMIT: int = 5
+    EXPORT_JOB_POLL_SECONDS: float = 1.0
+    EXPORT_JOB_STALE_SECONDS: int = 3600
+    # 끝난 작업의 결과 파일 보관 시간(초), 지나면 파일을 지우고 expired 처리
+    EXPORT_JOB_RESULT_TTL_SECONDS: int = 86400
+
     class Config:
         case_sensitive = True
 
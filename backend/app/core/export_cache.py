@@ -0,0 +1,155 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from typing import BinaryIO, Dict, Optional, Tuple, Union
+
+from app.core.config import settings
+
+class CachedExport:
+    """디스크에 저장된 렌더링 결과"""
+
+    def __init__(self, path: str, etag: str, size: int):
+        self.path = path
+        self.etag = etag
+        self.size = size
+
+class ExportCache:
+    """견적서 렌더링 결과 디스크 캐시
+
+    (quotation_id, version, format, template, names) 별로 파일 하나를 저장하고,
+    전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 파일부터 지운다.
+    사용 시각은 파일 mtime으로 기록하므로 같은 디렉터리를 쓰는 여러
+    워커 프로세스가 캐시를 공유할 수 있다. enabled=False이면 디스크를
+    쓰지 않고 호출하는 쪽이 렌더링 결과를 메모리에서 바로 스트리밍한다.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, enabled: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if enabled:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(quotation_id: int, version: int, format: str, template: str, names: str = "") -> Tuple:
+        return (quotation_id, version, format, template, names)
+
+    @staticmethod
+    def etag(key: Tuple) -> str:
+        """키 기반 ETag (같은 키는 같은 내용이므로 렌더링 없이 비교 가능)"""
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()[:32]
+        return f'W/"{digest}"'
+
+    def _path(self, key: Tuple) -> str:
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.{key[2]}")
+
+    def get(self, key: Tuple) -> Optional[CachedExport]:
+        path = self._path(key)
+        try:
+            size = os.path.getsize(path)
+            os.utime(path)  # LRU 사용 시각 갱신
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return CachedExport(path, self.etag(key), size)
+
+    def put(self, key: Tuple, content: Union[bytes, BinaryIO]) -> CachedExport:
+        """렌더링 결과(내용 또는 파일 객체) 저장
+
+        임시 파일에 쓴 뒤 교체하므로 읽는 쪽은 완성본만 본다.
+        """
+        path = self._path(key)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                if isinstance(content, bytes):
+                    file.write(content)
+                else:
+                    shutil.copyfileobj(content, file)
+                size = file.tell()
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        self._evict(keep=path)
+        return CachedExport(path, self.etag(key), size)
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """전체 크기가 max_bytes 이하가 될 때까지 오래된 파일 삭제"""
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.is_file() or entry.name.endswith(".tmp"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            if total <= self.max_bytes:
+                return
+            for _, size, path in sorted(entries):
+                if path == keep:
+                    continue
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                self.evictions += 1
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def clear(self) -> None:
+        with self._lock:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.is_file():
+                        os.unlink(entry.path)
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "directory": self.directory,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더가 ETag와 일치하는지 (약한 비교)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    weak = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == weak:
+            return True
+    return False
+
+export_cache = ExportCache(
+    directory=settings.EXPORT_CACHE_DIR or os.path.join(tempfile.gettempdir(), "quotation-exports"),
+    max_bytes=settings.EXPORT_CACHE_MAX_BYTES,
+    enabled=settings.EXPORT_CACHE_ENABLED
+)
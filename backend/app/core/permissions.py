@@ -1,4 +1,5 @@
 from enum import Enum
+from functools import wraps
 from typing import List
 from fastapi import HTTPException, status
 
@@ -62,6 +63,7 @@ def check_permission(user_role: str, required_permission: str) -> bool:
 def require_permissions(required_permissions: List[str]):
     """Decorator for checking required permissions."""
     def decorator(func):
+        @wraps(func)
         async def wrapper(*args, **kwargs):
             current_user = kwargs.get("current_user")
             if not current_user:
@@ -82,6 +84,7 @@ def require_permissions(required_permissions: List[str]):
 
 def require_admin(func):
     """관리자 권한이 필요한 엔드포인트를 위한 데코레이터"""
+    @wraps(func)
     async def wrapper(*args, **kwargs):
         current_user = kwargs.get("current_user")
         if not current_user:
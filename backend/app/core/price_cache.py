@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+class PriceSnapshot:
+    """회사 단가표의 특정 일자 기준 유효 단가 스냅샷"""
+
+    def __init__(self, company_id: int, valid_date: date, rows: List[Dict]):
+        self.company_id = company_id
+        self.valid_date = valid_date
+        self.by_id: Dict[int, Dict] = {}
+        self.by_key: Dict[Tuple[str, str], Dict] = {}
+        # rows는 시작일 내림차순: 같은 항목이면 가장 최근에 시작한 행 사용
+        for row in rows:
+            self.by_id[row["id"]] = row
+            self.by_key.setdefault((row["name"], row["unit"]), row)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def get(self, price_table_id: int) -> Optional[Dict]:
+        return self.by_id.get(price_table_id)
+
+    def find(self, name: str, unit: str) -> Optional[Dict]:
+        return self.by_key.get((name, unit))
+
+class PriceCache:
+    """프로세스 내 유효 단가 스냅샷 캐시
+
+    (company_id, valid_date) 별 스냅샷을 LRU + TTL로 보관한다.
+    단가표가 변경되면 회사별 버전을 올려 이전 버전 스냅샷을 무효화한다.
+    다른 워커 프로세스의 변경은 TTL이 지나야 반영된다.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[int, date], Tuple[PriceSnapshot, int, float]]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def version(self, company_id: int) -> int:
+        with self._lock:
+            return self._versions.get(company_id, 0)
+
+    def get(self, company_id: int, valid_date: date) -> Optional[PriceSnapshot]:
+        key = (company_id, valid_date)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                snapshot, version, expires_at = entry
+                if (version == self._versions.get(company_id, 0)
+                        and expires_at > time.monotonic()):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return snapshot
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, snapshot: PriceSnapshot, version: int) -> None:
+        """스냅샷 저장 (조회 시작 시점의 버전을 넘겨야 함)"""
+        key = (snapshot.company_id, snapshot.valid_date)
+        with self._lock:
+            # 조회 중에 무효화되었으면 저장하지 않음
+            if version != self._versions.get(snapshot.company_id, 0):
+                return
+            self._entries[key] = (
+                snapshot, version, time.monotonic() + self.ttl_seconds
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, company_id: Optional[int] = None) -> None:
+        """회사(또는 전체) 단가 스냅샷 무효화"""
+        with self._lock:
+            if company_id is None:
+                for cached_company_id in list(self._versions):
+                    self._versions[cached_company_id] += 1
+                self._entries.clear()
+                return
+            self._versions[company_id] = self._versions.get(company_id, 0) + 1
+            for key in [key for key in self._entries if key[0] == company_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+price_cache = PriceCache(
+    max_entries=settings.PRICE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PRICE_CACHE_TTL_SECONDS
+)
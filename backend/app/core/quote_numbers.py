@@ -0,0 +1,80 @@
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import QuoteNumberSequence
+
+class QuoteNumberAllocator:
+    """일자별 견적서 번호 할당기 (SO-YYMMDD-NNN)
+
+    quote_number_sequences 카운터 행을 UPDATE ... RETURNING 한 번으로
+    block_size 만큼 예약하고, 예약한 구간은 프로세스 안에서 나눠 준다.
+    예약은 별도 트랜잭션에서 바로 커밋되므로 워커끼리 행 잠금을 오래
+    잡지 않으며, 쓰이지 않은 번호는 건너뛰어질 수 있다.
+    """
+
+    def __init__(self, block_size: int = 20):
+        self.block_size = block_size
+        self._blocks: Dict[date, Tuple[int, int]] = {}  # day -> (다음 값, 마지막 값)
+        self._lock = threading.Lock()
+
+    def allocate(self, db: Session, count: int = 1, day: Optional[date] = None) -> List[str]:
+        """견적서 번호 count개 할당"""
+        day = day or date.today()
+        with self._lock:
+            next_value, last_value = self._blocks.get(day, (1, 0))
+            values = list(range(next_value, min(last_value, next_value + count - 1) + 1))
+            needed = count - len(values)
+            if needed > 0:
+                size = max(self.block_size, needed)
+                start = self._reserve(db, day, size)
+                values.extend(range(start, start + needed))
+                next_value, last_value = start + needed, start + size - 1
+            else:
+                next_value += count
+            # 지난 일자의 남은 구간은 버림
+            self._blocks = {day: (next_value, last_value)}
+        prefix = f"SO-{day.strftime('%y%m%d')}"
+        return [f"{prefix}-{value:03d}" for value in values]
+
+    def _reserve(self, db: Session, day: date, size: int) -> int:
+        """카운터 행에서 size개 구간 예약 후 시작 값 반환"""
+        bind = db.get_bind()
+        engine = getattr(bind, "engine", bind)
+        with engine.begin() as conn:
+            _ensure_sequence_row(conn, day)
+            last_value = conn.execute(
+                update(QuoteNumberSequence)
+                .where(QuoteNumberSequence.day == day)
+                .values(last_value=QuoteNumberSequence.last_value + size)
+                .returning(QuoteNumberSequence.last_value)
+            ).scalar_one()
+        return last_value - size + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._blocks.clear()
+
+def _ensure_sequence_row(conn: Connection, day: date) -> None:
+    """해당 일자 카운터 행이 없으면 생성 (동시 생성은 무시)"""
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}.get(conn.dialect.name)
+    if dialect is None:
+        exists = conn.execute(
+            select(QuoteNumberSequence.day).where(QuoteNumberSequence.day == day)
+        ).first()
+        if exists is None:
+            conn.execute(insert(QuoteNumberSequence).values(day=day, last_value=0))
+        return
+    conn.execute(
+        dialect.insert(QuoteNumberSequence)
+        .values(day=day, last_value=0)
+        .on_conflict_do_nothing(index_elements=["day"])
+    )
+
+quote_number_allocator = QuoteNumberAllocator(block_size=settings.QUOTE_NUMBER_BLOCK_SIZE)
@@ -0,0 +1,172 @@
+import asyncio
+import io
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Dict, Optional, Set
+
+from app.core.config import settings
+
+class RenderPoolBusy(Exception):
+    """렌더링 대기열이 가득 참"""
+
+class RenderTimeout(Exception):
+    """렌더링 제한 시간 초과"""
+
+# 워커 프로세스별로 미리 만들어 둔 생성기 (형식 -> 생성기 인스턴스)
+_generators: Dict[str, object] = {}
+
+def _init_worker() -> None:
+    """워커 시작 시 렌더링 모듈을 import하고 생성기를 준비"""
+    from app.services.quotation_export import EXPORT_FORMATS
+    for format, (generator_class, _) in EXPORT_FORMATS.items():
+        _generators[format] = generator_class()
+
+def _render(data: dict, format: str) -> BinaryIO:
+    from app.services import quotation_export
+    return quotation_export.render_quotation(data, format, _generators.get(format))
+
+def _render_bytes(data: dict, format: str) -> bytes:
+    """프로세스 워커용: 결과를 부모 프로세스로 넘길 수 있게 bytes로 반환"""
+    with _render(data, format) as output:
+        return output.read()
+
+def _ping() -> bool:
+    return True
+
+class RenderPool:
+    """견적서 PDF/Excel 렌더링 실행기
+
+    렌더링은 CPU를 오래 쓰므로 이벤트 루프 밖의 프로세스 풀에서 실행하고,
+    라우트는 결과를 await 한다. 실행 중 + 대기 중인 요청이
+    workers + max_queue 를 넘으면 RenderPoolBusy, timeout 초 안에
+    끝나지 않으면 RenderTimeout 을 낸다. 제한 시간이 지나도 실행 중인
+    렌더링이 있으면 실행기를 버리고 다음 요청에서 새로 만든다.
+    workers=0 이면 프로세스 대신 스레드 하나에서 렌더링한다
+    (테스트/서버리스 환경).
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 16, timeout: float = 60):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._active: Set[Future] = set()
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @property
+    def capacity(self) -> int:
+        return max(self.workers, 1) + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.workers > 0:
+                    # fork 대신 spawn: 스레드를 쓰는 API 프로세스를 복제하지 않음
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=1, thread_name_prefix="render"
+                    )
+            return self._executor
+
+    def warm_up(self) -> None:
+        """워커 프로세스를 미리 띄워 첫 요청의 시작 지연 제거"""
+        executor = self._get_executor()
+        for _ in range(self.workers):
+            executor.submit(_ping)
+
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            if future not in self._active:
+                return  # 제한 시간 초과로 이미 자리를 반환함
+            self._active.discard(future)
+            self._pending -= 1
+            if not future.cancelled() and future.exception() is None:
+                self.completed += 1
+
+    async def render(self, data: dict, format: str) -> BinaryIO:
+        """견적서 렌더링 (풀에서 실행, 결과 파일 객체 반환)"""
+        with self._lock:
+            if self._pending >= self.capacity:
+                self.rejected += 1
+                raise RenderPoolBusy("Render queue is full")
+            self._pending += 1
+        try:
+            # 스레드 모드는 스풀 파일을 그대로 넘기고, 프로세스 모드는 bytes로 받음
+            render = _render_bytes if self.workers > 0 else _render
+            executor = self._get_executor()
+            future = executor.submit(render, data, format)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        with self._lock:
+            self._active.add(future)
+        # 대기열 자리는 await 가 아니라 실제 렌더링이 끝날 때 반환
+        future.add_done_callback(self._release)
+
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            # 아직 시작하지 않았으면 대기열에서 제거, 실행 중이면 실행기 교체
+            if not future.cancel() and not future.done():
+                self._recycle(executor, future)
+            with self._lock:
+                self.timeouts += 1
+            raise RenderTimeout(f"Rendering took longer than {self.timeout}s")
+        except BrokenProcessPool:
+            # 워커가 비정상 종료되면 다음 요청에서 풀을 새로 만든다
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+        return io.BytesIO(result) if isinstance(result, bytes) else result
+
+    def _recycle(self, executor: Executor, future: Future) -> None:
+        """멈춘 렌더링의 실행기를 버리고 자리를 반환 (워커 프로세스는 종료)"""
+        with self._lock:
+            if future in self._active:
+                self._active.discard(future)
+                self._pending -= 1
+            if self._executor is not executor:
+                return  # 이미 다른 요청이 교체함
+            self._executor = None
+        # 같은 풀에서 실행 중이던 다른 렌더링은 BrokenProcessPool 로 끝난다
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False)
+        for process in processes:
+            process.terminate()
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "timeout": self.timeout,
+                "pending": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
+
+render_pool = RenderPool(
+    workers=settings.EXPORT_RENDER_WORKERS,
+    max_queue=settings.EXPORT_RENDER_QUEUE_LIMIT,
+    timeout=settings.EXPORT_RENDER_TIMEOUT_SECONDS
+)
@@ -3,6 +3,8 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.core.config import Settings
+from app.core.render_pool import render_pool
+from app.services.export_jobs import export_job_runner
 import sys
 import traceback
 
@@ -32,6 +34,8 @@ try:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # 다른 origin의 프론트엔드가 읽어야 하는 응답 헤더 (목록 커서, 내보내기 캐시/파일명)
+        expose_headers=["X-Next-Cursor", "ETag", "Content-Disposition"],
     )
 
     @app.get("/")
@@ -42,6 +46,16 @@ try:
     async def health_check():
         return {"status": "healthy"}
 
+    @app.on_event("startup")
+    async def start_render_pool():
+        render_pool.warm_up()
+        export_job_runner.start()
+
+    @app.on_event("shutdown")
+    async def stop_render_pool():
+        await export_job_runner.stop()
+        render_pool.shutdown(wait=False)
+
     @app.exception_handler(Exception)
     async def global_exception_handler(request: Request, exc: Exception):
         logger.error(f"Exception occurred: {str(exc)}")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Numeric, Text, Date, JSON, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Numeric, Text, Date, JSON, Boolean, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -35,14 +35,24 @@ class PriceTable(Base):
     __tablename__ = "price_tables"
 
     id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
     name = Column(String)
     unit = Column(String)
     unit_price = Column(Numeric(10, 2))
     description = Column(Text)
+    notes = Column(Text)
     valid_from = Column(Date)
     valid_until = Column(Date)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # 유효 단가 조회용 (PostgreSQL은 마이그레이션에서 daterange GiST 인덱스 추가)
+        Index(
+            "ix_price_tables_effective",
+            "company_id", "name", "unit", "valid_from", "valid_until"
+        ),
+    )
+
 class Quotation(Base):
     __tablename__ = "quotations"
 
@@ -63,6 +73,19 @@ class Quotation(Base):
     customer = relationship("Company")
     creator = relationship("User")
 
+    __table_args__ = (
+        # 목록 키셋 페이지네이션용 (작성자별 / 전체)
+        Index("ix_quotations_created_by_created_at", "created_by", "created_at", "id"),
+        Index("ix_quotations_created_at", "created_at", "id"),
+    )
+
+class QuoteNumberSequence(Base):
+    """일자별 견적서 번호 카운터 (블록 단위로 예약)"""
+    __tablename__ = "quote_number_sequences"
+
+    day = Column(Date, primary_key=True)
+    last_value = Column(Integer, nullable=False, default=0)
+
 class QuotationItem(Base):
     __tablename__ = "quotation_items"
 
@@ -93,8 +116,47 @@ class QuotationVersion(Base):
     quotation_id = Column(Integer, ForeignKey("quotations.id"))
     version_number = Column(Integer)
     changes = Column(JSON)
+    is_snapshot = Column(Boolean, nullable=False, default=False)  # True: 전체 상태, False: 이전 버전 대비 델타
+    change_count = Column(Integer)  # 이력 요약용 변경 건수
     created_at = Column(DateTime, default=func.now())
     created_by = Column(Integer, ForeignKey("users.id"))
     
     quotation = relationship("Quotation")
-    creator = relationship("User")
\ No newline at end of file
+    creator = relationship("User")
+
+    __table_args__ = (
+        # 번호는 quotations.version 카운터로 할당, 중복은 제약으로 차단
+        UniqueConstraint("quotation_id", "version_number", name="uq_quotation_versions_number"),
+    )
+
+class ExportJob(Base):
+    """백그라운드 내보내기 작업 (DB 기반 작업 큐)"""
+    __tablename__ = "export_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    kind = Column(String, nullable=False)  # quotation | archive
+    params = Column(JSON, nullable=False)
+    params_hash = Column(String(64), nullable=False)  # 중복 요청 판별용
+    status = Column(String, nullable=False, default="pending")  # pending | running | completed | failed | expired
+    progress = Column(Integer, nullable=False, default=0)  # 0 ~ 100
+    result_path = Column(String)
+    error = Column(Text)
+    created_at = Column(DateTime, default=func.now())
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    user = relationship("User")
+
+    __table_args__ = (
+        Index("ix_export_jobs_status", "status", "id"),
+        # 같은 사용자의 동일한 대기/실행 중 작업은 하나만 허용
+        Index(
+            "uq_export_jobs_active",
+            "user_id",
+            "params_hash",
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'running')"),
+            sqlite_where=text("status IN ('pending', 'running')")
+        ),
+    )
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+class ExportJobCreate(BaseModel):
+    kind: str  # quotation: {quotation_id, format} / archive: QuotationArchiveRequest 필드
+    params: Dict[str, Any] = {}
+
+class ExportJobResponse(BaseModel):
+    id: int
+    kind: str
+    status: str
+    progress: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    download_url: Optional[str] = None  # 완료된 경우에만
+
+    class Config:
+        orm_mode = True
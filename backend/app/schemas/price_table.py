@@ -32,12 +32,48 @@ class PriceTable(PriceTableBase):
     class Config:
         orm_mode = True
 
+class EffectivePriceItem(BaseModel):
+    name: str
+    unit: str
+
+class EffectivePriceRequest(BaseModel):
+    valid_date: Optional[date] = None
+    items: List[EffectivePriceItem]
+
+class EffectivePrice(EffectivePriceItem):
+    price_table: Optional[PriceTable] = None
+
 class PriceTableImport(BaseModel):
     company_id: int
     valid_from: date
     valid_until: Optional[date] = None
     file_content: List[dict]  # Excel 파일에서 파싱된 데이터
 
+class PriceTableImportError(BaseModel):
+    row: int  # 엑셀 기준 행 번호 (헤더 = 1)
+    field: Optional[str] = None
+    message: str
+
+class PriceTableImportResult(BaseModel):
+    imported: int = 0
+    errors: List[PriceTableImportError] = []
+
+class PriceTableDiffResult(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    closed: int = 0  # 유효기간이 마감된 기존 행 수
+    unchanged: int = 0
+    errors: List[PriceTableImportError] = []
+
+class PriceTableValidationResult(BaseModel):
+    rows: int
+    valid: bool
+    # 오류 행 번호와 오류 플래그 (1: 필수값 누락, 2: 단가 오류, 4: 단위 오류,
+    # 8: 날짜 오류, 16: 중복 항목)
+    error_rows: List[int] = []
+    error_flags: List[int] = []
+    errors: List[PriceTableImportError] = []
+
 class PriceTableExport(BaseModel):
     company_id: int
     start_date: Optional[date] = None
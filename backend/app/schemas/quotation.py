@@ -35,6 +35,75 @@ class QuotationUpdate(BaseModel):
     discount_amount: Optional[Decimal] = None
     items: Optional[List[QuotationItemCreate]] = None
 
+class QuotationItemUpdate(BaseModel):
+    id: int
+    price_table_id: Optional[int] = None
+    quantity: Optional[int] = None
+    unit_price: Optional[Decimal] = None
+    discount_amount: Optional[Decimal] = None
+
+class QuotationItemsPatch(BaseModel):
+    add: List[QuotationItemCreate] = []
+    update: List[QuotationItemUpdate] = []
+    remove: List[int] = []  # 삭제할 항목 ID
+
+class QuotationBatchCreate(BaseModel):
+    quotations: List[QuotationCreate]
+
+class QuotationBatchEntryResult(BaseModel):
+    index: int  # 요청 목록에서의 위치 (0부터)
+    success: bool
+    quotation_id: Optional[int] = None
+    quote_number: Optional[str] = None
+    total_amount: Optional[Decimal] = None
+    error: Optional[str] = None
+
+class QuotationBatchResult(BaseModel):
+    created: int = 0
+    failed: int = 0
+    results: List[QuotationBatchEntryResult] = []
+
+class QuotationArchiveRequest(BaseModel):
+    status: Optional[str] = None
+    customer_id: Optional[int] = None
+    date_from: Optional[date] = None  # 작성일 기준 (포함)
+    date_to: Optional[date] = None
+    formats: List[str] = ["pdf", "xlsx"]
+
+class QuotationPreviewItem(BaseModel):
+    price_table_id: int
+    quantity: int
+    unit_price: Optional[Decimal] = None  # 비우면 단가표 유효 단가 사용
+    discount_amount: Optional[Decimal] = Decimal('0')
+
+class QuotationPreviewRequest(BaseModel):
+    customer_id: int
+    price_date: Optional[date] = None  # 단가 기준일 (기본: 오늘)
+    discount_amount: Optional[Decimal] = Decimal('0')
+    vat_rate: Optional[Decimal] = None  # 비우면 설정값 사용
+    currency: Optional[str] = None
+    items: List[QuotationPreviewItem]
+
+class QuotationPreviewLine(BaseModel):
+    price_table_id: int
+    name: str
+    unit: str
+    quantity: int
+    unit_price: Decimal
+    discount_amount: Decimal
+    line_total: Decimal
+
+class QuotationPreview(BaseModel):
+    customer_id: int
+    price_date: date
+    items: List[QuotationPreviewLine]
+    subtotal: Decimal
+    discount_amount: Decimal
+    taxable_amount: Decimal
+    vat_amount: Decimal
+    total_amount: Decimal  # 저장 시 total_amount와 같은 값 (부가세 제외)
+    total_with_vat: Decimal
+
 class Quotation(QuotationBase):
     id: int
     quote_number: str
@@ -58,8 +127,57 @@ class VersionResponse(VersionBase):
     id: int
     quotation_id: int
     version_number: int
+    is_snapshot: bool = False
+    change_count: Optional[int] = None
     created_at: datetime
     created_by: int
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class VersionSummary(BaseModel):
+    version_number: int
+    created_by: int
+    author: Optional[str] = None
+    created_at: datetime
+    is_snapshot: bool = False
+    change_count: Optional[int] = None
+
+class VersionFieldChange(BaseModel):
+    old: Any = None
+    new: Any = None
+
+class VersionDiffLine(BaseModel):
+    item_id: int
+    price_table_id: Optional[int] = None
+    quantity: Optional[int] = None
+    unit_price: Optional[Decimal] = None
+    discount_amount: Optional[Decimal] = None
+    line_total: Decimal
+
+class VersionDiffLineChange(BaseModel):
+    item_id: int
+    price_table_id: Optional[int] = None
+    fields: Dict[str, VersionFieldChange]
+    line_total_before: Decimal
+    line_total_after: Decimal
+
+class VersionDiff(BaseModel):
+    quotation_id: int
+    from_version: int
+    to_version: int
+    quotation: Dict[str, VersionFieldChange]  # 견적서 필드 변경
+    added: List[VersionDiffLine]
+    removed: List[VersionDiffLine]
+    changed: List[VersionDiffLineChange]
+    total_before: Optional[Decimal] = None
+    total_after: Optional[Decimal] = None
+    total_delta: Decimal
+
+class VersionCompactionResult(BaseModel):
+    batches: int = 0
+    quotations: int = 0  # 압축한 견적서 수
+    versions_deleted: int = 0
+    snapshots_written: int = 0
+    last_quotation_id: Optional[int] = None  # 다음 실행 시작 위치
+    finished: bool = False  # 대상 견적서를 모두 처리했는지
@@ -0,0 +1,447 @@
+from typing import Awaitable, BinaryIO, Callable, Dict, Optional, Set
+from datetime import datetime, timedelta
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.export_cache import export_cache
+from app.db.base import SessionLocal
+from app.models.models import ExportJob, User
+from app.schemas.quotation import QuotationArchiveRequest
+from app.services import quotation_export
+
+logger = logging.getLogger("quotation-api")
+
+# 대기/실행 중 상태 (중복 판별, 사용자별 한도 계산 대상)
+ACTIVE_STATUSES = ("pending", "running")
+
+# 보관 시간이 지나면 결과 파일을 지우는 끝난 작업 상태
+FINISHED_STATUSES = ("completed", "failed")
+
+# 실행기가 멈춘 작업/만료된 결과 정리를 반복하는 주기(초)
+MAINTENANCE_INTERVAL_SECONDS = 60
+
+class ExportJobLimitExceeded(Exception):
+    """사용자별 대기 작업 한도 초과"""
+
+def job_directory() -> str:
+    """작업 결과 파일 디렉터리"""
+    directory = settings.EXPORT_JOB_DIR or os.path.join(tempfile.gettempdir(), "quotation-export-jobs")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+def job_extension(job: ExportJob) -> str:
+    return job.params["format"] if job.kind == "quotation" else "zip"
+
+def normalize_job_params(
+    db: Session,
+    kind: str,
+    params: Dict,
+    user_id: int,
+    is_admin: bool = False
+) -> Dict:
+    """작업 파라미터 검증 및 정규화 (같은 요청이면 같은 값이 되도록)"""
+    if kind == "quotation":
+        quotation_export.check_formats([params.get("format")])
+        try:
+            quotation_id = int(params.get("quotation_id"))
+        except (TypeError, ValueError):
+            raise ValueError("quotation_id is required")
+        header = quotation_export.get_export_header(db, quotation_id)
+        if not header or (not is_admin and header.created_by != user_id):
+            raise ValueError("Quotation not found")
+        return {"quotation_id": quotation_id, "format": params["format"]}
+    if kind == "archive":
+        request = QuotationArchiveRequest(**params)
+        quotation_export.check_formats(request.formats)
+        request.formats = list(dict.fromkeys(request.formats))
+        return json.loads(request.json())
+    raise ValueError(f"Unknown export job kind: {kind}")
+
+def job_params_hash(kind: str, params: Dict) -> str:
+    raw = json.dumps({"kind": kind, "params": params}, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def _active_job(db: Session, user_id: int, params_hash: str) -> Optional[ExportJob]:
+    return (
+        db.query(ExportJob)
+        .filter(
+            ExportJob.user_id == user_id,
+            ExportJob.params_hash == params_hash,
+            ExportJob.status.in_(ACTIVE_STATUSES)
+        )
+        .first()
+    )
+
+def submit_export_job(
+    db: Session,
+    kind: str,
+    params: Dict,
+    user_id: int,
+    is_admin: bool = False
+) -> ExportJob:
+    """내보내기 작업 등록 (같은 대기/실행 중 작업이 있으면 그 작업 반환)"""
+    params = normalize_job_params(db, kind, params, user_id, is_admin)
+    params_hash = job_params_hash(kind, params)
+    existing = _active_job(db, user_id, params_hash)
+    if existing:
+        return existing
+
+    active = (
+        db.query(func.count(ExportJob.id))
+        .filter(ExportJob.user_id == user_id, ExportJob.status.in_(ACTIVE_STATUSES))
+        .scalar()
+    )
+    if active >= settings.EXPORT_JOB_USER_QUEUE_LIMIT:
+        raise ExportJobLimitExceeded(
+            f"Too many export jobs in progress (max {settings.EXPORT_JOB_USER_QUEUE_LIMIT})"
+        )
+
+    job = ExportJob(
+        user_id=user_id,
+        kind=kind,
+        params=params,
+        params_hash=params_hash,
+        status="pending",
+        progress=0,
+        created_at=datetime.utcnow()
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # 동시에 같은 작업이 등록된 경우 (부분 유니크 인덱스)
+        db.rollback()
+        existing = _active_job(db, user_id, params_hash)
+        if existing is None:
+            raise
+        return existing
+    db.refresh(job)
+    return job
+
+def get_export_job(db: Session, job_id: int) -> Optional[ExportJob]:
+    return db.query(ExportJob).filter(ExportJob.id == job_id).first()
+
+def fail_stale_jobs(db: Session, max_age_seconds: float) -> int:
+    """프로세스 종료 등으로 멈춘 실행 중 작업을 실패 처리
+
+    작업 시각은 DB 시계(func.now()) 대신 모두 Python UTC 시각으로 기록하고
+    비교하므로 DB 세션 시간대와 관계없이 기준이 같다.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+    count = db.execute(
+        update(ExportJob)
+        .where(ExportJob.status == "running", ExportJob.started_at < cutoff)
+        .values(status="failed", error="Interrupted", finished_at=datetime.utcnow())
+    ).rowcount
+    db.commit()
+    return count
+
+def expire_job_results(db: Session, ttl_seconds: float) -> int:
+    """보관 시간이 지난 작업 결과 파일 삭제 후 expired 처리"""
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    jobs = (
+        db.query(ExportJob)
+        .filter(ExportJob.status.in_(FINISHED_STATUSES), ExportJob.finished_at < cutoff)
+        .all()
+    )
+    for job in jobs:
+        if job.result_path:
+            try:
+                os.unlink(job.result_path)
+            except FileNotFoundError:
+                pass
+        job.status = "expired"
+        job.result_path = None
+    db.commit()
+    return len(jobs)
+
+ProgressCallback = Callable[[int], Awaitable[None]]
+
+async def _write_quotation_job(
+    db: Session,
+    job: ExportJob,
+    output: BinaryIO,
+    report_progress: ProgressCallback
+) -> None:
+    params = job.params
+    header = await asyncio.to_thread(quotation_export.get_export_header, db, params["quotation_id"])
+    if not header:
+        raise ValueError("Quotation not found")
+    if export_cache.enabled:
+        cached = await quotation_export.get_quotation_export(
+            db, header.id, header.version, params["format"], header.names
+        )
+        with open(cached.path, "rb") as content:
+            shutil.copyfileobj(content, output)
+        return
+    _, content = await quotation_export.render_quotation_export(db, header.id, params["format"])
+    with content:
+        shutil.copyfileobj(content, output)
+
+async def _write_archive_job(
+    db: Session,
+    job: ExportJob,
+    output: BinaryIO,
+    report_progress: ProgressCallback
+) -> None:
+    request = QuotationArchiveRequest(**job.params)
+
+    def find_headers() -> list:
+        user = db.query(User).filter(User.id == job.user_id).first()
+        return quotation_export.find_archive_quotations(
+            db, request, user_id=user.id, is_admin=user.role == "admin"
+        )
+
+    headers = await asyncio.to_thread(find_headers)
+    if not headers:
+        raise ValueError("No quotations match the filter")
+
+    async def on_progress(completed: int, total: int) -> None:
+        # 마지막 100%는 완료 처리에서
+        await report_progress(min(completed * 100 // total, 99))
+
+    async for data in quotation_export.iter_quotation_archive(
+        db, headers, request.formats, on_progress=on_progress
+    ):
+        output.write(data)
+
+JOB_WRITERS: Dict[str, Callable] = {
+    "quotation": _write_quotation_job,
+    "archive": _write_archive_job,
+}
+
+class ProgressRecorder:
+    """작업 진행률 기록 (값이 바뀔 때만, 별도 세션으로 스레드에서)
+
+    작성 중인 작업의 세션은 이벤트 루프의 렌더링 작업이 함께 쓰므로
+    진행률은 자기 세션으로 기록한다.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], job_id: int):
+        self.session_factory = session_factory
+        self.job_id = job_id
+        self.progress = 0
+
+    async def __call__(self, progress: int) -> None:
+        if progress != self.progress:
+            self.progress = progress
+            await asyncio.to_thread(self._save, progress)
+
+    def _save(self, progress: int) -> None:
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(ExportJob)
+                .where(ExportJob.id == self.job_id, ExportJob.status == "running")
+                .values(progress=progress)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+class ExportJobRunner:
+    """DB 작업 큐의 대기 작업을 가져와 백그라운드에서 실행
+
+    pending -> running 조건부 UPDATE로 작업을 가져가므로 여러 API
+    프로세스가 함께 실행해도 한 작업은 한 번만 실행된다. 사용자별 실행 중
+    작업이 user_concurrency 이상이면 그 사용자의 작업은 다음 차례로 미룬다.
+    렌더링 자체는 렌더링 풀에서 실행된다.
+
+    실행기는 ASGI startup 이벤트에서 시작되므로 lifespan을 끈 서버리스
+    진입점(backend/main.py, Mangum)에서는 실행되지 않는다. 이때는 작업
+    등록 API가 503을 반환하며, 작업 처리에는 uvicorn 같은 상주 서버가 필요하다.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        workers: int = 2,
+        user_concurrency: int = 1,
+        poll_interval: float = 1.0,
+        stale_seconds: float = 3600,
+        result_ttl_seconds: float = 86400
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.user_concurrency = user_concurrency
+        self.poll_interval = poll_interval
+        self.stale_seconds = stale_seconds
+        self.result_ttl_seconds = result_ttl_seconds
+        self._running: Set[asyncio.Future] = set()
+        self._task: Optional[asyncio.Future] = None
+
+    @property
+    def running(self) -> bool:
+        """실행 루프가 돌고 있는지 (등록한 작업이 처리될 수 있는지)"""
+        return self._task is not None and not self._task.done()
+
+    def claim_next(self) -> Optional[int]:
+        """실행할 작업 하나를 running으로 바꾸고 id 반환 (없으면 None)"""
+        db = self.session_factory()
+        try:
+            busy_users = [
+                user_id
+                for user_id, count in (
+                    db.query(ExportJob.user_id, func.count(ExportJob.id))
+                    .filter(ExportJob.status == "running")
+                    .group_by(ExportJob.user_id)
+                )
+                if count >= self.user_concurrency
+            ]
+            candidates = db.query(ExportJob.id).filter(ExportJob.status == "pending")
+            if busy_users:
+                candidates = candidates.filter(ExportJob.user_id.notin_(busy_users))
+            for (job_id,) in candidates.order_by(ExportJob.id).limit(self.workers * 4).all():
+                claimed = db.execute(
+                    update(ExportJob)
+                    .where(ExportJob.id == job_id, ExportJob.status == "pending")
+                    .values(status="running", started_at=datetime.utcnow())
+                ).rowcount
+                db.commit()
+                if claimed:
+                    return job_id
+            return None
+        finally:
+            db.close()
+
+    async def run_job(self, job_id: int) -> None:
+        """작업 실행 후 결과 파일 경로 또는 오류 기록
+
+        DB 조회/기록은 스레드에서 실행해 이벤트 루프(API 요청 처리)를 막지 않는다.
+        """
+        db = self.session_factory()
+        try:
+            job = await asyncio.to_thread(get_export_job, db, job_id)
+            path = os.path.join(job_directory(), f"{job.id}.{job_extension(job)}")
+            fd, temp_path = tempfile.mkstemp(dir=job_directory(), suffix=".tmp")
+            progress = ProgressRecorder(self.session_factory, job_id)
+            try:
+                with os.fdopen(fd, "wb") as output:
+                    await JOB_WRITERS[job.kind](db, job, output, progress)
+                os.replace(temp_path, path)
+            except asyncio.CancelledError:
+                # 종료 등으로 취소되면 임시 파일을 지우고 다시 대기 상태로 돌림
+                # (종료 중이므로 스레드를 거치지 않고 바로 기록)
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                db.rollback()
+                self.requeue(job_id)
+                raise
+            except Exception as e:
+                logger.error(f"Export job {job_id} failed: {e}")
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                await asyncio.to_thread(self._finish, db, job_id, None, str(e) or type(e).__name__)
+            else:
+                await asyncio.to_thread(self._finish, db, job_id, path, None)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _finish(db: Session, job_id: int, path: Optional[str], error: Optional[str]) -> None:
+        """작업 결과 기록 (완료: 결과 파일 경로, 실패: 오류 메시지)"""
+        db.rollback()
+        job = get_export_job(db, job_id)
+        if error is None:
+            job.status = "completed"
+            job.progress = 100
+            job.result_path = path
+        else:
+            job.status = "failed"
+            job.error = error
+        job.finished_at = datetime.utcnow()
+        db.commit()
+
+    def requeue(self, job_id: int) -> None:
+        """실행 중 작업을 처음부터 다시 실행하도록 대기 상태로 (새 세션 사용)"""
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(ExportJob)
+                .where(ExportJob.id == job_id, ExportJob.status == "running")
+                .values(status="pending", progress=0, started_at=None)
+            )
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to requeue export job {job_id}: {e}")
+        finally:
+            db.close()
+
+    def maintain(self) -> None:
+        """멈춘 실행 중 작업, 보관 시간이 지난 결과 정리 (실행 루프에서 주기적으로 호출)"""
+        db = self.session_factory()
+        try:
+            fail_stale_jobs(db, self.stale_seconds)
+            expire_job_results(db, self.result_ttl_seconds)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to clean up export jobs: {e}")
+        finally:
+            db.close()
+
+    async def _fill(self) -> None:
+        while len(self._running) < self.workers:
+            job_id = await asyncio.to_thread(self.claim_next)
+            if job_id is None:
+                return
+            task = asyncio.ensure_future(self.run_job(job_id))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def run_until_idle(self) -> None:
+        """대기 작업이 없을 때까지 실행"""
+        while True:
+            await self._fill()
+            if not self._running:
+                return
+            await asyncio.wait(set(self._running), return_when=asyncio.FIRST_COMPLETED)
+
+    async def run_forever(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_maintenance = loop.time()
+        while True:
+            if loop.time() >= next_maintenance:
+                await asyncio.to_thread(self.maintain)
+                next_maintenance = loop.time() + MAINTENANCE_INTERVAL_SECONDS
+            try:
+                await self._fill()
+            except Exception as e:
+                logger.error(f"Failed to claim export jobs: {e}")
+            if self._running:
+                await asyncio.wait(
+                    set(self._running),
+                    timeout=self.poll_interval,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+            else:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self.run_forever())
+
+    async def stop(self) -> None:
+        tasks = list(self._running)
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+export_job_runner = ExportJobRunner(
+    SessionLocal,
+    workers=settings.EXPORT_JOB_WORKERS,
+    user_concurrency=settings.EXPORT_JOB_USER_CONCURRENCY,
+    poll_interval=settings.EXPORT_JOB_POLL_SECONDS,
+    stale_seconds=settings.EXPORT_JOB_STALE_SECONDS,
+    result_ttl_seconds=settings.EXPORT_JOB_RESULT_TTL_SECONDS
+)
@@ -1,11 +1,86 @@
-from typing import List, Optional, Dict
-from datetime import date
+from typing import List, Optional, Dict, Tuple, Iterable, Iterator, Sequence, Union, BinaryIO
+from datetime import date, timedelta
+from decimal import Decimal
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, insert, func, tuple_
+from itertools import islice
+from openpyxl import Workbook, load_workbook
+from tempfile import SpooledTemporaryFile
+import numpy as np
 import pandas as pd
+import csv
 import io
+import os
+from app.core.config import settings
+from app.core.price_cache import price_cache, PriceSnapshot
 from app.models.models import PriceTable
-from app.schemas.price_table import PriceTableCreate, PriceTableUpdate, PriceTableImport
+from app.schemas.price_table import (
+    PriceTableCreate,
+    PriceTableUpdate,
+    PriceTableImport,
+    PriceTableImportError,
+    PriceTableImportResult,
+    PriceTableValidationResult,
+    PriceTableDiffResult
+)
+
+# 가져오기 시 한 번의 INSERT 문에 담는 최대 행 수
+IMPORT_BATCH_SIZE = 1000
+
+# 가져오기 실패 시 보고하는 최대 오류 수
+MAX_IMPORT_ERRORS = 1000
+
+# 가져오기 미리보기 기본 행 수
+PREVIEW_ROWS = 5
+
+# 행 검증 오류 비트 플래그 (오류 마스크 값)
+ROW_MISSING_FIELD = 1
+ROW_INVALID_PRICE = 2
+ROW_INVALID_UNIT = 4
+ROW_INVALID_DATE = 8
+ROW_DUPLICATE = 16
+
+REQUIRED_COLUMNS = ("Name", "Unit", "Unit price")
+
+# Numeric(10, 2) 컬럼에 저장 가능한 단가 상한
+MAX_UNIT_PRICE = 10 ** 8
+
+CENT = Decimal("0.01")
+
+# 재가져오기(diff) 시 변경 여부를 비교하는 값 컬럼
+DIFF_FIELDS = ("unit_price", "description", "notes")
+
+# 내보내기 컬럼 (가져오기 파일 형식과 동일)
+EXPORT_HEADERS = [
+    "Name",
+    "Unit",
+    "Unit price",
+    "Description",
+    "비고",
+    "Valid From",
+    "Valid Until",
+]
+
+# 내보내기 시 DB에서 한 번에 가져오는 행 수
+EXPORT_PAGE_SIZE = 1000
+
+# 내보내기 응답 청크 크기
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# XLSX 내보내기 시 메모리에 두는 최대 크기 (초과 시 임시 파일 사용)
+EXPORT_SPOOL_SIZE = 8 * 1024 * 1024
+
+# 가져오기로 채우는 price_tables 컬럼 (COPY 컬럼 순서)
+IMPORT_COLUMNS = (
+    "company_id",
+    "name",
+    "unit",
+    "unit_price",
+    "description",
+    "notes",
+    "valid_from",
+    "valid_until",
+)
 
 def get_price_table(db: Session, price_table_id: int) -> Optional[PriceTable]:
     return db.query(PriceTable).filter(PriceTable.id == price_table_id).first()
@@ -20,18 +95,76 @@ def get_price_tables(
     query = db.query(PriceTable).filter(PriceTable.company_id == company_id)
     
     if valid_date:
-        query = query.filter(
-            and_(
-                PriceTable.valid_from <= valid_date,
-                or_(
-                    PriceTable.valid_until.is_(None),
-                    PriceTable.valid_until >= valid_date
-                )
-            )
-        )
+        query = query.filter(_valid_at(db, valid_date))
     
     return query.offset(skip).limit(limit).all()
 
+def _valid_at(db: Session, valid_date: date):
+    """valid_date에 유효한 단가표 조건
+
+    PostgreSQL은 daterange GiST 인덱스를 타도록 범위 포함 연산자를 사용한다.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return func.daterange(
+            PriceTable.valid_from, PriceTable.valid_until, "[]"
+        ).op("@>")(valid_date)
+    return and_(
+        PriceTable.valid_from <= valid_date,
+        or_(
+            PriceTable.valid_until.is_(None),
+            PriceTable.valid_until >= valid_date
+        )
+    )
+
+def get_effective_price(
+    db: Session,
+    company_id: int,
+    name: str,
+    unit: str,
+    valid_date: date
+) -> Optional[PriceTable]:
+    """valid_date 기준 항목의 유효 단가 조회"""
+    return (
+        db.query(PriceTable)
+        .filter(
+            PriceTable.company_id == company_id,
+            PriceTable.name == name,
+            PriceTable.unit == unit,
+            _valid_at(db, valid_date)
+        )
+        .order_by(PriceTable.valid_from.desc(), PriceTable.id.desc())
+        .first()
+    )
+
+def get_effective_prices(
+    db: Session,
+    company_id: int,
+    items: Iterable[Tuple[str, str]],
+    valid_date: date
+) -> Dict[Tuple[str, str], PriceTable]:
+    """여러 (name, unit) 항목의 유효 단가를 한 번의 쿼리로 조회
+
+    유효기간이 겹치는 행이 있으면 가장 최근에 시작한 행을 사용한다.
+    """
+    keys = list(dict.fromkeys(items))
+    if not keys:
+        return {}
+
+    rows = (
+        db.query(PriceTable)
+        .filter(
+            PriceTable.company_id == company_id,
+            tuple_(PriceTable.name, PriceTable.unit).in_(keys),
+            _valid_at(db, valid_date)
+        )
+        .order_by(PriceTable.valid_from.desc(), PriceTable.id.desc())
+        .all()
+    )
+    prices = {}
+    for row in rows:
+        prices.setdefault((row.name, row.unit), row)
+    return prices
+
 def create_price_table(
     db: Session,
     price_table: PriceTableCreate
@@ -39,6 +172,7 @@ def create_price_table(
     db_price_table = PriceTable(**price_table.dict())
     db.add(db_price_table)
     db.commit()
+    price_cache.invalidate(db_price_table.company_id)
     db.refresh(db_price_table)
     return db_price_table
 
@@ -51,11 +185,15 @@ def update_price_table(
     if not db_price_table:
         return None
     
+    previous_company_id = db_price_table.company_id
     update_data = price_table.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_price_table, field, value)
     
     db.commit()
+    price_cache.invalidate(previous_company_id)
+    if db_price_table.company_id != previous_company_id:
+        price_cache.invalidate(db_price_table.company_id)
     db.refresh(db_price_table)
     return db_price_table
 
@@ -64,39 +202,516 @@ def delete_price_table(db: Session, price_table_id: int) -> bool:
     if not db_price_table:
         return False
     
+    company_id = db_price_table.company_id
     db.delete(db_price_table)
     db.commit()
+    price_cache.invalidate(company_id)
     return True
 
-def import_price_tables(
+def get_price_snapshot(
     db: Session,
-    import_data: PriceTableImport
-) -> List[PriceTable]:
-    new_price_tables = []
-    
-    for row in import_data.file_content:
-        price_table_data = PriceTableCreate(
-            company_id=import_data.company_id,
+    company_id: int,
+    valid_date: date
+) -> PriceSnapshot:
+    """회사의 valid_date 기준 유효 단가 스냅샷 (프로세스 캐시 사용)"""
+    snapshot = price_cache.get(company_id, valid_date)
+    if snapshot is not None:
+        return snapshot
+
+    # 조회 전 버전을 읽어 두어 조회 중 변경된 스냅샷은 캐시하지 않음
+    version = price_cache.version(company_id)
+    rows = (
+        db.query(
+            PriceTable.id,
+            PriceTable.name,
+            PriceTable.unit,
+            PriceTable.unit_price,
+            PriceTable.description,
+            PriceTable.notes,
+            PriceTable.valid_from,
+            PriceTable.valid_until
+        )
+        .filter(
+            PriceTable.company_id == company_id,
+            _valid_at(db, valid_date)
+        )
+        .order_by(PriceTable.valid_from.desc(), PriceTable.id.desc())
+        .all()
+    )
+    snapshot = PriceSnapshot(
+        company_id, valid_date, [dict(row._mapping) for row in rows]
+    )
+    price_cache.put(snapshot, version)
+    return snapshot
+
+class PriceTableValidation:
+    """단가표 프레임 검증 결과
+
+    mask는 행마다 ROW_* 플래그를 OR 한 uint8 배열이며 0이면 정상 행이다.
+    변환된 단가/유효기간 컬럼도 함께 보관해 INSERT 변환 시 재사용한다.
+    """
+
+    def __init__(self, size: int, row_offset: int = 2, row_numbers: Optional[Sequence[int]] = None):
+        self.row_offset = row_offset
+        # 빈 행을 건너뛴 엑셀 청크는 실제 시트 행 번호를 함께 받음
+        self.row_numbers = row_numbers
+        self.mask = np.zeros(size, dtype=np.uint8)
+        self.missing_columns: List[str] = []
+        self.unit_prices = np.full(size, np.nan)
+        self.valid_from = pd.Series(pd.NaT, index=range(size), dtype="datetime64[ns]")
+        self.valid_until = pd.Series(pd.NaT, index=range(size), dtype="datetime64[ns]")
+        self._checks: List[Tuple[str, str, np.ndarray]] = []
+
+    def add(self, flag: int, field: str, message: str, failed) -> None:
+        failed = np.asarray(failed, dtype=bool)
+        if failed.any():
+            self.mask[failed] |= flag
+            self._checks.append((field, message, failed))
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.mask == 0
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.mask.any()
+
+    def row_number(self, index: int) -> int:
+        """프레임 위치의 엑셀 행 번호"""
+        if self.row_numbers is not None:
+            return int(self.row_numbers[index])
+        return int(index) + self.row_offset
+
+    def error_rows(self) -> List[Tuple[int, int]]:
+        """오류 행의 (엑셀 행 번호, 오류 플래그) 목록"""
+        return [
+            (self.row_number(index), int(self.mask[index]))
+            for index in np.flatnonzero(self.mask)
+        ]
+
+    def errors(self, limit: int = MAX_IMPORT_ERRORS) -> List[PriceTableImportError]:
+        """오류 행의 필드별 오류 목록 (행 번호 순)"""
+        if self.missing_columns:
+            # 컬럼 누락은 헤더 행 오류로 한 번만 보고
+            return [
+                PriceTableImportError(row=1, field=column, message=f"{column} column is missing")
+                for column in self.missing_columns
+            ]
+        errors = [
+            PriceTableImportError(
+                row=self.row_number(index), field=field, message=message
+            )
+            for field, message, failed in self._checks
+            for index in np.flatnonzero(failed)[:limit]
+        ]
+        errors.sort(key=lambda error: error.row)
+        return errors[:limit]
+
+def _blank(series: pd.Series) -> np.ndarray:
+    """빈 셀(None, NaN, 공백 문자열) 여부"""
+    return (series.isna() | series.astype(str).str.strip().eq("")).to_numpy()
+
+def _date_column(
+    frame: pd.DataFrame,
+    column: str,
+    default: Optional[date],
+    validation: PriceTableValidation
+) -> pd.Series:
+    """행 단위 날짜 컬럼 파싱 (빈 셀은 가져오기 기본값 사용)"""
+    fallback = pd.Timestamp(default) if default else pd.NaT
+    if column not in frame.columns:
+        return pd.Series(fallback, index=frame.index, dtype="datetime64[ns]")
+
+    blank = _blank(frame[column])
+    parsed = pd.to_datetime(frame[column], errors="coerce")
+    validation.add(
+        ROW_INVALID_DATE, column, f"{column} is not a valid date",
+        ~blank & parsed.isna().to_numpy()
+    )
+    return parsed.where(~blank, fallback).astype("datetime64[ns]")
+
+def validate_price_table_frame(
+    frame: pd.DataFrame,
+    valid_from: Optional[date] = None,
+    valid_until: Optional[date] = None,
+    seen_keys: Optional[set] = None,
+    row_offset: int = 2,
+    row_numbers: Optional[Sequence[int]] = None
+) -> PriceTableValidation:
+    """단가표 프레임을 컬럼 단위로 한 번에 검증
+
+    필수 컬럼, 단가 숫자 변환, 단위 목록, 유효기간, 중복 항목을 검사한다.
+    seen_keys를 넘기면 이전 청크와의 중복도 검사하고 현재 청크 키를 추가한다.
+    """
+    frame = frame.reset_index(drop=True)
+    validation = PriceTableValidation(len(frame), row_offset, row_numbers)
+    if frame.empty:
+        return validation
+
+    validation.missing_columns = [
+        column for column in REQUIRED_COLUMNS if column not in frame.columns
+    ]
+    if validation.missing_columns:
+        validation.mask[:] = ROW_MISSING_FIELD
+        return validation
+
+    blank_name = _blank(frame["Name"])
+    blank_unit = _blank(frame["Unit"])
+    blank_price = _blank(frame["Unit price"])
+    validation.add(ROW_MISSING_FIELD, "Name", "Name is required", blank_name)
+    validation.add(ROW_MISSING_FIELD, "Unit", "Unit is required", blank_unit)
+    validation.add(ROW_MISSING_FIELD, "Unit price", "Unit price is required", blank_price)
+
+    # 단가: 천 단위 구분자를 허용하고 숫자로 변환
+    price_text = frame["Unit price"].astype(str).str.replace(",", "", regex=False).str.strip()
+    prices = pd.to_numeric(price_text, errors="coerce").to_numpy(dtype=float)
+    validation.unit_prices = prices
+    validation.add(
+        ROW_INVALID_PRICE, "Unit price", "Unit price is not a number",
+        ~blank_price & np.isnan(prices)
+    )
+    with np.errstate(invalid="ignore"):
+        validation.add(
+            ROW_INVALID_PRICE, "Unit price", "Unit price is out of range",
+            (prices < 0) | (prices >= MAX_UNIT_PRICE)
+        )
+
+    units = frame["Unit"].astype(str).str.strip()
+    if settings.PRICE_TABLE_UNITS:
+        validation.add(
+            ROW_INVALID_UNIT, "Unit", "Unit is not allowed",
+            ~blank_unit & ~units.isin(settings.PRICE_TABLE_UNITS).to_numpy()
+        )
+
+    starts = _date_column(frame, "Valid From", valid_from, validation)
+    ends = _date_column(frame, "Valid Until", valid_until, validation)
+    validation.valid_from = starts
+    validation.valid_until = ends
+    validation.add(
+        ROW_MISSING_FIELD, "Valid From", "Valid From is required",
+        starts.isna().to_numpy() & ~(validation.mask & ROW_INVALID_DATE).astype(bool)
+    )
+    validation.add(
+        ROW_INVALID_DATE, "Valid Until", "Valid Until is before Valid From",
+        (ends < starts).to_numpy()
+    )
+
+    # 중복 항목: 같은 (Name, Unit, Valid From)
+    keys = (
+        frame["Name"].astype(str).str.strip() + "\x1f" + units + "\x1f"
+        + starts.dt.strftime("%Y-%m-%d").fillna("")
+    )
+    keyed = ~blank_name & ~blank_unit
+    duplicated = keys.duplicated(keep="first").to_numpy()
+    if seen_keys:
+        duplicated = duplicated | keys.isin(seen_keys).to_numpy()
+    validation.add(
+        ROW_DUPLICATE, "Name", "Duplicate name and unit for the same validity",
+        duplicated & keyed
+    )
+    if seen_keys is not None:
+        seen_keys.update(keys[keyed].tolist())
+
+    return validation
+
+def _text_column(frame: pd.DataFrame, column: str) -> List[Optional[str]]:
+    """선택 텍스트 컬럼 (빈 셀은 None)"""
+    if column not in frame.columns:
+        return [None] * len(frame)
+    blank = _blank(frame[column])
+    text = frame[column].astype(str).str.strip().astype(object)
+    return text.where(~blank, None).tolist()
+
+def _frame_to_rows(
+    frame: pd.DataFrame,
+    validation: PriceTableValidation,
+    company_id: int
+) -> List[Dict]:
+    """검증된 프레임의 정상 행을 price_tables INSERT 파라미터로 변환"""
+    frame = frame.reset_index(drop=True)
+    names = frame["Name"].astype(str).str.strip().tolist()
+    units = frame["Unit"].astype(str).str.strip().tolist()
+    descriptions = _text_column(frame, "Description")
+    notes = _text_column(frame, "비고")
+    starts = validation.valid_from.tolist()
+    ends = validation.valid_until.tolist()
+
+    return [
+        {
+            "company_id": company_id,
+            "name": names[index],
+            "unit": units[index],
+            "unit_price": Decimal(str(validation.unit_prices[index])).quantize(CENT),
+            "description": descriptions[index],
+            "notes": notes[index],
+            "valid_from": starts[index].date(),
+            "valid_until": None if pd.isna(ends[index]) else ends[index].date(),
+        }
+        for index in np.flatnonzero(validation.valid)
+    ]
+
+def _copy_price_tables(db: Session, rows: List[Dict]) -> None:
+    """PostgreSQL COPY로 단가표 행 일괄 적재"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[column] for column in IMPORT_COLUMNS])
+    buffer.seek(0)
+
+    # 세션과 같은 트랜잭션의 DBAPI 커넥션 사용
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {PriceTable.__tablename__} ({', '.join(IMPORT_COLUMNS)}) "
+            "FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+def _bulk_insert_price_tables(db: Session, rows: List[Dict]) -> None:
+    """단가표 행을 배치 단위 multi-row INSERT(PostgreSQL은 COPY)로 적재"""
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        _copy_price_tables(db, rows)
+        return
+    for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+        db.execute(insert(PriceTable), rows[start:start + IMPORT_BATCH_SIZE])
+
+def _chunk_frame(chunk: Union[List[Dict], pd.DataFrame]) -> pd.DataFrame:
+    """가져오기 청크(행 목록 또는 컬럼형 프레임)를 DataFrame으로 변환"""
+    if isinstance(chunk, pd.DataFrame):
+        return chunk
+    return pd.DataFrame.from_records(chunk)
+
+def _iter_validated_rows(
+    import_data: PriceTableImport,
+    chunks: Iterable[Union[List[Dict], pd.DataFrame]],
+    errors: List[PriceTableImportError]
+) -> Iterator[List[Dict]]:
+    """청크별 검증 후 INSERT 파라미터 목록 반환
+
+    오류는 errors에 누적하며, 첫 오류 이후 청크는 검증만 하고 반환하지 않는다.
+    """
+    seen_keys = set()
+    # 엑셀 기준 행 번호: 1행은 헤더
+    row_number = 2
+    for chunk in chunks:
+        frame = _chunk_frame(chunk)
+        validation = validate_price_table_frame(
+            frame,
             valid_from=import_data.valid_from,
             valid_until=import_data.valid_until,
-            name=row["Name"],
-            unit=row["Unit"],
-            unit_price=row["Unit price"],
-            description=row.get("Description"),
-            notes=row.get("비고")
-        )
-        new_price_table = create_price_table(db, price_table_data)
-        new_price_tables.append(new_price_table)
-    
-    return new_price_tables
+            seen_keys=seen_keys,
+            row_offset=row_number,
+            row_numbers=getattr(chunk, "row_numbers", None)
+        )
+        row_number += len(frame)
 
-def export_price_tables(
+        if not validation.is_valid:
+            remaining = MAX_IMPORT_ERRORS - len(errors)
+            if remaining > 0:
+                errors.extend(validation.errors(limit=remaining))
+            if validation.missing_columns:
+                return
+        elif not errors:
+            yield _frame_to_rows(frame, validation, import_data.company_id)
+
+def import_price_table_chunks(
+    db: Session,
+    import_data: PriceTableImport,
+    chunks: Iterable[List[Dict]]
+) -> PriceTableImportResult:
+    """청크 단위 단가표 일괄 가져오기
+
+    청크마다 검증/변환 후 배치 INSERT 하되 커밋은 마지막에 한 번만 한다.
+    한 행이라도 오류가 있으면 이후 청크는 검증만 하고 전체를 롤백한 뒤
+    행 단위 오류 목록을 반환한다.
+    """
+    imported = 0
+    errors = []
+    try:
+        for rows in _iter_validated_rows(import_data, chunks, errors):
+            _bulk_insert_price_tables(db, rows)
+            imported += len(rows)
+
+        if errors:
+            db.rollback()
+            return PriceTableImportResult(imported=0, errors=errors)
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    price_cache.invalidate(import_data.company_id)
+
+    return PriceTableImportResult(imported=imported, errors=[])
+
+def import_price_tables(
+    db: Session,
+    import_data: PriceTableImport
+) -> PriceTableImportResult:
+    """단가표 일괄 가져오기 (단일 트랜잭션)"""
+    return import_price_table_chunks(db, import_data, [import_data.file_content])
+
+def _load_open_price_tables(
+    db: Session,
+    company_id: int,
+    since: date
+) -> Dict[Tuple[str, str], List[Dict]]:
+    """since 이후에도 유효한 회사 단가표를 (name, unit) 별로 조회"""
+    rows = (
+        db.query(
+            PriceTable.id,
+            PriceTable.name,
+            PriceTable.unit,
+            PriceTable.unit_price,
+            PriceTable.description,
+            PriceTable.notes,
+            PriceTable.valid_from,
+            PriceTable.valid_until
+        )
+        .filter(
+            PriceTable.company_id == company_id,
+            or_(
+                PriceTable.valid_until.is_(None),
+                PriceTable.valid_until >= since
+            )
+        )
+        .order_by(PriceTable.valid_from)
+        .all()
+    )
+    existing = {}
+    for row in rows:
+        existing.setdefault((row.name, row.unit), []).append(dict(row._mapping))
+    return existing
+
+def _active_row(candidates: List[Dict], valid_date: date) -> Optional[Dict]:
+    """valid_date에 유효한 가장 최근 시작 행"""
+    active = None
+    for candidate in candidates:
+        if (candidate["valid_from"] <= valid_date
+                and (candidate["valid_until"] is None
+                     or candidate["valid_until"] >= valid_date)):
+            if active is None or candidate["valid_from"] >= active["valid_from"]:
+                active = candidate
+    return active
+
+def _same_values(current: Dict, incoming: Dict) -> bool:
+    return all(current[field] == incoming[field] for field in DIFF_FIELDS)
+
+def diff_import_price_table_chunks(
+    db: Session,
+    import_data: PriceTableImport,
+    chunks: Iterable[List[Dict]],
+    close_missing: bool = True
+) -> PriceTableDiffResult:
+    """기존 단가표와 비교해 변경분만 반영하는 재가져오기
+
+    (회사, Name, Unit, 유효기간) 기준으로 기존 행과 매칭한다.
+    - 같은 시작일의 행이 있으면 값이 다를 때만 수정
+    - 더 이른 시작일의 행이 유효하면 값이 같을 때는 유지, 다르면
+      새 시작일 전날로 마감하고 새 행 추가
+    - 매칭되는 행이 없으면 추가
+    close_missing이면 파일에 없는 기존 항목을 가져오기 시작일 전날로 마감한다.
+    변경은 일괄 INSERT/UPDATE 후 한 번만 커밋한다.
+    """
+    existing = _load_open_price_tables(db, import_data.company_id, import_data.valid_from)
+    inserts = []
+    updates = {}
+    incoming_keys = set()
+    result = PriceTableDiffResult()
+
+    def plan_update(row: Dict, **values) -> None:
+        row.update(values)
+        if row["id"] is not None:
+            updates.setdefault(row["id"], {"id": row["id"]}).update(values)
+
+    for rows in _iter_validated_rows(import_data, chunks, result.errors):
+        for incoming in rows:
+            key = (incoming["name"], incoming["unit"])
+            incoming_keys.add(key)
+            candidates = existing.setdefault(key, [])
+            current = _active_row(candidates, incoming["valid_from"])
+
+            if current is not None and current["valid_from"] == incoming["valid_from"]:
+                if (_same_values(current, incoming)
+                        and current["valid_until"] == incoming["valid_until"]):
+                    result.unchanged += 1
+                    continue
+                plan_update(
+                    current,
+                    valid_until=incoming["valid_until"],
+                    **{field: incoming[field] for field in DIFF_FIELDS}
+                )
+                result.updated += 1
+                continue
+
+            if current is not None:
+                if (_same_values(current, incoming)
+                        and current["valid_until"] == incoming["valid_until"]):
+                    # 기존 행이 새 유효기간을 이미 같은 값으로 포함
+                    result.unchanged += 1
+                    continue
+                plan_update(
+                    current,
+                    valid_until=incoming["valid_from"] - timedelta(days=1)
+                )
+                result.closed += 1
+
+            row = dict(incoming, id=None)
+            candidates.append(row)
+            inserts.append(row)
+            result.inserted += 1
+
+    if result.errors:
+        return PriceTableDiffResult(errors=result.errors)
+
+    if close_missing:
+        closed_until = import_data.valid_from - timedelta(days=1)
+        for key, candidates in existing.items():
+            if key in incoming_keys:
+                continue
+            current = _active_row(candidates, import_data.valid_from)
+            # 가져오기 시작일 이전에 시작한 항목만 마감 가능
+            if current is not None and current["valid_from"] < import_data.valid_from:
+                plan_update(current, valid_until=closed_until)
+                result.closed += 1
+
+    try:
+        _bulk_insert_price_tables(
+            db,
+            [{column: row[column] for column in IMPORT_COLUMNS} for row in inserts]
+        )
+        if updates:
+            db.bulk_update_mappings(PriceTable, list(updates.values()))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    price_cache.invalidate(import_data.company_id)
+
+    return result
+
+def _export_query(
     db: Session,
     company_id: int,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None
-) -> bytes:
-    query = db.query(PriceTable).filter(PriceTable.company_id == company_id)
+):
+    query = (
+        db.query(
+            PriceTable.name,
+            PriceTable.unit,
+            PriceTable.unit_price,
+            PriceTable.description,
+            PriceTable.notes,
+            PriceTable.valid_from,
+            PriceTable.valid_until
+        )
+        .filter(PriceTable.company_id == company_id)
+    )
     
     if start_date:
         query = query.filter(PriceTable.valid_from >= start_date)
@@ -108,54 +723,317 @@ def export_price_tables(
             )
         )
     
-    price_tables = query.all()
-    
-    # Convert to DataFrame
-    data = []
-    for pt in price_tables:
-        data.append({
-            "Name": pt.name,
-            "Unit": pt.unit,
-            "Unit price": pt.unit_price,
-            "Description": pt.description,
-            "비고": pt.notes,
-            "Valid From": pt.valid_from,
-            "Valid Until": pt.valid_until
-        })
-    
-    df = pd.DataFrame(data)
-    
-    # Export to Excel
+    return query.order_by(PriceTable.id)
+
+def iter_export_rows(
+    db: Session,
+    company_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Iterator[tuple]:
+    """내보내기 행을 EXPORT_PAGE_SIZE 단위로 DB에서 읽어 반환 (EXPORT_HEADERS 순서)"""
+    query = _export_query(db, company_id, start_date, end_date)
+    for row in query.yield_per(EXPORT_PAGE_SIZE):
+        yield tuple(row)
+
+def iter_price_tables_csv(
+    db: Session,
+    company_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Iterator[bytes]:
+    """단가표 CSV 스트리밍 내보내기 (엑셀 호환 UTF-8 BOM 포함)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(EXPORT_HEADERS)
+    for row in iter_export_rows(db, company_id, start_date, end_date):
+        writer.writerow(row)
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+def write_price_tables_xlsx(
+    db: Session,
+    output: BinaryIO,
+    company_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> None:
+    """단가표를 openpyxl write-only 모드로 output에 기록"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(EXPORT_HEADERS)
+    for row in iter_export_rows(db, company_id, start_date, end_date):
+        sheet.append(row)
+    workbook.save(output)
+
+def iter_price_tables_xlsx(
+    db: Session,
+    company_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Iterator[bytes]:
+    """단가표 XLSX 스트리밍 내보내기
+
+    XLSX는 zip 구조라 저장이 끝나야 완성되므로, 임계 크기까지는 메모리,
+    그 이상은 임시 파일에 기록한 뒤 청크 단위로 내보낸다.
+    """
+    with SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE) as output:
+        write_price_tables_xlsx(db, output, company_id, start_date, end_date)
+        output.seek(0)
+        while True:
+            chunk = output.read(EXPORT_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+def require_pyarrow():
+    """pyarrow 지연 import (Parquet/Arrow 형식에서만 필요)"""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("pyarrow is required for parquet/arrow formats")
+    return pyarrow
+
+def _arrow_schema(pa):
+    return pa.schema([
+        ("Name", pa.string()),
+        ("Unit", pa.string()),
+        ("Unit price", pa.decimal128(10, 2)),
+        ("Description", pa.string()),
+        ("비고", pa.string()),
+        ("Valid From", pa.date32()),
+        ("Valid Until", pa.date32()),
+    ])
+
+def _iter_export_batches(
+    pa,
+    db: Session,
+    company_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+):
+    """내보내기 행을 EXPORT_PAGE_SIZE 단위 Arrow RecordBatch로 변환"""
+    schema = _arrow_schema(pa)
+    rows = iter_export_rows(db, company_id, start_date, end_date)
+    while True:
+        page = list(islice(rows, EXPORT_PAGE_SIZE))
+        if not page:
+            return
+        columns = list(zip(*page))
+        yield pa.record_batch(
+            [
+                pa.array(column, type=field.type)
+                for column, field in zip(columns, schema)
+            ],
+            schema=schema
+        )
+
+def iter_price_tables_arrow(
+    db: Session,
+    company_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Iterator[bytes]:
+    """단가표 Arrow IPC 스트림 내보내기 (배치마다 바로 전송)"""
+    pa = require_pyarrow()
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, _arrow_schema(pa)) as writer:
+        for batch in _iter_export_batches(pa, db, company_id, start_date, end_date):
+            writer.write_batch(batch)
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
+
+def iter_price_tables_parquet(
+    db: Session,
+    company_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Iterator[bytes]:
+    """단가표 Parquet 내보내기 (페이지별 row group, 푸터 기록 후 청크 전송)"""
+    pa = require_pyarrow()
+    with SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE) as output:
+        with pa.parquet.ParquetWriter(output, _arrow_schema(pa)) as writer:
+            for batch in _iter_export_batches(pa, db, company_id, start_date, end_date):
+                writer.write_batch(batch)
+        output.seek(0)
+        while True:
+            chunk = output.read(EXPORT_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+def export_price_tables(
+    db: Session,
+    company_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> bytes:
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False)
-    
+    write_price_tables_xlsx(db, output, company_id, start_date, end_date)
     return output.getvalue()
 
-def parse_excel_file(file_content: bytes) -> List[Dict]:
-    """엑셀 파일 파싱"""
-    df = pd.read_excel(io.BytesIO(file_content))
-    return df.to_dict('records')
+class ExcelRowChunk(list):
+    """엑셀 행 청크 (row_numbers: 각 행의 실제 시트 행 번호)"""
 
-def validate_price_table_data(data: List[Dict]) -> bool:
-    """단가표 데이터 유효성 검사"""
-    required_fields = {"Name", "Unit", "Unit price"}
-    
-    for row in data:
-        if not all(field in row for field in required_fields):
-            return False
-        
-        # 단가가 숫자인지 확인
+    def __init__(self, rows: List[Dict], row_numbers: List[int]):
+        super().__init__(rows)
+        self.row_numbers = row_numbers
+
+def iter_excel_rows(
+    file: Union[bytes, BinaryIO],
+    with_row_numbers: bool = False
+) -> Iterator[Union[Dict, Tuple[int, Dict]]]:
+    """엑셀 파일을 읽기 전용 모드로 한 행씩 파싱
+
+    첫 행을 헤더로 사용하며, 워크북 전체를 메모리에 올리지 않는다.
+    빈 행은 건너뛰므로 with_row_numbers이면 (시트 행 번호, 행)을 반환한다.
+    """
+    if isinstance(file, bytes):
+        file = io.BytesIO(file)
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [
+            str(column).strip() if column is not None else None
+            for column in header
+        ]
+        for row_number, values in enumerate(rows, start=2):
+            # 빈 행은 건너뜀
+            if all(value is None for value in values):
+                continue
+            row = {
+                column: value
+                for column, value in zip(columns, values)
+                if column is not None
+            }
+            yield (row_number, row) if with_row_numbers else row
+    finally:
+        workbook.close()
+
+def iter_excel_chunks(
+    file: Union[bytes, BinaryIO],
+    chunk_size: int = IMPORT_BATCH_SIZE
+) -> Iterator[List[Dict]]:
+    """엑셀 행을 chunk_size 단위 목록(시트 행 번호 포함)으로 묶어 반환"""
+    rows = iter_excel_rows(file, with_row_numbers=True)
+    while True:
+        numbered = list(islice(rows, chunk_size))
+        if not numbered:
+            return
+        yield ExcelRowChunk(
+            [row for _, row in numbered],
+            [row_number for row_number, _ in numbered]
+        )
+
+def iter_columnar_chunks(
+    file: Union[bytes, BinaryIO],
+    format: str,
+    chunk_size: int = IMPORT_BATCH_SIZE
+) -> Iterator[pd.DataFrame]:
+    """Parquet/Arrow IPC 파일을 chunk_size 행 단위 DataFrame으로 반환"""
+    pa = require_pyarrow()
+    if isinstance(file, bytes):
+        file = io.BytesIO(file)
+
+    if format == "parquet":
+        batches = pa.parquet.ParquetFile(file).iter_batches(batch_size=chunk_size)
+    else:
+        # Arrow IPC 파일 형식이 아니면 스트림 형식으로 읽음
         try:
-            float(row["Unit price"])
-        except (ValueError, TypeError):
-            return False
-    
-    return True
+            reader = pa.ipc.open_file(file)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            file.seek(0)
+            batches = pa.ipc.open_stream(file)
+
+    for batch in batches:
+        for start in range(0, batch.num_rows, chunk_size):
+            yield batch.slice(start, chunk_size).to_pandas()
+
+def import_format(filename: Optional[str]) -> str:
+    """업로드 파일명 확장자로 가져오기 형식 판별 (xlsx, parquet, arrow)"""
+    suffix = os.path.splitext(filename or "")[1].lower()
+    if suffix == ".parquet":
+        return "parquet"
+    if suffix in (".arrow", ".arrows", ".ipc", ".feather"):
+        return "arrow"
+    return "xlsx"
+
+def iter_import_chunks(
+    file: Union[bytes, BinaryIO],
+    filename: Optional[str] = None,
+    chunk_size: int = IMPORT_BATCH_SIZE
+) -> Iterator[Union[List[Dict], pd.DataFrame]]:
+    """업로드 파일 형식에 맞는 가져오기 청크 반환"""
+    format = import_format(filename)
+    if format == "xlsx":
+        return iter_excel_chunks(file, chunk_size)
+    return iter_columnar_chunks(file, format, chunk_size)
+
+def parse_excel_file(file_content: Union[bytes, BinaryIO]) -> List[Dict]:
+    """엑셀 파일 파싱"""
+    return list(iter_excel_rows(file_content))
 
-def preview_price_table_import(file_content: bytes) -> List[Dict]:
+def validate_price_table_data(data: List[Dict], valid_from: Optional[date] = None) -> bool:
+    """단가표 데이터 유효성 검사 (Valid From 열이 없으면 가져오기와 같이 오늘 날짜 기준)"""
+    return validate_price_table_frame(
+        pd.DataFrame.from_records(data),
+        valid_from=valid_from or date.today()
+    ).is_valid
+
+def validate_price_table_file(
+    file: Union[bytes, BinaryIO],
+    valid_from: Optional[date] = None,
+    valid_until: Optional[date] = None,
+    filename: Optional[str] = None
+) -> PriceTableValidationResult:
+    """엑셀 파일 전체를 청크 단위로 검증하고 행별 오류 마스크 반환"""
+    rows = 0
+    error_rows = []
+    error_flags = []
+    errors = []
+    seen_keys = set()
+    for chunk in iter_import_chunks(file, filename):
+        frame = _chunk_frame(chunk)
+        validation = validate_price_table_frame(
+            frame,
+            valid_from=valid_from,
+            valid_until=valid_until,
+            seen_keys=seen_keys,
+            row_offset=rows + 2,
+            row_numbers=getattr(chunk, "row_numbers", None)
+        )
+        rows += len(frame)
+        for row, flags in validation.error_rows():
+            error_rows.append(row)
+            error_flags.append(flags)
+        remaining = MAX_IMPORT_ERRORS - len(errors)
+        if remaining > 0:
+            errors.extend(validation.errors(limit=remaining))
+
+    return PriceTableValidationResult(
+        rows=rows,
+        valid=not error_rows,
+        error_rows=error_rows,
+        error_flags=error_flags,
+        errors=errors
+    )
+
+def preview_price_table_import(
+    file_content: Union[bytes, BinaryIO],
+    limit: int = PREVIEW_ROWS
+) -> List[Dict]:
     """단가표 가져오기 미리보기"""
-    data = parse_excel_file(file_content)
-    
-    # 첫 5개 행만 반환
-    return data[:5]
\ No newline at end of file
+    # 앞쪽 limit개 행만 읽고 파싱 중단
+    return list(islice(iter_excel_rows(file_content), limit))
\ No newline at end of file
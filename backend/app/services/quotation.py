@@ -1,35 +1,112 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, date
 from decimal import Decimal
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from app.models.models import Quotation, QuotationItem
-from app.schemas.quotation import QuotationCreate, QuotationUpdate
+from sqlalchemy.orm import Session, selectinload, joinedload
+from sqlalchemy import desc, tuple_, insert
+import base64
+from types import SimpleNamespace
+from app.core.quote_numbers import quote_number_allocator
+from app.core.config import settings
+from app.services.price_table import get_price_snapshot
+from app.services.version_service import (
+    ITEM_STATE_FIELDS,
+    VersionService,
+    diff_states,
+    item_state,
+    state_value,
+    quotation_state,
+)
+from app.utils.pricing_engine import price_items, price_lines
+from app.models.models import Company, PriceTable, Quotation, QuotationItem, QuotationVersion
+from app.schemas.quotation import (
+    QuotationCreate,
+    QuotationUpdate,
+    QuotationItemsPatch,
+    QuotationBatchEntryResult,
+    QuotationBatchResult,
+    QuotationPreviewRequest,
+    QuotationPreviewLine,
+    QuotationPreview,
+)
 
-def generate_quote_number() -> str:
+def generate_quote_number(db: Session) -> str:
     """견적서 번호 생성 (SO-YYMMDD-XXX 형식)"""
-    today = datetime.now()
-    return f"SO-{today.strftime('%y%m%d')}-{today.strftime('%H%M%S')}"
+    return quote_number_allocator.allocate(db)[0]
+
+def generate_quote_numbers(db: Session, count: int) -> List[str]:
+    """견적서 번호 일괄 생성"""
+    return quote_number_allocator.allocate(db, count)
 
 def calculate_total_amount(items: List[QuotationItem], discount_amount: Decimal) -> Decimal:
     """견적서 총액 계산"""
-    total = sum((item.unit_price * item.quantity - item.discount_amount) for item in items)
-    return total - discount_amount
+    pricing = price_items(items, discount_amount=discount_amount)
+    return pricing.to_decimal(pricing.total)
+
+# 용도별 관계 로딩 전략 (페이지당 쿼리 수를 고정해 N+1 방지)
+QUOTATION_LOADERS = {
+    # 목록/상세 응답: items 직렬화
+    "list": (selectinload(Quotation.items),),
+    "detail": (selectinload(Quotation.items),),
+    # 내보내기: customer, items, items.price_table
+    "export": (
+        joinedload(Quotation.customer),
+        selectinload(Quotation.items).joinedload(QuotationItem.price_table),
+    ),
+}
+
+def _quotation_query(db: Session, load: Optional[str] = None):
+    query = db.query(Quotation)
+    if load:
+        query = query.options(*QUOTATION_LOADERS[load])
+    return query
+
+def get_quotation(
+    db: Session,
+    quotation_id: int,
+    load: Optional[str] = None
+) -> Optional[Quotation]:
+    return _quotation_query(db, load).filter(Quotation.id == quotation_id).first()
+
+def encode_cursor(quotation: Quotation) -> str:
+    """목록 커서 생성 ((created_at, id)를 감춘 문자열)"""
+    raw = f"{quotation.created_at.isoformat()}|{quotation.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
 
-def get_quotation(db: Session, quotation_id: int) -> Optional[Quotation]:
-    return db.query(Quotation).filter(Quotation.id == quotation_id).first()
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """목록 커서 해석 (잘못된 커서는 ValueError)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, quotation_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(quotation_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
 
 def get_quotations(
     db: Session,
     user_id: int,
     skip: int = 0,
     limit: int = 100,
-    is_admin: bool = False
+    is_admin: bool = False,
+    load: Optional[str] = "list",
+    cursor: Optional[str] = None
 ) -> List[Quotation]:
-    query = db.query(Quotation)
+    """견적서 목록 조회 (최신순)
+
+    cursor가 있으면 skip 대신 (created_at, id) 키셋 조건으로 다음 페이지를
+    조회하므로 페이지 깊이와 관계없이 비용이 같다.
+    """
+    query = _quotation_query(db, load)
     if not is_admin:
         query = query.filter(Quotation.created_by == user_id)
-    return query.order_by(desc(Quotation.created_at)).offset(skip).limit(limit).all()
+    query = query.order_by(desc(Quotation.created_at), desc(Quotation.id))
+    if cursor:
+        created_at, quotation_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(Quotation.created_at, Quotation.id) < tuple_(created_at, quotation_id)
+        )
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 def create_quotation(
     db: Session,
@@ -39,7 +116,7 @@ def create_quotation(
     quotation_data = quotation.dict(exclude={'items'})
     db_quotation = Quotation(
         **quotation_data,
-        quote_number=generate_quote_number(),
+        quote_number=generate_quote_number(db),
         version=1,
         created_by=user_id,
         status="draft",
@@ -62,11 +139,208 @@ def create_quotation(
     
     # 총액 계산
     db_quotation.total_amount = calculate_total_amount(items, quotation_data['discount_amount'])
+    VersionService(db).record_snapshot(db_quotation, items, user_id)
     
     db.commit()
     db.refresh(db_quotation)
     return db_quotation
 
+def create_quotations_batch(
+    db: Session,
+    quotations: List[QuotationCreate],
+    user_id: int
+) -> QuotationBatchResult:
+    """견적서 일괄 생성
+
+    고객사/단가표 존재 여부를 한 번씩 조회해 검증하고, 통과한 견적서만
+    헤더/항목을 각각 일괄 insert 한 뒤 한 번에 커밋한다.
+    """
+    customer_ids = {quotation.customer_id for quotation in quotations}
+    price_table_ids = {
+        item.price_table_id for quotation in quotations for item in quotation.items
+    }
+    known_customers = {
+        row.id for row in db.query(Company.id).filter(Company.id.in_(customer_ids))
+    } if customer_ids else set()
+    known_price_tables = {
+        row.id for row in db.query(PriceTable.id).filter(PriceTable.id.in_(price_table_ids))
+    } if price_table_ids else set()
+
+    results: List[QuotationBatchEntryResult] = []
+    accepted = []
+    for index, quotation in enumerate(quotations):
+        missing = sorted(
+            {item.price_table_id for item in quotation.items} - known_price_tables
+        )
+        if quotation.customer_id not in known_customers:
+            error = f"Customer {quotation.customer_id} not found"
+        elif missing:
+            error = f"Price table not found: {', '.join(map(str, missing))}"
+        else:
+            accepted.append((index, quotation))
+            continue
+        results.append(QuotationBatchEntryResult(index=index, success=False, error=error))
+
+    if accepted:
+        header_rows = [
+            {
+                **quotation.dict(exclude={'items'}),
+                "quote_number": quote_number,
+                "version": 1,
+                "created_by": user_id,
+                "status": "draft",
+                "total_amount": calculate_total_amount(
+                    quotation.items, quotation.discount_amount
+                ),
+            }
+            for (_, quotation), quote_number in zip(
+                accepted, generate_quote_numbers(db, len(accepted))
+            )
+        ]
+        # 헤더 일괄 insert (반환 순서가 보장되지 않으므로 견적서 번호로 ID 매칭)
+        returned = dict(db.execute(
+            insert(Quotation).returning(Quotation.quote_number, Quotation.id),
+            header_rows
+        ).all())
+        quotation_ids = [returned[header["quote_number"]] for header in header_rows]
+
+        item_rows = [
+            {**item.dict(), "quotation_id": quotation_id}
+            for (_, quotation), quotation_id in zip(accepted, quotation_ids)
+            for item in quotation.items
+        ]
+        items_by_quotation = {quotation_id: [] for quotation_id in quotation_ids}
+        if item_rows:
+            for item in db.execute(
+                insert(QuotationItem).returning(
+                    QuotationItem.id,
+                    QuotationItem.quotation_id,
+                    *[getattr(QuotationItem, field) for field in ITEM_STATE_FIELDS]
+                ),
+                item_rows
+            ):
+                items_by_quotation[item.quotation_id].append(item)
+
+        # 최초 버전 스냅샷 일괄 기록
+        VersionService(db).record_snapshots([
+            {
+                "quotation_id": quotation_id,
+                "changes": quotation_state(
+                    SimpleNamespace(**header),
+                    sorted(items_by_quotation[quotation_id], key=lambda item: item.id)
+                ),
+            }
+            for header, quotation_id in zip(header_rows, quotation_ids)
+        ], user_id)
+        db.commit()
+
+        for (index, _), header, quotation_id in zip(accepted, header_rows, quotation_ids):
+            results.append(QuotationBatchEntryResult(
+                index=index,
+                success=True,
+                quotation_id=quotation_id,
+                quote_number=header["quote_number"],
+                total_amount=header["total_amount"]
+            ))
+
+    results.sort(key=lambda result: result.index)
+    return QuotationBatchResult(
+        created=len(accepted),
+        failed=len(quotations) - len(accepted),
+        results=results
+    )
+
+def preview_quotation(db: Session, preview: QuotationPreviewRequest) -> QuotationPreview:
+    """견적 금액 미리보기 (저장하지 않음)
+
+    고객사의 기준일 유효 단가 스냅샷(프로세스 캐시)으로 단가를 채우고
+    가격 엔진으로 계산한다. 스냅샷에 없는 단가표는 ValueError.
+    """
+    price_date = preview.price_date or date.today()
+    snapshot = get_price_snapshot(db, preview.customer_id, price_date)
+
+    missing = sorted({
+        item.price_table_id for item in preview.items
+        if snapshot.get(item.price_table_id) is None
+    })
+    if missing:
+        raise ValueError(
+            f"Price table not valid for customer on {price_date}: "
+            f"{', '.join(map(str, missing))}"
+        )
+
+    rows = [snapshot.get(item.price_table_id) for item in preview.items]
+    quantities = [item.quantity for item in preview.items]
+    unit_prices = [
+        item.unit_price if item.unit_price is not None else row["unit_price"]
+        for item, row in zip(preview.items, rows)
+    ]
+    discounts = [item.discount_amount for item in preview.items]
+    pricing = price_lines(
+        quantities,
+        unit_prices,
+        discounts,
+        discount_amount=preview.discount_amount,
+        vat_rate=(
+            preview.vat_rate if preview.vat_rate is not None
+            else settings.QUOTATION_VAT_RATE
+        ),
+        currency=preview.currency or settings.QUOTATION_CURRENCY
+    )
+    # total_amount는 저장 경로(calculate_total_amount)와 같은 기준: 부가세 제외, 저장 정밀도
+    stored = price_lines(quantities, unit_prices, discounts, discount_amount=preview.discount_amount)
+    summary = pricing.summary()
+    return QuotationPreview(
+        customer_id=preview.customer_id,
+        price_date=price_date,
+        items=[
+            QuotationPreviewLine(
+                price_table_id=item.price_table_id,
+                name=row["name"],
+                unit=row["unit"],
+                quantity=item.quantity,
+                unit_price=unit_price,
+                discount_amount=item.discount_amount or Decimal('0'),
+                line_total=line_total
+            )
+            for item, row, unit_price, line_total in zip(
+                preview.items, rows, unit_prices, pricing.line_total_decimals()
+            )
+        ],
+        subtotal=summary["subtotal"],
+        discount_amount=summary["discount"],
+        taxable_amount=summary["taxable"],
+        vat_amount=summary["vat"],
+        total_amount=stored.to_decimal(stored.total),
+        total_with_vat=summary["total"]
+    )
+
+def _replace_items(db: Session, db_quotation: Quotation, new_items: list) -> List[QuotationItem]:
+    """항목 목록 교체 (기존 행을 단가표별 순서대로 맞춰 제자리 수정)
+
+    행 ID가 유지되므로 버전 델타에는 실제로 바뀐 라인만 남는다.
+    짝이 없는 기존 행은 삭제하고 남는 새 항목은 추가한다.
+    """
+    existing = {}
+    for db_item in sorted(db_quotation.items, key=lambda item: item.id):
+        existing.setdefault(db_item.price_table_id, []).append(db_item)
+
+    items = []
+    for item in new_items:
+        candidates = existing.get(item.price_table_id)
+        if candidates:
+            db_item = candidates.pop(0)
+            for field, value in item.dict().items():
+                setattr(db_item, field, value)
+        else:
+            db_item = QuotationItem(**item.dict(), quotation_id=db_quotation.id)
+            db.add(db_item)
+        items.append(db_item)
+    for leftover in existing.values():
+        for db_item in leftover:
+            db.delete(db_item)
+    return items
+
 def update_quotation(
     db: Session,
     quotation_id: int,
@@ -74,32 +348,20 @@ def update_quotation(
     user_id: int,
     is_admin: bool = False
 ) -> Optional[Quotation]:
-    db_quotation = get_quotation(db, quotation_id)
+    db_quotation = get_quotation(db, quotation_id, load="detail")
     if not db_quotation:
         return None
     
     if not is_admin and db_quotation.created_by != user_id:
         return None
 
-    # 새로운 버전 생성
-    new_version = db_quotation.version + 1
+    old_state = quotation_state(db_quotation, db_quotation.items)
+    items = db_quotation.items
     
     # 기존 견적서 업데이트
     update_data = quotation.dict(exclude_unset=True)
     if 'items' in update_data:
-        # 기존 항목 삭제
-        db.query(QuotationItem).filter(QuotationItem.quotation_id == quotation_id).delete()
-        
-        # 새로운 항목 추가
-        items = []
-        for item in update_data['items']:
-            db_item = QuotationItem(
-                **item.dict(),
-                quotation_id=quotation_id
-            )
-            db.add(db_item)
-            items.append(db_item)
-        
+        items = _replace_items(db, db_quotation, quotation.items or [])
         db.flush()
         update_data['total_amount'] = calculate_total_amount(
             items,
@@ -110,13 +372,95 @@ def update_quotation(
     for field, value in update_data.items():
         setattr(db_quotation, field, value)
     
-    db_quotation.version = new_version
-    db_quotation.updated_at = datetime.utcnow()
+    # 새로운 버전 생성 (변경이 없으면 버전 유지)
+    delta = diff_states(old_state, quotation_state(db_quotation, items))
+    if VersionService(db).record_delta(db_quotation, delta, user_id):
+        db_quotation.updated_at = datetime.utcnow()
     
     db.commit()
     db.refresh(db_quotation)
     return db_quotation
 
+def patch_quotation_items(
+    db: Session,
+    quotation_id: int,
+    patch: QuotationItemsPatch,
+    user_id: int,
+    is_admin: bool = False
+) -> Optional[Quotation]:
+    """견적서 항목 단위 추가/수정/삭제
+
+    변경 대상 항목만 조회/기록하고, 총액은 저장된 총액에 변경 전후
+    라인 금액 차이를 더해 갱신한다. 없는 항목 ID는 ValueError.
+    """
+    db_quotation = get_quotation(db, quotation_id)
+    if not db_quotation:
+        return None
+
+    if not is_admin and db_quotation.created_by != user_id:
+        return None
+
+    updates = {item.id: item for item in patch.update}
+    removed = set(patch.remove)
+    if updates.keys() & removed:
+        raise ValueError("Item cannot be updated and removed at once")
+
+    touched_ids = updates.keys() | removed
+    touched = {
+        item.id: item
+        for item in db.query(QuotationItem).filter(
+            QuotationItem.quotation_id == quotation_id,
+            QuotationItem.id.in_(touched_ids)
+        )
+    } if touched_ids else {}
+    unknown = sorted(touched_ids - touched.keys())
+    if unknown:
+        raise ValueError(f"Item not found: {', '.join(map(str, unknown))}")
+
+    before = price_items(touched.values())
+
+    for item_id, item_update in updates.items():
+        for field, value in item_update.dict(exclude={'id'}, exclude_unset=True).items():
+            setattr(touched[item_id], field, value)
+    if removed:
+        db.query(QuotationItem).filter(
+            QuotationItem.id.in_(removed)
+        ).delete(synchronize_session=False)
+    added = [
+        QuotationItem(**item.dict(), quotation_id=quotation_id)
+        for item in patch.add
+    ]
+    db.add_all(added)
+
+    db.flush()  # 추가 항목 ID 발급
+
+    after = price_items([touched[item_id] for item_id in updates] + added)
+    old_total = db_quotation.total_amount
+    db_quotation.total_amount = (old_total or Decimal('0')) + (
+        after.to_decimal(after.subtotal) - before.to_decimal(before.subtotal)
+    )
+
+    # 패치 내용으로 바로 델타 구성 (전체 항목을 읽지 않음)
+    version_delta = {
+        "quotation": (
+            {"total_amount": state_value(db_quotation.total_amount)}
+            if db_quotation.total_amount != old_total else {}
+        ),
+        "added": {str(item.id): item_state(item) for item in added},
+        "updated": {
+            str(item_id): item_state(touched[item_id])
+            for item_id in updates
+        },
+        "removed": sorted(str(item_id) for item_id in removed),
+    }
+    version_delta = {key: value for key, value in version_delta.items() if value}
+    if VersionService(db).record_delta(db_quotation, version_delta, user_id):
+        db_quotation.updated_at = datetime.utcnow()
+
+    db.commit()
+    db.refresh(db_quotation)
+    return db_quotation
+
 def delete_quotation(
     db: Session,
     quotation_id: int,
@@ -130,6 +474,9 @@ def delete_quotation(
     if not is_admin and db_quotation.created_by != user_id:
         return False
 
+    db.query(QuotationVersion).filter(
+        QuotationVersion.quotation_id == quotation_id
+    ).delete(synchronize_session=False)
     db.delete(db_quotation)
     db.commit()
     return True
@@ -141,7 +488,7 @@ def get_quotation_versions(
     is_admin: bool = False
 ) -> List[Quotation]:
     """특정 견적서의 모든 버전 조회"""
-    query = db.query(Quotation).filter(Quotation.quote_number == quote_number)
+    query = _quotation_query(db, "list").filter(Quotation.quote_number == quote_number)
     if not is_admin:
         query = query.filter(Quotation.created_by == user_id)
     return query.order_by(desc(Quotation.version)).all()
@@ -161,8 +508,11 @@ def update_quotation_status(
     if not is_admin and db_quotation.created_by != user_id:
         return None
 
+    changed = db_quotation.status != status
     db_quotation.status = status
     db_quotation.updated_at = datetime.utcnow()
+    if changed:
+        VersionService(db).record_delta(db_quotation, {"quotation": {"status": status}}, user_id)
     
     db.commit()
     db.refresh(db_quotation)
@@ -0,0 +1,347 @@
+from typing import AsyncIterator, Awaitable, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional
+from datetime import datetime, time, timedelta
+from tempfile import SpooledTemporaryFile
+from types import SimpleNamespace
+import asyncio
+import hashlib
+import itertools
+import zipfile
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.export_cache import CachedExport, export_cache
+from app.core.render_pool import RenderPoolBusy, render_pool
+from app.models.models import Company, PriceTable, Quotation, QuotationItem
+from app.schemas.quotation import QuotationArchiveRequest
+from app.services.quotation import get_quotation
+from app.utils.excel_generator import ExcelGenerator
+from app.utils.pdf_generator import PDFGenerator
+from app.utils.pricing_engine import price_items
+
+# 내보내기 형식: (생성기, MIME 타입)
+EXPORT_FORMATS: Dict[str, tuple] = {
+    "xlsx": (
+        ExcelGenerator,
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+    "pdf": (PDFGenerator, "application/pdf"),
+}
+
+def prepare_quotation_data(quotation: Quotation) -> dict:
+    """견적서 데이터 준비 (라인 금액은 저장 총액과 같은 가격 계산 엔진으로)"""
+    items = list(quotation.items)
+    pricing = price_items(items, discount_amount=quotation.discount_amount)
+    return {
+        "quote_number": quotation.quote_number,
+        "date": quotation.created_at.strftime("%Y-%m-%d"),
+        "valid_until": quotation.valid_until.strftime("%Y-%m-%d"),
+        "customer_name": quotation.customer.name,
+        "project_description": quotation.project_description,
+        "items": [
+            {
+                "name": item.price_table.name,
+                "quantity": item.quantity,
+                "unit_price": item.unit_price,
+                "discount_amount": item.discount_amount,
+                "amount": amount,
+                "remark": getattr(item, "remark", None) or ""
+            }
+            for item, amount in zip(items, pricing.line_total_decimals())
+        ],
+        "total_amount": quotation.total_amount,
+    }
+
+def write_quotation(data: dict, format: str, output: BinaryIO, generator=None) -> None:
+    """견적서를 파일 객체에 렌더링 (generator를 넘기면 재사용)"""
+    if generator is None:
+        generator = EXPORT_FORMATS[format][0]()
+    if format == "xlsx":
+        generator.generate_quotation(data).save(output)
+    else:
+        generator.generate_quotation(data, output)
+
+def render_quotation(data: dict, format: str, generator=None) -> BinaryIO:
+    """견적서 렌더링 결과 파일 객체 반환
+
+    EXPORT_SPOOL_MAX_BYTES 까지는 메모리 버퍼에 두고, 넘으면 이름 없는
+    임시 파일로 옮긴다 (닫으면 바로 삭제되므로 요청이 실패해도 남지 않음).
+    """
+    output = SpooledTemporaryFile(max_size=settings.EXPORT_SPOOL_MAX_BYTES)
+    try:
+        write_quotation(data, format, output, generator)
+    except BaseException:
+        output.close()
+        raise
+    output.seek(0)
+    return output
+
+def file_size(file: BinaryIO) -> int:
+    """파일 객체 크기 (읽기 위치는 유지)"""
+    position = file.tell()
+    size = file.seek(0, 2)
+    file.seek(position)
+    return size
+
+def iter_chunks(file: BinaryIO, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """파일 객체를 응답 스트림용 청크로 읽고 다 읽으면 닫음"""
+    try:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file.close()
+
+def export_key(quotation_id: int, version: int, format: str, names: str = "") -> tuple:
+    """렌더링 캐시 키 (견적서, 버전, 형식, 템플릿, 이름 지문)"""
+    return export_cache.key(
+        quotation_id, version, format, EXPORT_FORMATS[format][0].TEMPLATE, names
+    )
+
+def names_digest(names: Iterable[Optional[str]]) -> str:
+    """렌더링에 들어가는 이름(고객사, 항목 단가표) 지문
+
+    이름은 견적서 버전을 올리지 않고 바뀔 수 있으므로 캐시 키/ETag에 넣는다.
+    """
+    raw = "\x1f".join(name or "" for name in names)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+def export_names(db: Session, quotation_ids: List[int]) -> Dict[int, str]:
+    """견적서별 이름 지문 (고객사 이름 + 항목 ID 순 단가표 이름, 쿼리 2회)"""
+    names = {quotation_id: [] for quotation_id in quotation_ids}
+    if not names:
+        return {}
+    for quotation_id, name in (
+        db.query(Quotation.id, Company.name)
+        .outerjoin(Company, Company.id == Quotation.customer_id)
+        .filter(Quotation.id.in_(quotation_ids))
+    ):
+        names[quotation_id].insert(0, name)
+    for quotation_id, name in (
+        db.query(QuotationItem.quotation_id, PriceTable.name)
+        .outerjoin(PriceTable, PriceTable.id == QuotationItem.price_table_id)
+        .filter(QuotationItem.quotation_id.in_(quotation_ids))
+        .order_by(QuotationItem.quotation_id, QuotationItem.id)
+    ):
+        names[quotation_id].append(name)
+    return {quotation_id: names_digest(values) for quotation_id, values in names.items()}
+
+def rendered_names(quotation: Quotation) -> str:
+    """로드한 견적서의 이름 지문 (export_names와 같은 값)"""
+    items = sorted(quotation.items, key=lambda item: item.id)
+    return names_digest(
+        [quotation.customer.name if quotation.customer else None]
+        + [item.price_table.name if item.price_table else None for item in items]
+    )
+
+async def render_quotation_export(db: Session, quotation_id: int, format: str) -> tuple:
+    """렌더링 풀에서 견적서 렌더링 (캐시 키, 결과 파일 객체) 반환"""
+    quotation = get_quotation(db, quotation_id, load="export")
+    if quotation is None:
+        raise ValueError("Quotation not found")
+    content = await render_pool.render(prepare_quotation_data(quotation), format)
+    return export_key(quotation_id, quotation.version, format, rendered_names(quotation)), content
+
+async def get_quotation_export(
+    db: Session,
+    quotation_id: int,
+    version: int,
+    format: str,
+    names: str = ""
+) -> CachedExport:
+    """캐시된 렌더링 결과 반환 (없으면 렌더링 풀에서 렌더링 후 저장)"""
+    key = export_key(quotation_id, version, format, names)
+    cached = export_cache.get(key)
+    if cached is not None:
+        return cached
+    key, content = await render_quotation_export(db, quotation_id, format)
+    with content:
+        return export_cache.put(key, content)
+
+def _with_names(db: Session, headers: list) -> List[SimpleNamespace]:
+    digests = export_names(db, [header.id for header in headers])
+    return [SimpleNamespace(**header._mapping, names=digests[header.id]) for header in headers]
+
+def get_export_header(db: Session, quotation_id: int) -> Optional[SimpleNamespace]:
+    """캐시 확인용 견적서 헤더 (id, 번호, 버전, 작성자, 이름 지문)만 조회"""
+    header = (
+        db.query(
+            Quotation.id,
+            Quotation.quote_number,
+            Quotation.version,
+            Quotation.created_by
+        )
+        .filter(Quotation.id == quotation_id)
+        .first()
+    )
+    return _with_names(db, [header])[0] if header else None
+
+# ZIP 항목 압축 방식 (xlsx는 이미 ZIP이므로 그대로 저장)
+ARCHIVE_COMPRESSION = {"pdf": zipfile.ZIP_DEFLATED, "xlsx": zipfile.ZIP_STORED}
+ARCHIVE_CHUNK_SIZE = 64 * 1024
+# 렌더링 풀이 가득 찼을 때 다시 시도하기까지 대기 시간(초)
+ARCHIVE_RETRY_SECONDS = 0.5
+
+def check_formats(formats: List[str]) -> None:
+    """내보내기 형식 목록 검증 (비었거나 모르는 형식이면 ValueError)"""
+    unknown = [format for format in formats if format not in EXPORT_FORMATS]
+    if unknown or not formats:
+        raise ValueError(f"Unsupported export format: {', '.join(unknown)}")
+
+def find_archive_quotations(
+    db: Session,
+    request: QuotationArchiveRequest,
+    user_id: int,
+    is_admin: bool = False
+) -> List[tuple]:
+    """ZIP 내보내기 대상 견적서 헤더 (id, 번호, 버전, 작성자, 이름 지문) 조회"""
+    check_formats(request.formats)
+
+    query = db.query(
+        Quotation.id,
+        Quotation.quote_number,
+        Quotation.version,
+        Quotation.created_by
+    )
+    if not is_admin:
+        query = query.filter(Quotation.created_by == user_id)
+    if request.status:
+        query = query.filter(Quotation.status == request.status)
+    if request.customer_id:
+        query = query.filter(Quotation.customer_id == request.customer_id)
+    if request.date_from:
+        query = query.filter(Quotation.created_at >= datetime.combine(request.date_from, time.min))
+    if request.date_to:
+        query = query.filter(
+            Quotation.created_at < datetime.combine(request.date_to + timedelta(days=1), time.min)
+        )
+
+    limit = settings.EXPORT_ARCHIVE_MAX_QUOTATIONS
+    headers = query.order_by(Quotation.id).limit(limit + 1).all()
+    if len(headers) > limit:
+        raise ValueError(f"Too many quotations (max {limit}), narrow the filter")
+    return _with_names(db, headers)
+
+class _ZipSink:
+    """ZipFile 출력 버퍼 (seek 불가 스트림으로 동작, 쓴 만큼 꺼내서 전송)"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+async def _archive_entry(db: Session, header: tuple, format: str) -> BinaryIO:
+    """ZIP 항목 내용 (캐시에 있으면 캐시 파일, 없으면 렌더링 풀에서 렌더링)"""
+    if export_cache.enabled:
+        cached = export_cache.get(export_key(header.id, header.version, format, header.names))
+        if cached is not None:
+            try:
+                return open(cached.path, "rb")
+            except OSError:
+                pass  # 그 사이 캐시에서 삭제됨
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.EXPORT_RENDER_TIMEOUT_SECONDS
+    while True:
+        try:
+            key, content = await render_quotation_export(db, header.id, format)
+            break
+        except RenderPoolBusy:
+            # 다른 요청이 풀을 채운 경우 스트림을 끊지 않고 자리가 날 때까지 대기
+            if loop.time() >= deadline:
+                raise
+            await asyncio.sleep(ARCHIVE_RETRY_SECONDS)
+    if export_cache.enabled:
+        try:
+            export_cache.put(key, content)
+            content.seek(0)
+        except BaseException:
+            content.close()
+            raise
+    return content
+
+def _write_archive_entry(
+    archive: zipfile.ZipFile,
+    sink: _ZipSink,
+    name: str,
+    format: str,
+    content: BinaryIO
+) -> Iterator[bytes]:
+    info = zipfile.ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+    info.compress_type = ARCHIVE_COMPRESSION[format]
+    with archive.open(info, "w") as entry:
+        while True:
+            chunk = content.read(ARCHIVE_CHUNK_SIZE)
+            if not chunk:
+                break
+            entry.write(chunk)
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
+async def iter_quotation_archive(
+    db: Session,
+    headers: List[tuple],
+    formats: List[str],
+    concurrency: Optional[int] = None,
+    on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None
+) -> AsyncIterator[bytes]:
+    """견적서 ZIP 스트림 (렌더링이 끝나는 순서대로 항목 기록)
+
+    동시에 concurrency 개 문서만 렌더링/보관하므로 견적서 수와 관계없이
+    메모리 사용량이 일정하다. 렌더링에 실패한 문서는 건너뛰고
+    errors.txt 항목에 남긴다. on_progress(완료 수, 전체 수)는 항목마다 await.
+    """
+    concurrency = concurrency or settings.EXPORT_ARCHIVE_CONCURRENCY
+    formats = list(dict.fromkeys(formats))
+    total = len(headers) * len(formats)
+    completed = 0
+    jobs = ((header, format) for header in headers for format in formats)
+    sink = _ZipSink()
+    archive = zipfile.ZipFile(sink, "w")
+    running: Dict[asyncio.Future, tuple] = {}
+    errors = []
+    try:
+        while True:
+            for header, format in itertools.islice(jobs, concurrency - len(running)):
+                running[asyncio.ensure_future(_archive_entry(db, header, format))] = (header, format)
+            if not running:
+                break
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                header, format = running.pop(task)
+                name = f"{header.quote_number}.{format}"
+                try:
+                    content = task.result()
+                except Exception as e:
+                    # 한 문서의 실패로 전체 스트림을 끊지 않음
+                    errors.append(f"{name}: {e or type(e).__name__}")
+                else:
+                    with content:
+                        for data in _write_archive_entry(archive, sink, name, format, content):
+                            yield data
+                completed += 1
+                if on_progress:
+                    await on_progress(completed, total)
+        if errors:
+            archive.writestr("errors.txt", "\n".join(errors) + "\n")
+        archive.close()
+        yield sink.drain()
+    finally:
+        for task in running:
+            task.cancel()
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+from sqlalchemy import delete, func, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import Quotation, QuotationVersion
+from app.schemas.quotation import VersionCompactionResult
+from app.services.version_service import apply_delta, is_delta
+import copy
+
+def compaction_candidates(
+    db: Session,
+    cutoff: datetime,
+    after_id: int = 0,
+    limit: int = 100
+) -> List[int]:
+    """압축 대상 견적서 ID (cutoff 이전 마지막 수정, 버전 3개 이상, ID 순)"""
+    last_modified = func.coalesce(Quotation.updated_at, Quotation.created_at)
+    return [
+        row.quotation_id
+        for row in (
+            db.query(QuotationVersion.quotation_id)
+            .join(Quotation, Quotation.id == QuotationVersion.quotation_id)
+            .filter(last_modified < cutoff, QuotationVersion.quotation_id > after_id)
+            .group_by(QuotationVersion.quotation_id)
+            .having(func.count(QuotationVersion.id) > 2)
+            .order_by(QuotationVersion.quotation_id)
+            .limit(limit)
+        )
+    ]
+
+def compact_quotation_versions(db: Session, quotation_id: int) -> tuple:
+    """견적서 한 건의 버전 이력 압축 (커밋하지 않음)
+
+    첫 스냅샷 이후 버전 중 첫 버전, 상태가 바뀐 버전(마일스톤), 마지막
+    버전만 전체 스냅샷으로 남기고 나머지는 삭제한다. 첫 스냅샷 이전의
+    자유 형식 버전은 재구성할 수 없으므로 그대로 둔다.
+    반환: (삭제한 버전 수, 새로 쓴 스냅샷 수)
+    """
+    versions = (
+        db.query(QuotationVersion)
+        .filter(QuotationVersion.quotation_id == quotation_id)
+        .order_by(QuotationVersion.version_number)
+        .all()
+    )
+    start = next((i for i, version in enumerate(versions) if version.is_snapshot), None)
+    if start is None:
+        return 0, 0
+    versions = versions[start:]
+
+    keep = {}  # version id -> 재구성한 상태
+    remove = []
+    state = None
+    for index, version in enumerate(versions):
+        previous_status = state["quotation"].get("status") if state else None
+        if version.is_snapshot:
+            state = copy.deepcopy(version.changes)
+        elif is_delta(version.changes):
+            state = apply_delta(state, version.changes)
+        milestone = (
+            index in (0, len(versions) - 1)
+            or state["quotation"].get("status") != previous_status
+        )
+        if milestone:
+            keep[version.id] = (version, copy.deepcopy(state))
+        else:
+            remove.append(version.id)
+
+    snapshots = 0
+    for version, version_state in keep.values():
+        if not version.is_snapshot:
+            db.execute(
+                update(QuotationVersion)
+                .where(QuotationVersion.id == version.id)
+                .values(changes=version_state, is_snapshot=True)
+                .execution_options(synchronize_session=False)
+            )
+            snapshots += 1
+    if remove:
+        db.execute(
+            delete(QuotationVersion)
+            .where(QuotationVersion.id.in_(remove))
+            .execution_options(synchronize_session=False)
+        )
+    return len(remove), snapshots
+
+def compact_versions(
+    db: Session,
+    older_than_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    after_id: int = 0,
+    on_progress: Optional[Callable[[VersionCompactionResult], None]] = None
+) -> VersionCompactionResult:
+    """오래된 견적서 버전 이력 압축
+
+    견적서 batch_size 건씩 처리하고 배치마다 커밋해 잠금을 짧게 유지한다.
+    max_batches에 도달하면 중단하며, last_quotation_id를 after_id로 넘겨 이어서
+    실행할 수 있다.
+    """
+    older_than_days = (
+        settings.VERSION_COMPACTION_AGE_DAYS if older_than_days is None else older_than_days
+    )
+    batch_size = batch_size or settings.VERSION_COMPACTION_BATCH_SIZE
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+
+    result = VersionCompactionResult(last_quotation_id=after_id or None)
+    while max_batches is None or result.batches < max_batches:
+        quotation_ids = compaction_candidates(
+            db, cutoff, after_id=result.last_quotation_id or 0, limit=batch_size
+        )
+        if not quotation_ids:
+            result.finished = True
+            break
+        for quotation_id in quotation_ids:
+            deleted, snapshots = compact_quotation_versions(db, quotation_id)
+            if deleted or snapshots:
+                result.quotations += 1
+            result.versions_deleted += deleted
+            result.snapshots_written += snapshots
+        db.commit()
+        db.expunge_all()
+
+        result.batches += 1
+        result.last_quotation_id = quotation_ids[-1]
+        if on_progress:
+            on_progress(result)
+        if len(quotation_ids) < batch_size:
+            result.finished = True
+            break
+    return result
@@ -1,20 +1,190 @@
 from sqlalchemy.orm import Session
-from app.models.models import QuotationVersion
-from typing import List
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import func, insert, update
+from app.core.config import settings
+from app.models.models import Quotation, QuotationItem, QuotationVersion, User
+from typing import Dict, Iterable, List, Optional
+from datetime import date
+from decimal import Decimal
+import copy
+
+# 버전 상태에 기록하는 견적서/항목 필드
+QUOTATION_STATE_FIELDS = (
+    "customer_id", "project_description", "valid_until",
+    "discount_amount", "total_amount", "status",
+)
+ITEM_STATE_FIELDS = ("price_table_id", "quantity", "unit_price", "discount_amount")
+INTEGER_STATE_FIELDS = ("customer_id", "price_table_id", "quantity")
+AMOUNT_STATE_FIELDS = ("discount_amount", "total_amount", "unit_price")
+
+# 델타 버전 키 (이 키를 쓰지 않는 변경 내용은 자유 형식으로 보고 재생하지 않음)
+DELTA_KEYS = ("quotation", "added", "updated", "removed")
+
+def state_value(value):
+    if isinstance(value, Decimal):
+        # 금액 컬럼은 Numeric(10, 2): 저장 전/후 값이 같은 문자열이 되도록 고정
+        return str(value.quantize(Decimal('0.01')))
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+def item_state(item) -> dict:
+    return {field: state_value(getattr(item, field)) for field in ITEM_STATE_FIELDS}
+
+def quotation_state(quotation: Quotation, items: Iterable) -> dict:
+    """견적서 전체 상태 (스냅샷 버전 형식)
+
+    {"quotation": {필드: 값}, "items": {"항목 ID": {필드: 값}}}
+    """
+    return {
+        "quotation": {
+            field: state_value(getattr(quotation, field))
+            for field in QUOTATION_STATE_FIELDS
+        },
+        "items": {str(item.id): item_state(item) for item in items},
+    }
+
+def diff_states(old: dict, new: dict) -> dict:
+    """두 상태의 구조적 차이 (델타 버전 형식, 변경된 값만 기록)
+
+    {"quotation": {필드: 새 값}, "added": {ID: 항목}, "updated": {ID: {필드: 새 값}},
+     "removed": [ID]} 중 변경이 있는 키만 포함한다.
+    """
+    old_items, new_items = old["items"], new["items"]
+    updated = {}
+    for item_id in old_items.keys() & new_items.keys():
+        fields = {
+            field: value for field, value in new_items[item_id].items()
+            if old_items[item_id].get(field) != value
+        }
+        if fields:
+            updated[item_id] = fields
+    delta = {
+        "quotation": {
+            field: value for field, value in new["quotation"].items()
+            if old["quotation"].get(field) != value
+        },
+        "added": {
+            item_id: new_items[item_id] for item_id in new_items.keys() - old_items.keys()
+        },
+        "updated": updated,
+        "removed": sorted(old_items.keys() - new_items.keys(), key=int),
+    }
+    return {key: value for key, value in delta.items() if value}
+
+def _valid_state_value(field: str, value) -> bool:
+    if value is None:
+        return True
+    if field in INTEGER_STATE_FIELDS:
+        return isinstance(value, int) and not isinstance(value, bool)
+    if field in AMOUNT_STATE_FIELDS:
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            return False
+        try:
+            return Decimal(str(value)).is_finite()
+        except ArithmeticError:
+            return False
+    return isinstance(value, (str, int, float))
+
+def _valid_fields(fields, allowed: tuple) -> bool:
+    return isinstance(fields, dict) and all(
+        field in allowed and _valid_state_value(field, value)
+        for field, value in fields.items()
+    )
+
+def _valid_item_id(item_id) -> bool:
+    return str(item_id).isdigit()
+
+def is_delta(changes) -> bool:
+    """재생 가능한 델타 형식인지 확인 (키, 필드 이름, 값 형식)"""
+    if not isinstance(changes, dict) or not changes or not changes.keys() <= set(DELTA_KEYS):
+        return False
+    items = [changes.get("added", {}), changes.get("updated", {})]
+    removed = changes.get("removed", [])
+    return (
+        _valid_fields(changes.get("quotation", {}), QUOTATION_STATE_FIELDS)
+        and all(isinstance(entries, dict) for entries in items)
+        and all(
+            _valid_item_id(item_id) and _valid_fields(fields, ITEM_STATE_FIELDS)
+            for entries in items
+            for item_id, fields in entries.items()
+        )
+        and isinstance(removed, list)
+        and all(_valid_item_id(item_id) for item_id in removed)
+    )
+
+def count_changes(changes: dict, is_snapshot: bool = False) -> int:
+    """버전 요약용 변경 건수 (스냅샷은 항목 수, 델타는 변경 필드/항목 수)"""
+    if is_snapshot:
+        return len(changes.get("items", {}))
+    if not is_delta(changes):
+        return len(changes)  # 자유 형식 변경 내용
+    return sum(len(changes.get(key, ())) for key in DELTA_KEYS)
+
+def apply_delta(state: dict, delta: dict) -> dict:
+    """상태에 델타 적용 (원본은 변경하지 않음)"""
+    state = copy.deepcopy(state)
+    state["quotation"].update(delta.get("quotation", {}))
+    items = state["items"]
+    for item_id in delta.get("removed", []):
+        items.pop(str(item_id), None)
+    items.update(copy.deepcopy(delta.get("added", {})))
+    for item_id, fields in delta.get("updated", {}).items():
+        items.setdefault(item_id, {}).update(fields)
+    return state
+
+def _decimal(value) -> Optional[Decimal]:
+    return Decimal(value) if value is not None else None
+
+def _line_total(item: dict) -> Decimal:
+    return (
+        (item.get("quantity") or 0) * (_decimal(item.get("unit_price")) or Decimal('0'))
+        - (_decimal(item.get("discount_amount")) or Decimal('0'))
+    )
+
+def _field_changes(old: dict, new: dict) -> dict:
+    return {
+        field: {"old": old.get(field), "new": new.get(field)}
+        for field in sorted(old.keys() | new.keys())
+        if old.get(field) != new.get(field)
+    }
+
+def _match_items(old_items: dict, new_items: dict) -> List[tuple]:
+    """두 상태의 같은 항목 짝 (항목 ID, 없으면 단가표 + 순서 기준)
+
+    항목 행을 지우고 다시 넣어 ID가 바뀐 이력도 같은 라인끼리 비교한다.
+    """
+    pairs = [(item_id, item_id) for item_id in sorted(old_items.keys() & new_items.keys(), key=int)]
+    unmatched = {}
+    for item_id in sorted(old_items.keys() - new_items.keys(), key=int):
+        unmatched.setdefault(old_items[item_id].get("price_table_id"), []).append(item_id)
+    for item_id in sorted(new_items.keys() - old_items.keys(), key=int):
+        candidates = unmatched.get(new_items[item_id].get("price_table_id"))
+        if candidates:
+            pairs.append((candidates.pop(0), item_id))
+    return pairs
 
 class VersionService:
     def __init__(self, db: Session):
         self.db = db
         
-    def create_version(self, quotation_id: int, changes: dict, user_id: int) -> QuotationVersion:
-        """새로운 버전 생성"""
-        latest_version = self.get_latest_version(quotation_id)
-        version_number = (latest_version.version_number + 1) if latest_version else 1
+    def create_version(self, quotation_id: int, changes: dict, user_id: int) -> Optional[QuotationVersion]:
+        """새로운 버전 생성 (견적서가 없으면 None)
+
+        델타 키를 쓰는 변경 내용은 델타 형식이어야 한다 (아니면 ValueError).
+        그 밖의 자유 형식 변경 내용은 그대로 저장하고 상태 재생에서는 건너뛴다.
+        """
+        if changes.keys() & set(DELTA_KEYS) and not is_delta(changes):
+            raise ValueError("Invalid version changes: delta keys must follow the delta format")
+        version_number = self.allocate_version_number(quotation_id)
+        if version_number is None:
+            return None
         
         new_version = QuotationVersion(
             quotation_id=quotation_id,
             version_number=version_number,
             changes=changes,
+            change_count=count_changes(changes),
             created_by=user_id
         )
         
@@ -22,15 +192,239 @@ class VersionService:
         self.db.commit()
         self.db.refresh(new_version)
         return new_version
-    
-    def get_version_history(self, quotation_id: int) -> List[QuotationVersion]:
-        """버전 히스토리 조회"""
+
+    def allocate_version_number(self, quotation_id: int, quotation: Optional[Quotation] = None) -> Optional[int]:
+        """견적서 버전 카운터를 UPDATE ... RETURNING 으로 올리고 새 번호 반환
+
+        행 잠금이 커밋까지 유지되므로 동시 저장은 서로 다른 번호를 받는다.
+        세션에 로드된 견적서 객체가 있으면 추가 UPDATE 없이 값을 맞춘다.
+        """
+        version_number = self.db.execute(
+            update(Quotation)
+            .where(Quotation.id == quotation_id)
+            .values(version=func.coalesce(Quotation.version, 0) + 1)
+            .returning(Quotation.version)
+            .execution_options(synchronize_session=False)
+        ).scalar_one_or_none()
+        if quotation is not None and version_number is not None:
+            set_committed_value(quotation, "version", version_number)
+        return version_number
+
+    def record_snapshot(
+        self,
+        quotation: Quotation,
+        items: Iterable,
+        user_id: int,
+        change_count: Optional[int] = None
+    ) -> QuotationVersion:
+        """현재 버전 번호로 전체 스냅샷 기록 (커밋하지 않음)"""
+        changes = quotation_state(quotation, items)
+        version = QuotationVersion(
+            quotation_id=quotation.id,
+            version_number=quotation.version,
+            changes=changes,
+            is_snapshot=True,
+            change_count=(
+                change_count if change_count is not None
+                else count_changes(changes, is_snapshot=True)
+            ),
+            created_by=user_id
+        )
+        self.db.add(version)
+        return version
+
+    def record_snapshots(self, states: List[dict], user_id: int) -> None:
+        """여러 견적서의 최초 스냅샷 일괄 기록 (states: quotation_id, changes)"""
+        if states:
+            self.db.execute(insert(QuotationVersion), [
+                {
+                    "quotation_id": state["quotation_id"],
+                    "version_number": 1,
+                    "changes": state["changes"],
+                    "is_snapshot": True,
+                    "change_count": count_changes(state["changes"], is_snapshot=True),
+                    "created_by": user_id,
+                }
+                for state in states
+            ])
+
+    def record_delta(self, quotation: Quotation, delta: dict, user_id: int) -> Optional[QuotationVersion]:
+        """변경분 버전 기록 (커밋하지 않음)
+
+        견적서 버전을 올리고 델타를 저장한다. 마지막 스냅샷에서
+        QUOTATION_SNAPSHOT_INTERVAL 버전이 지났거나 스냅샷이 없으면
+        현재 상태 전체를 스냅샷으로 저장해 재구성 시 재생할 델타 수를 제한한다.
+        변경이 없으면 기록하지 않는다.
+        """
+        if not delta:
+            return None
+        self.allocate_version_number(quotation.id, quotation)
+
+        last_snapshot = self._last_snapshot_number(quotation.id, quotation.version)
+        if (last_snapshot is None or
+                quotation.version - last_snapshot >= settings.QUOTATION_SNAPSHOT_INTERVAL):
+            self.db.flush()
+            items = self.db.query(QuotationItem).filter(
+                QuotationItem.quotation_id == quotation.id
+            ).order_by(QuotationItem.id)
+            return self.record_snapshot(
+                quotation, items, user_id, change_count=count_changes(delta)
+            )
+
+        version = QuotationVersion(
+            quotation_id=quotation.id,
+            version_number=quotation.version,
+            changes=delta,
+            is_snapshot=False,
+            change_count=count_changes(delta),
+            created_by=user_id
+        )
+        self.db.add(version)
+        return version
+
+    def _last_snapshot_number(self, quotation_id: int, version_number: int) -> Optional[int]:
+        return (
+            self.db.query(func.max(QuotationVersion.version_number))
+            .filter(
+                QuotationVersion.quotation_id == quotation_id,
+                QuotationVersion.is_snapshot.is_(True),
+                QuotationVersion.version_number <= version_number
+            )
+            .scalar()
+        )
+
+    def _replay_window(self, quotation_id: int, from_version: int, to_version: int) -> List[QuotationVersion]:
+        """from_version 이하 마지막 스냅샷부터 to_version까지의 버전 (한 번에 조회)"""
+        last_snapshot = (
+            self.db.query(func.max(QuotationVersion.version_number))
+            .filter(
+                QuotationVersion.quotation_id == quotation_id,
+                QuotationVersion.is_snapshot.is_(True),
+                QuotationVersion.version_number <= from_version
+            )
+            .scalar_subquery()
+        )
         return (
             self.db.query(QuotationVersion)
-            .filter(QuotationVersion.quotation_id == quotation_id)
-            .order_by(QuotationVersion.version_number.desc())
+            .filter(
+                QuotationVersion.quotation_id == quotation_id,
+                QuotationVersion.version_number >= last_snapshot,
+                QuotationVersion.version_number <= to_version
+            )
+            .order_by(QuotationVersion.version_number)
             .all()
         )
+
+    def get_states(self, quotation_id: int, version_numbers: Iterable[int]) -> Dict[int, dict]:
+        """여러 버전의 상태를 한 번의 조회 구간 재생으로 재구성 (없는 버전은 제외)"""
+        version_numbers = set(version_numbers)
+        if not version_numbers:
+            return {}
+        states = {}
+        state = None
+        for version in self._replay_window(
+            quotation_id, min(version_numbers), max(version_numbers)
+        ):
+            if version.is_snapshot:
+                state = copy.deepcopy(version.changes)
+            elif state is not None and is_delta(version.changes):
+                state = apply_delta(state, version.changes)
+            if state is not None and version.version_number in version_numbers:
+                states[version.version_number] = copy.deepcopy(state)
+        return states
+
+    def get_state(self, quotation_id: int, version_number: int) -> Optional[dict]:
+        """특정 버전의 견적서 상태 재구성
+
+        마지막 스냅샷부터 해당 버전까지를 한 번에 조회해 델타를 재생한다.
+        """
+        return self.get_states(quotation_id, [version_number]).get(version_number)
+
+    def diff_versions(self, quotation_id: int, from_version: int, to_version: int) -> Optional[dict]:
+        """두 버전 사이의 변경 내용 (견적서 필드, 항목 추가/삭제/변경, 총액 차이)"""
+        states = self.get_states(quotation_id, [from_version, to_version])
+        if from_version not in states or to_version not in states:
+            return None
+        old, new = states[from_version], states[to_version]
+        old_items, new_items = old["items"], new["items"]
+
+        def line(item_id: str, item: dict) -> dict:
+            return {"item_id": int(item_id), **item, "line_total": _line_total(item)}
+
+        pairs = _match_items(old_items, new_items)
+        changed = []
+        for old_id, new_id in pairs:
+            fields = _field_changes(old_items[old_id], new_items[new_id])
+            if fields:
+                changed.append({
+                    "item_id": int(new_id),
+                    "price_table_id": new_items[new_id].get("price_table_id"),
+                    "fields": fields,
+                    "line_total_before": _line_total(old_items[old_id]),
+                    "line_total_after": _line_total(new_items[new_id]),
+                })
+        matched_old = {old_id for old_id, _ in pairs}
+        matched_new = {new_id for _, new_id in pairs}
+
+        total_before = _decimal(old["quotation"].get("total_amount"))
+        total_after = _decimal(new["quotation"].get("total_amount"))
+        return {
+            "quotation_id": quotation_id,
+            "from_version": from_version,
+            "to_version": to_version,
+            "quotation": _field_changes(old["quotation"], new["quotation"]),
+            "added": [
+                line(item_id, new_items[item_id])
+                for item_id in sorted(new_items.keys() - matched_new, key=int)
+            ],
+            "removed": [
+                line(item_id, old_items[item_id])
+                for item_id in sorted(old_items.keys() - matched_old, key=int)
+            ],
+            "changed": changed,
+            "total_before": total_before,
+            "total_after": total_after,
+            "total_delta": (total_after or Decimal('0')) - (total_before or Decimal('0')),
+        }
+    
+    def get_version_history(
+        self,
+        quotation_id: int,
+        limit: Optional[int] = None,
+        before: Optional[int] = None
+    ) -> List[QuotationVersion]:
+        """버전 히스토리 조회 (최신순, before 미만 버전 번호부터 limit개)"""
+        query = self._history_query(self.db.query(QuotationVersion), quotation_id, before)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def get_version_summaries(
+        self,
+        quotation_id: int,
+        limit: int = 50,
+        before: Optional[int] = None
+    ) -> List[dict]:
+        """버전 요약 목록 (changes 본문은 읽지 않음)"""
+        query = self._history_query(
+            self.db.query(
+                QuotationVersion.version_number,
+                QuotationVersion.created_by,
+                User.username.label("author"),
+                QuotationVersion.created_at,
+                QuotationVersion.is_snapshot,
+                QuotationVersion.change_count
+            ).outerjoin(User, User.id == QuotationVersion.created_by),
+            quotation_id,
+            before
+        )
+        return [dict(row._mapping) for row in query.limit(limit)]
+
+    def _history_query(self, query, quotation_id: int, before: Optional[int]):
+        query = query.filter(QuotationVersion.quotation_id == quotation_id)
+        if before is not None:
+            query = query.filter(QuotationVersion.version_number < before)
+        return query.order_by(QuotationVersion.version_number.desc())
         
     def get_latest_version(self, quotation_id: int) -> QuotationVersion:
         """최신 버전 조회"""
@@ -50,4 +444,4 @@ class VersionService:
                 QuotationVersion.version_number == version_number
             )
             .first()
-        )
\ No newline at end of file
+        )
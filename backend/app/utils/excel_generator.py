@@ -1,12 +1,19 @@
 from typing import List, Optional
-from datetime import datetime
 from decimal import Decimal
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 from openpyxl.utils import get_column_letter
+from app.utils.pricing_engine import line_amount
 
 class ExcelGenerator:
+    # 레이아웃을 바꾸면 올려서 이전 렌더링 캐시를 무효화
+    TEMPLATE = "default-v2"
+
     def __init__(self):
+        self._new_workbook()
+
+    def _new_workbook(self):
+        """새 통합 문서 준비 (생성기 인스턴스를 여러 견적서에 재사용)"""
         self.workbook = Workbook()
         self.sheet = self.workbook.active
         self._setup_page()
@@ -45,12 +52,14 @@ class ExcelGenerator:
 
     def generate_quotation(self, quotation_data: dict) -> Workbook:
         """견적서 Excel 생성"""
+        self._new_workbook()
+
         # 회사 정보 및 견적서 정보
         self.sheet["B1"] = "Quotation"
         self.sheet["B1"].font = Font(size=16, bold=True)
         
         self.sheet["B3"] = f"QUOTE #: {quotation_data['quote_number']}"
-        self.sheet["B4"] = f"DATE: {datetime.now().strftime('%Y-%m-%d')}"
+        self.sheet["B4"] = f"DATE: {quotation_data['date']}"
         self.sheet["B5"] = f"VALID UNTIL: {quotation_data['valid_until']}"
         
         self.sheet["D3"] = "Customer:"
@@ -73,7 +82,7 @@ class ExcelGenerator:
                 (item['name'], "left"),
                 (str(item['quantity']), "center"),
                 (f"{item['unit_price']:,}", "right"),
-                (f"{item['quantity'] * item['unit_price']:,}", "right"),
+                (f"{line_amount(item):,}", "right"),
                 (item.get('remark', ''), "left")
             ]
             
@@ -85,7 +94,7 @@ class ExcelGenerator:
             current_row += 1
 
         # 합계
-        self.sheet.cell(row=current_row + 1, column=1, value="Total")._apply_header_style()
+        self._apply_header_style(self.sheet.cell(row=current_row + 1, column=1, value="Total"))
         total_cell = self.sheet.cell(row=current_row + 1, column=5)
         total_cell.value = f"{quotation_data['total_amount']:,}"
         self._apply_cell_style(total_cell, "right")
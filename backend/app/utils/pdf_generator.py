@@ -1,14 +1,17 @@
-from typing import Optional
-import os
-from tempfile import NamedTemporaryFile
+from typing import BinaryIO, Optional
+import io
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, cm
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from decimal import Decimal
+from app.utils.pricing_engine import line_amount
 
 class PDFGenerator:
+    # 레이아웃을 바꾸면 올려서 이전 렌더링 캐시를 무효화
+    TEMPLATE = "default-v2"
+
     def __init__(self):
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
@@ -70,7 +73,7 @@ class PDFGenerator:
                 item['name'],
                 str(item['quantity']),
                 f"{item['unit_price']:,}",
-                f"{item['quantity'] * item['unit_price']:,}",
+                f"{line_amount(item):,}",
                 item.get('remark', '')
             ]
             table_data.append(row)
@@ -120,12 +123,12 @@ class PDFGenerator:
         
         return elements
 
-    def generate_quotation(self, quotation_data: dict) -> str:
-        """견적서 PDF 생성"""
-        # 임시 파일 생성
-        temp_file = NamedTemporaryFile(delete=False, suffix='.pdf')
+    def generate_quotation(self, quotation_data: dict, output: Optional[BinaryIO] = None) -> BinaryIO:
+        """견적서 PDF 생성 (output 파일 객체에 기록, 없으면 메모리 버퍼)"""
+        if output is None:
+            output = io.BytesIO()
         doc = SimpleDocTemplate(
-            temp_file.name,
+            output,
             pagesize=A4,
             rightMargin=1.25*cm,
             leftMargin=1.25*cm,
@@ -142,4 +145,4 @@ class PDFGenerator:
         # PDF 생성
         doc.build(elements)
         
-        return temp_file.name
\ No newline at end of file
+        return output
\ No newline at end of file
@@ -0,0 +1,143 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+from decimal import Decimal, ROUND_HALF_UP
+import numpy as np
+
+Number = Union[Decimal, int, float, str, None]
+
+# 단가/금액 저장 정밀도 (Numeric(10, 2))
+PRICE_EXPONENT = 2
+
+# 통화별 최소 단위 자릿수 (목록에 없으면 PRICE_EXPONENT)
+CURRENCY_EXPONENTS: Dict[str, int] = {
+    "KRW": 0,
+    "JPY": 0,
+    "USD": 2,
+    "EUR": 2,
+    "CNY": 2,
+}
+
+def currency_exponent(currency: Optional[str]) -> int:
+    if currency is None:
+        return PRICE_EXPONENT
+    return CURRENCY_EXPONENTS.get(currency.upper(), PRICE_EXPONENT)
+
+def to_minor_units(values: Iterable[Number], exponent: int = PRICE_EXPONENT) -> np.ndarray:
+    """금액 목록을 최소 단위 정수(int64) 배열로 변환 (반올림: 사사오입)"""
+    return np.fromiter((_minor_unit(value, exponent) for value in values), dtype=np.int64)
+
+def _minor_unit(value: Number, exponent: int) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value * 10 ** exponent
+    if not isinstance(value, Decimal):
+        # float은 표시 문자열 기준으로 변환해 이진 오차를 피함
+        value = Decimal(str(value))
+    return int(value.scaleb(exponent).to_integral_value(ROUND_HALF_UP))
+
+def round_half_up(values: np.ndarray, divisor: int) -> np.ndarray:
+    """정수 배열을 divisor로 나눈 뒤 사사오입 (음수는 절댓값 기준)"""
+    values = np.asarray(values, dtype=np.int64)
+    if divisor == 1:
+        return values
+    magnitude = (np.abs(values) * 2 + divisor) // (divisor * 2)
+    return np.sign(values) * magnitude
+
+def vat_basis_points(rate: Number) -> int:
+    """부가세율(0.1 = 10%)을 basis point 정수로 변환"""
+    return int((Decimal(str(rate or 0)) * 10000).to_integral_value(ROUND_HALF_UP))
+
+class PricingResult:
+    """견적 금액 계산 결과 (모든 값은 통화 최소 단위 정수)"""
+
+    def __init__(
+        self,
+        exponent: int,
+        line_totals: np.ndarray,
+        subtotal: int,
+        discount: int,
+        vat: int
+    ):
+        self.exponent = exponent
+        self.line_totals = line_totals
+        self.subtotal = subtotal
+        self.discount = discount
+        self.taxable = subtotal - discount
+        self.vat = vat
+        self.total = self.taxable + vat
+
+    def to_decimal(self, value: int) -> Decimal:
+        return Decimal(int(value)).scaleb(-self.exponent)
+
+    def line_total_decimals(self) -> List[Decimal]:
+        return [self.to_decimal(value) for value in self.line_totals.tolist()]
+
+    def summary(self) -> Dict[str, Decimal]:
+        return {
+            "subtotal": self.to_decimal(self.subtotal),
+            "discount": self.to_decimal(self.discount),
+            "taxable": self.to_decimal(self.taxable),
+            "vat": self.to_decimal(self.vat),
+            "total": self.to_decimal(self.total),
+        }
+
+def price_lines(
+    quantities: Sequence[Number],
+    unit_prices: Sequence[Number],
+    discounts: Optional[Sequence[Number]] = None,
+    discount_amount: Number = 0,
+    vat_rate: Number = 0,
+    currency: Optional[str] = None,
+    round_lines: bool = False
+) -> PricingResult:
+    """견적 항목 금액 일괄 계산
+
+    라인 금액 = 수량 x 단가 - 라인 할인, 소계 - 견적 할인 = 과세 금액,
+    부가세 = 과세 금액 x 세율을 저장 정밀도 정수로 계산한다.
+    통화 자릿수가 저장 정밀도보다 작으면 round_lines일 때 라인별로,
+    아니면 합계에서 한 번 사사오입한다.
+    """
+    exponent = currency_exponent(currency)
+    divisor = 10 ** max(PRICE_EXPONENT - exponent, 0)
+
+    quantity = np.asarray(
+        [0 if value is None else value for value in quantities], dtype=np.int64
+    )
+    unit_price = to_minor_units(unit_prices)
+    line_discount = (
+        to_minor_units(discounts) if discounts is not None
+        else np.zeros(len(quantity), dtype=np.int64)
+    )
+    if not (len(quantity) == len(unit_price) == len(line_discount)):
+        raise ValueError("Line arrays must have the same length")
+
+    line_totals = quantity * unit_price - line_discount
+    if round_lines:
+        line_totals = round_half_up(line_totals, divisor)
+        subtotal = int(line_totals.sum())
+    else:
+        subtotal = int(round_half_up(np.array([line_totals.sum()]), divisor)[0])
+        line_totals = round_half_up(line_totals, divisor)
+
+    discount = int(to_minor_units([discount_amount], exponent)[0])
+    vat = int(round_half_up(
+        np.array([(subtotal - discount) * vat_basis_points(vat_rate)]), 10000
+    )[0])
+    return PricingResult(exponent, line_totals, subtotal, discount, vat)
+
+def price_items(items: Iterable, **kwargs) -> PricingResult:
+    """quantity/unit_price/discount_amount 속성을 가진 항목 목록 금액 계산"""
+    items = list(items)
+    return price_lines(
+        [item.quantity for item in items],
+        [item.unit_price for item in items],
+        [item.discount_amount for item in items],
+        **kwargs
+    )
+
+def line_amount(item: Dict) -> Decimal:
+    """내보내기 항목 라인 금액 (미리 계산한 amount가 없으면 엔진으로 계산)"""
+    if item.get("amount") is not None:
+        return item["amount"]
+    pricing = price_lines([item["quantity"]], [item["unit_price"]], [item.get("discount_amount")])
+    return pricing.line_total_decimals()[0]
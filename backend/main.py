@@ -16,6 +16,8 @@ try:
     logger.info("App imported successfully")
     
     # Vercel serverless handler
+    # lifespan을 끄므로 백그라운드 내보내기 작업 실행기는 시작되지 않음
+    # (POST /api/exports/jobs 는 503, 작업 처리는 ECS/uvicorn 배포에서만)
     logger.info("Initializing Mangum handler...")
     handler = Mangum(app, lifespan="off")
     logger.info("Handler initialized successfully")
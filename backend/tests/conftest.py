@@ -1,10 +1,12 @@
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from app.db.base import Base
 from app.main import app
 from app.db.base import get_db
+from app.core.price_cache import price_cache
+from app.core.quote_numbers import quote_number_allocator
 import os
 import redis
 
@@ -23,6 +25,8 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 def db():
     # 테스트용 데이터베이스 생성
     Base.metadata.create_all(bind=engine)
+    price_cache.clear()
+    quote_number_allocator.reset()
     
     # 테스트용 세션 생성
     db = TestingSessionLocal()
@@ -42,6 +46,18 @@ def db():
     db.close()
     Base.metadata.drop_all(bind=engine)
 
+@pytest.fixture
+def queries(db):
+    """테스트 중 실행된 SQL 문 기록"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
 @pytest.fixture
 def redis_client():
     # 테스트용 Redis 클라이언트
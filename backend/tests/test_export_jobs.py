@@ -0,0 +1,282 @@
+import asyncio
+import io
+import os
+import zipfile
+import pytest
+from types import SimpleNamespace
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.main import app
+from app.core.auth import get_current_user
+from app.core.export_cache import export_cache
+from app.core.render_pool import RenderPool
+from app.models.models import ExportJob
+from app.services import export_jobs
+from app.services import quotation_export
+from tests.test_exports import create_test_quotation
+
+@pytest.fixture
+def job_env(db: Session, tmp_path, monkeypatch):
+    """스레드 렌더링 풀, 임시 캐시/결과 디렉터리, 테스트 DB용 실행기"""
+    monkeypatch.setattr(export_cache, "directory", str(tmp_path / "cache"))
+    (tmp_path / "cache").mkdir()
+    monkeypatch.setattr(export_jobs.settings, "EXPORT_JOB_DIR", str(tmp_path / "jobs"))
+    pool = RenderPool(workers=0, max_queue=4, timeout=30)
+    monkeypatch.setattr(quotation_export, "render_pool", pool)
+    runner = export_jobs.ExportJobRunner(
+        sessionmaker(bind=db.get_bind()), workers=2, user_concurrency=1
+    )
+    # API 테스트에서는 run_until_idle로 직접 실행 (실행 루프가 돈다고 간주)
+    monkeypatch.setattr(export_jobs.ExportJobRunner, "running", True)
+    yield runner
+    pool.shutdown()
+
+def test_submit_export_job_dedupes_and_limits(db: Session, job_env, monkeypatch):
+    """동일 작업 중복 제거 및 사용자별 대기 한도 테스트"""
+    user, quotation = create_test_quotation(db)
+    monkeypatch.setattr(export_jobs.settings, "EXPORT_JOB_USER_QUEUE_LIMIT", 2)
+
+    first = export_jobs.submit_export_job(
+        db, "archive", {"status": "draft", "formats": ["pdf", "pdf"]}, user_id=user.id
+    )
+    same = export_jobs.submit_export_job(
+        db, "archive", {"formats": ["pdf"], "status": "draft"}, user_id=user.id
+    )
+    assert same.id == first.id
+    assert first.params["formats"] == ["pdf"]
+
+    export_jobs.submit_export_job(
+        db, "quotation", {"quotation_id": quotation.id, "format": "xlsx"}, user_id=user.id
+    )
+    with pytest.raises(export_jobs.ExportJobLimitExceeded):
+        export_jobs.submit_export_job(
+            db, "quotation", {"quotation_id": quotation.id, "format": "pdf"}, user_id=user.id
+        )
+    with pytest.raises(ValueError):
+        export_jobs.submit_export_job(db, "archive", {"formats": ["docx"]}, user_id=user.id)
+
+    # 끝난 작업과 같은 요청은 새 작업으로 등록
+    first.status = "completed"
+    db.commit()
+    again = export_jobs.submit_export_job(
+        db, "archive", {"status": "draft", "formats": ["pdf"]}, user_id=user.id
+    )
+    assert again.id != first.id
+
+def test_claim_respects_user_concurrency(db: Session, job_env):
+    """사용자별 동시 실행 한도 테스트"""
+    user, quotation = create_test_quotation(db)
+    jobs = [
+        export_jobs.submit_export_job(
+            db, "quotation", {"quotation_id": quotation.id, "format": format}, user_id=user.id
+        )
+        for format in ("pdf", "xlsx")
+    ]
+    job_ids = [job.id for job in jobs]
+
+    assert job_env.claim_next() == job_ids[0]
+    assert job_env.claim_next() is None  # 같은 사용자의 작업이 실행 중
+
+    db.query(ExportJob).filter(ExportJob.id == job_ids[0]).update({"status": "completed"})
+    db.commit()
+    assert job_env.claim_next() == job_ids[1]
+
+def test_fail_stale_jobs(db: Session, job_env):
+    """중단된 실행 중 작업 실패 처리 테스트"""
+    user, _ = create_test_quotation(db)
+    db.add_all([
+        ExportJob(user_id=user.id, kind="archive", params={}, params_hash="a",
+                  status="running", started_at=datetime.utcnow() - timedelta(hours=2)),
+        ExportJob(user_id=user.id, kind="archive", params={}, params_hash="b",
+                  status="running", started_at=datetime.utcnow()),
+    ])
+    db.commit()
+
+    assert export_jobs.fail_stale_jobs(db, 3600) == 1
+    statuses = [job.status for job in db.query(ExportJob).order_by(ExportJob.id)]
+    assert statuses == ["failed", "running"]
+
+def test_export_job_api_runs_and_downloads(db: Session, job_env):
+    """작업 등록 -> 백그라운드 실행 -> 상태 조회 -> 다운로드 테스트"""
+    user, quotation = create_test_quotation(db)
+    user_id, quotation_id, quote_number = user.id, quotation.id, quotation.quote_number
+    current_user = SimpleNamespace(id=user_id, role="project_manager")
+    app.dependency_overrides[get_current_user] = lambda: current_user
+    client = TestClient(app)
+
+    try:
+        submitted = client.post("/api/exports/jobs", json={
+            "kind": "archive", "params": {"status": "draft"}
+        })
+        assert submitted.status_code == 202
+        job = submitted.json()
+        assert (job["status"], job["progress"], job["download_url"]) == ("pending", 0, None)
+        single = client.post("/api/exports/jobs", json={
+            "kind": "quotation", "params": {"quotation_id": quotation_id, "format": "pdf"}
+        }).json()
+
+        not_ready = client.get(f"/api/exports/jobs/{job['id']}/download")
+        assert not_ready.status_code == 409
+
+        asyncio.run(job_env.run_until_idle())
+
+        status = client.get(f"/api/exports/jobs/{job['id']}").json()
+        assert status["status"] == "completed"
+        assert status["progress"] == 100
+        assert status["download_url"] == f"/api/exports/jobs/{job['id']}/download"
+
+        download = client.get(status["download_url"])
+        assert download.status_code == 200
+        assert download.headers["content-type"] == "application/zip"
+        archive = zipfile.ZipFile(io.BytesIO(download.content))
+        assert sorted(archive.namelist()) == [f"{quote_number}.pdf", f"{quote_number}.xlsx"]
+
+        single_status = client.get(f"/api/exports/jobs/{single['id']}").json()
+        assert single_status["status"] == "completed"
+        pdf = client.get(single_status["download_url"])
+        assert pdf.content == archive.read(f"{quote_number}.pdf")  # 캐시된 렌더링 재사용
+
+        # 다른 사용자에게는 작업이 보이지 않음
+        current_user.id = user_id + 1
+        assert client.get(f"/api/exports/jobs/{job['id']}").status_code == 404
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+def test_export_job_records_failure(db: Session, job_env):
+    """대상이 없는 작업 실패 기록 테스트"""
+    user, _ = create_test_quotation(db)
+    job = export_jobs.submit_export_job(db, "archive", {"status": "approved"}, user_id=user.id)
+    job_id = job.id
+
+    asyncio.run(job_env.run_until_idle())
+
+    db.expire_all()
+    failed = export_jobs.get_export_job(db, job_id)
+    assert failed.status == "failed"
+    assert failed.error == "No quotations match the filter"
+    assert failed.finished_at is not None
+
+def test_cancelled_job_is_requeued(db: Session, job_env, tmp_path, monkeypatch):
+    """종료로 취소된 작업은 임시 파일을 지우고 대기 상태로 복귀"""
+    user, quotation = create_test_quotation(db)
+    job = export_jobs.submit_export_job(
+        db, "quotation", {"quotation_id": quotation.id, "format": "pdf"}, user_id=user.id
+    )
+    job_id = job.id
+    started = []
+
+    async def hanging_writer(db, job, output, report_progress):
+        started.append(job.status)
+        output.write(b"partial")
+        await asyncio.sleep(30)
+
+    monkeypatch.setitem(export_jobs.JOB_WRITERS, "quotation", hanging_writer)
+
+    async def scenario():
+        job_env.start()
+        for _ in range(100):
+            if job_env._running:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        await job_env.stop()
+
+    asyncio.run(scenario())
+    assert started == ["running"]
+
+    db.expire_all()
+    requeued = export_jobs.get_export_job(db, job_id)
+    assert (requeued.status, requeued.progress, requeued.started_at) == ("pending", 0, None)
+    assert os.listdir(tmp_path / "jobs") == []
+
+def test_runner_cleans_up_stale_jobs_periodically(job_env, monkeypatch):
+    """실행 루프가 멈춘 작업 정리를 주기적으로 반복"""
+    calls = []
+    monkeypatch.setattr(export_jobs, "MAINTENANCE_INTERVAL_SECONDS", 0.02)
+    monkeypatch.setattr(job_env, "maintain", lambda: calls.append(1))
+    job_env.poll_interval = 0.01
+
+    async def scenario():
+        job_env.start()
+        await asyncio.sleep(0.2)
+        await job_env.stop()
+
+    asyncio.run(scenario())
+    assert len(calls) > 2
+
+def test_expired_job_results_are_removed(db: Session, job_env, tmp_path):
+    """보관 시간이 지난 결과 파일 삭제 후 다운로드는 410"""
+    user, _ = create_test_quotation(db)
+    (tmp_path / "jobs").mkdir()
+    paths = [tmp_path / "jobs" / f"{name}.zip" for name in ("old", "new")]
+    for path in paths:
+        path.write_bytes(b"zip")
+    old = datetime.utcnow() - timedelta(days=2)
+    jobs = [
+        ExportJob(user_id=user.id, kind="archive", params={}, params_hash="a", status="completed",
+                  progress=100, result_path=str(paths[0]), finished_at=old),
+        ExportJob(user_id=user.id, kind="archive", params={}, params_hash="b", status="failed",
+                  error="No quotations match the filter", finished_at=old),
+        ExportJob(user_id=user.id, kind="archive", params={}, params_hash="c", status="completed",
+                  progress=100, result_path=str(paths[1]), finished_at=datetime.utcnow()),
+    ]
+    db.add_all(jobs)
+    db.commit()
+    user_id, job_ids = user.id, [job.id for job in jobs]
+
+    job_env.result_ttl_seconds = 86400
+    job_env.maintain()
+
+    db.expire_all()
+    statuses = [export_jobs.get_export_job(db, job_id).status for job_id in job_ids]
+    assert statuses == ["expired", "expired", "completed"]
+    assert [path.exists() for path in paths] == [False, True]
+
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=user_id, role="project_manager")
+    try:
+        client = TestClient(app)
+        expired = client.get(f"/api/exports/jobs/{job_ids[0]}")
+        assert (expired.json()["status"], expired.json()["download_url"]) == ("expired", None)
+        assert client.get(f"/api/exports/jobs/{job_ids[0]}/download").status_code == 410
+        assert client.get(f"/api/exports/jobs/{job_ids[2]}/download").status_code == 200
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+def test_submit_export_job_requires_running_runner(db: Session):
+    """실행기가 없는 배포(서버리스)에서는 작업을 받지 않음"""
+    user, quotation = create_test_quotation(db)
+    user_id, quotation_id = user.id, quotation.id
+    assert not export_jobs.export_job_runner.running
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=user_id, role="project_manager")
+    try:
+        response = TestClient(app).post("/api/exports/jobs", json={
+            "kind": "quotation", "params": {"quotation_id": quotation_id, "format": "pdf"}
+        })
+        assert response.status_code == 503
+        assert db.query(ExportJob).count() == 0
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+def test_job_times_use_utc_and_progress_is_recorded(db: Session, job_env):
+    """작업 시각은 UTC로 기록하고 진행률은 별도 세션으로 기록"""
+    user, quotation = create_test_quotation(db)
+    job = export_jobs.submit_export_job(
+        db, "quotation", {"quotation_id": quotation.id, "format": "pdf"}, user_id=user.id
+    )
+    job_id = job.id
+
+    assert job_env.claim_next() == job_id
+    asyncio.run(export_jobs.ProgressRecorder(job_env.session_factory, job_id)(40))
+    db.expire_all()
+    claimed = export_jobs.get_export_job(db, job_id)
+    assert claimed.progress == 40
+    assert abs(claimed.started_at - datetime.utcnow()) < timedelta(minutes=1)
+    assert export_jobs.fail_stale_jobs(db, 3600) == 0
+
+    asyncio.run(job_env.run_job(job_id))
+    db.expire_all()
+    finished = export_jobs.get_export_job(db, job_id)
+    assert (finished.status, finished.progress) == ("completed", 100)
+    assert abs(finished.finished_at - datetime.utcnow()) < timedelta(minutes=1)
@@ -0,0 +1,415 @@
+import asyncio
+import io
+import os
+import threading
+import time
+import zipfile
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from datetime import date
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.export_cache import ExportCache, etag_matches, export_cache
+from app.core.render_pool import RenderPool, RenderPoolBusy, RenderTimeout
+from app.models.models import User, Company, PriceTable, Quotation
+from app.schemas.quotation import QuotationCreate, QuotationItemCreate
+from app.services import quotation as quotation_service
+from app.services import quotation_export
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_cache, "directory", str(tmp_path))
+    export_cache.clear()
+    return tmp_path
+
+@pytest.fixture
+def renders(monkeypatch):
+    """렌더링 호출 기록"""
+    calls = []
+    render = quotation_export.render_quotation
+
+    def counting_render(data, format, generator=None):
+        calls.append(format)
+        return render(data, format, generator)
+
+    monkeypatch.setattr(quotation_export, "render_quotation", counting_render)
+    return calls
+
+def create_test_quotation(db: Session, lines: int = 3):
+    user = User(username="pm", email="pm@example.com", role="project_manager")
+    company = Company(name="Test Company")
+    db.add_all([user, company])
+    db.commit()
+    price_table = PriceTable(company_id=company.id, name="Item", unit="EA",
+                             unit_price=Decimal("100"), valid_from=date(2024, 1, 1))
+    db.add(price_table)
+    db.commit()
+    quotation = quotation_service.create_quotation(db, QuotationCreate(
+        customer_id=company.id,
+        project_description="Project",
+        valid_until=date(2024, 12, 31),
+        items=[
+            QuotationItemCreate(price_table_id=price_table.id, quantity=i + 1, unit_price=Decimal("100"))
+            for i in range(lines)
+        ]
+    ), user_id=user.id)
+    return user, quotation
+
+@pytest.fixture
+def pool(monkeypatch):
+    """테스트에서는 스레드 렌더링 풀 사용"""
+    pool = RenderPool(workers=0, max_queue=1, timeout=30)
+    monkeypatch.setattr(quotation_export, "render_pool", pool)
+    yield pool
+    pool.shutdown()
+
+@pytest.fixture
+def blocking_render(monkeypatch):
+    """release가 set 될 때까지 끝나지 않는 렌더링"""
+    release = threading.Event()
+
+    def render(data, format, generator=None):
+        release.wait(5)
+        return io.BytesIO(b"done")
+
+    monkeypatch.setattr(quotation_export, "render_quotation", render)
+    yield release
+    release.set()
+
+@pytest.fixture
+def client(db: Session, pool):
+    user, quotation = create_test_quotation(db)
+    current_user = SimpleNamespace(id=user.id, role="project_manager")
+    app.dependency_overrides[get_current_user] = lambda: current_user
+    yield TestClient(app), quotation.id
+    app.dependency_overrides.pop(get_current_user, None)
+
+def test_export_cache_lru_eviction(tmp_path):
+    """내보내기 캐시 크기 제한 LRU 삭제 테스트"""
+    cache = ExportCache(str(tmp_path), max_bytes=250)
+    keys = [cache.key(i, 1, "pdf", "default-v1") for i in range(3)]
+    cache.put(keys[0], b"a" * 100)
+    cache.put(keys[1], b"b" * 100)
+    os.utime(cache._path(keys[0]), (0, 0))
+    os.utime(cache._path(keys[1]), (1, 1))
+    assert cache.get(keys[0]) is not None  # 사용 시각 갱신
+
+    cache.put(keys[2], b"c" * 100)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]).size == 100
+    assert cache.get(keys[2]).size == 100
+    assert cache.stats()["evictions"] == 1
+
+def test_etag_matches():
+    etag = 'W/"abc"'
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"xyz", "abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"xyz"', etag)
+    assert not etag_matches(None, etag)
+
+@pytest.mark.parametrize("path,format", [("excel", "xlsx"), ("pdf", "pdf")])
+def test_export_uses_render_cache_and_etag(db: Session, cache_dir, renders, client, path, format):
+    """내보내기 렌더링 캐시 및 ETag 테스트"""
+    client, quotation_id = client
+    url = f"/api/quotations/{quotation_id}/export/{path}"
+
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    second = client.get(url)
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert renders == [format]  # 두 번째는 캐시 파일 사용
+
+    not_modified = client.get(url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert renders == [format]
+
+    if format == "xlsx":
+        sheet = load_workbook(io.BytesIO(first.content)).active
+        assert sheet["B3"].value.startswith("QUOTE #: SO-")
+
+    # 버전이 바뀌면 새 ETag로 다시 렌더링
+    quotation_service.update_quotation_status(db, quotation_id, "approved", user_id=1, is_admin=True)
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert renders == [format, format]
+
+    # 고객사/단가표 이름이 바뀌어도 (버전 그대로) 새 ETag로 다시 렌더링
+    etag = changed.headers["etag"]
+    quotation = db.get(Quotation, quotation_id)
+    customer_id, price_table_id = quotation.customer_id, quotation.items[0].price_table_id
+    db.query(Company).filter(Company.id == customer_id).update({"name": "Renamed Customer"})
+    db.commit()
+    renamed = client.get(url, headers={"If-None-Match": etag})
+    assert renamed.status_code == 200
+    assert renamed.headers["etag"] != etag
+    db.query(PriceTable).filter(PriceTable.id == price_table_id).update({"name": "Renamed Item"})
+    db.commit()
+    assert client.get(url, headers={"If-None-Match": renamed.headers["etag"]}).status_code == 200
+    assert renders == [format] * 4
+    if format == "xlsx":
+        sheet = load_workbook(io.BytesIO(renamed.content)).active
+        assert sheet["E3"].value == "Renamed Customer"
+
+def test_render_pool_process_workers():
+    """프로세스 풀 렌더링 테스트 (워커별 생성기 재사용)"""
+    pool = RenderPool(workers=1, max_queue=2, timeout=60)
+    data = {
+        "quote_number": "SO-240101-001",
+        "date": "2024-01-01",
+        "valid_until": "2024-12-31",
+        "customer_name": "Customer",
+        "project_description": "Project",
+        "items": [{"name": "Item", "quantity": 2, "unit_price": Decimal("100"),
+                   "discount_amount": Decimal("0"), "remark": ""}],
+        "total_amount": Decimal("200"),
+    }
+
+    async def render_all():
+        return await asyncio.gather(
+            pool.render(data, "pdf"),
+            pool.render(data, "xlsx"),
+            pool.render(dict(data, quote_number="SO-240101-002"), "xlsx"),
+        )
+
+    try:
+        pdf, first, second = [output.read() for output in asyncio.run(render_all())]
+    finally:
+        pool.shutdown()
+
+    assert pdf.startswith(b"%PDF")
+    assert load_workbook(io.BytesIO(first)).active["B3"].value == "QUOTE #: SO-240101-001"
+    # 재사용한 생성기가 이전 견적서 내용을 남기지 않음
+    assert load_workbook(io.BytesIO(second)).active["B3"].value == "QUOTE #: SO-240101-002"
+    assert pool.stats()["completed"] == 3
+
+def test_render_pool_rejects_when_queue_full(blocking_render):
+    """렌더링 대기열 한도 초과 테스트"""
+    pool = RenderPool(workers=0, max_queue=1, timeout=30)
+
+    async def scenario():
+        running = [asyncio.ensure_future(pool.render({}, "pdf")) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(RenderPoolBusy):
+            await pool.render({}, "pdf")
+        blocking_render.set()
+        return [output.read() for output in await asyncio.gather(*running)]
+
+    try:
+        assert asyncio.run(scenario()) == [b"done", b"done"]
+    finally:
+        pool.shutdown()
+    assert pool.stats()["rejected"] == 1
+    assert pool.stats()["pending"] == 0
+
+def test_render_pool_timeout(blocking_render):
+    """렌더링 제한 시간 초과 테스트"""
+    pool = RenderPool(workers=0, max_queue=0, timeout=0.05)
+
+    try:
+        with pytest.raises(RenderTimeout):
+            asyncio.run(pool.render({}, "pdf"))
+        # 멈춘 렌더링의 실행기는 버리고 자리를 반환하므로 다음 요청이 바로 실행됨
+        assert pool._executor is None
+        assert pool.stats()["pending"] == 0
+        pool.timeout = 5
+        blocking_render.set()
+        assert asyncio.run(pool.render({}, "pdf")).read() == b"done"
+    finally:
+        pool.shutdown()
+    assert pool.stats()["timeouts"] == 1
+    assert pool.stats()["pending"] == 0
+
+def test_export_returns_503_when_render_queue_full(db: Session, cache_dir, blocking_render, pool, client):
+    """렌더링 대기열이 가득 차면 503 반환 테스트"""
+    client, quotation_id = client
+    url = f"/api/quotations/{quotation_id}/export/pdf"
+    pool.max_queue = 0
+    pool.timeout = 0.05
+
+    timed_out = client.get(url)
+    assert timed_out.status_code == 504
+
+    # 실행 중인 렌더링이 자리를 차지하는 동안에는 503
+    pool.timeout = 5
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        running = executor.submit(client.get, url)
+        for _ in range(100):
+            if pool.stats()["pending"]:
+                break
+            time.sleep(0.01)
+        busy = client.get(url)
+        blocking_render.set()
+        assert running.result().status_code == 200
+    assert busy.status_code == 503
+    assert busy.headers["retry-after"] == "5"
+
+def test_render_quotation_spools_large_output(monkeypatch):
+    """렌더링 결과가 크면 임시 파일로 전환 테스트"""
+    data = {
+        "quote_number": "SO-240101-001",
+        "date": "2024-01-01",
+        "valid_until": "2024-12-31",
+        "customer_name": "Customer",
+        "project_description": "Project",
+        "items": [{"name": f"Item {i}", "quantity": 1, "unit_price": Decimal("100"),
+                   "discount_amount": Decimal("0"), "remark": ""} for i in range(50)],
+        "total_amount": Decimal("5000"),
+    }
+
+    with quotation_export.render_quotation(data, "pdf") as small:
+        assert not small._rolled
+        assert small.read(4) == b"%PDF"
+
+    monkeypatch.setattr(settings, "EXPORT_SPOOL_MAX_BYTES", 1024)
+    with quotation_export.render_quotation(data, "pdf") as large:
+        assert large._rolled
+        assert quotation_export.file_size(large) > 1024
+        chunks = list(quotation_export.iter_chunks(large, chunk_size=1000))
+    assert b"".join(chunks).startswith(b"%PDF")
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    assert large.closed
+
+def test_export_streams_without_disk_cache(db: Session, cache_dir, renders, client, monkeypatch):
+    """디스크 캐시를 끄면 렌더링 버퍼에서 바로 스트리밍 테스트"""
+    client, quotation_id = client
+    monkeypatch.setattr(export_cache, "enabled", False)
+
+    response = client.get(f"/api/quotations/{quotation_id}/export/pdf")
+
+    assert response.status_code == 200
+    assert response.content.startswith(b"%PDF")
+    assert response.headers["content-length"] == str(len(response.content))
+    assert 'filename="quotation_SO-' in response.headers["content-disposition"]
+    assert list(cache_dir.iterdir()) == []
+
+    # ETag 비교는 캐시 없이도 동작
+    not_modified = client.get(
+        f"/api/quotations/{quotation_id}/export/pdf",
+        headers={"If-None-Match": response.headers["etag"]}
+    )
+    assert not_modified.status_code == 304
+    assert renders == ["pdf"]
+
+def test_export_archive_streams_zip(db: Session, cache_dir, renders, pool, monkeypatch):
+    """견적서 ZIP 일괄 내보내기 테스트 (필터, 캐시 재사용)"""
+    user, first = create_test_quotation(db)
+    quotations = [first] + [
+        quotation_service.create_quotation(db, QuotationCreate(
+            customer_id=first.customer_id,
+            project_description=f"Project {i}",
+            valid_until=date(2024, 12, 31),
+            items=[QuotationItemCreate(price_table_id=first.items[0].price_table_id,
+                                       quantity=1, unit_price=Decimal("100"))]
+        ), user_id=user.id)
+        for i in range(4)
+    ]
+    quote_numbers = [quotation.quote_number for quotation in quotations]
+    quotation_ids = [quotation.id for quotation in quotations]
+    for quotation_id in quotation_ids[:3]:
+        quotation_service.update_quotation_status(db, quotation_id, "approved", user_id=user.id, is_admin=True)
+    other = User(username="other", email="other@example.com", role="project_manager")
+    db.add(other)
+    db.commit()
+    user_id, other_id = user.id, other.id
+    current_user = SimpleNamespace(id=user_id, role="project_manager")
+    app.dependency_overrides[get_current_user] = lambda: current_user
+    client = TestClient(app)
+    monkeypatch.setattr(quotation_export.settings, "EXPORT_ARCHIVE_CONCURRENCY", 2)
+
+    try:
+        # 미리 캐시된 문서는 다시 렌더링하지 않음
+        assert client.get(f"/api/quotations/{quotation_ids[0]}/export/pdf").status_code == 200
+        assert renders == ["pdf"]
+
+        response = client.post("/api/exports/quotations/archive", json={
+            "status": "approved",
+            "date_from": date.today().isoformat(),
+        })
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        assert sorted(archive.namelist()) == sorted(
+            f"{number}.{format}" for number in quote_numbers[:3] for format in ("pdf", "xlsx")
+        )
+        assert archive.testzip() is None
+        assert archive.read(f"{quote_numbers[0]}.pdf").startswith(b"%PDF")
+        sheet = load_workbook(io.BytesIO(archive.read(f"{quote_numbers[1]}.xlsx"))).active
+        assert sheet["B3"].value == f"QUOTE #: {quote_numbers[1]}"
+        assert sorted(renders) == ["pdf"] * 3 + ["xlsx"] * 3
+
+        # 다른 사용자 견적서는 보이지 않음
+        current_user.id = other_id
+        empty = client.post("/api/exports/quotations/archive", json={"status": "approved"})
+        assert empty.status_code == 404
+
+        current_user.id = user_id
+        invalid = client.post("/api/exports/quotations/archive", json={"formats": ["docx"]})
+        assert invalid.status_code == 400
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+def test_export_archive_records_failed_entries(cache_dir, monkeypatch):
+    """ZIP 항목 실패는 errors.txt에 남기고 대기열 재시도는 제한 시간까지만"""
+    async def render_quotation_export(db, quotation_id, format):
+        if quotation_id == 1:
+            raise RuntimeError("generator crashed")
+        if quotation_id == 2:
+            raise RenderPoolBusy("Render queue is full")
+        return quotation_export.export_key(quotation_id, 1, format), io.BytesIO(b"ok")
+
+    monkeypatch.setattr(quotation_export, "render_quotation_export", render_quotation_export)
+    monkeypatch.setattr(quotation_export, "ARCHIVE_RETRY_SECONDS", 0.01)
+    monkeypatch.setattr(quotation_export.settings, "EXPORT_RENDER_TIMEOUT_SECONDS", 0.05)
+    headers = [SimpleNamespace(id=i, version=1, quote_number=f"SO-{i}", names="") for i in (1, 2, 3)]
+
+    async def collect():
+        return b"".join([data async for data in quotation_export.iter_quotation_archive(
+            None, headers, ["pdf"]
+        )])
+
+    archive = zipfile.ZipFile(io.BytesIO(asyncio.run(collect())))
+    assert archive.read("SO-3.pdf") == b"ok"
+    assert sorted(archive.read("errors.txt").decode().splitlines()) == [
+        "SO-1.pdf: generator crashed",
+        "SO-2.pdf: Render queue is full",
+    ]
+
+def test_export_line_amounts_use_pricing_engine(db: Session, pool):
+    """내보내기 라인 금액은 라인 할인을 반영하고 합계가 저장 총액과 일치"""
+    user, first = create_test_quotation(db, lines=1)
+    quotation = quotation_service.create_quotation(db, QuotationCreate(
+        customer_id=first.customer_id,
+        project_description="Discounted",
+        valid_until=date(2024, 12, 31),
+        discount_amount=Decimal("50"),
+        items=[
+            QuotationItemCreate(price_table_id=first.items[0].price_table_id, quantity=3,
+                                unit_price=Decimal("100.50"), discount_amount=Decimal("1.50")),
+            QuotationItemCreate(price_table_id=first.items[0].price_table_id, quantity=2,
+                                unit_price=Decimal("200")),
+        ]
+    ), user_id=user.id)
+    quotation_id = quotation.id
+
+    data = quotation_export.prepare_quotation_data(
+        quotation_service.get_quotation(db, quotation_id, load="export")
+    )
+    assert [item["amount"] for item in data["items"]] == [Decimal("300.00"), Decimal("400.00")]
+    assert sum(item["amount"] for item in data["items"]) - Decimal("50") == data["total_amount"]
+
+    _, content = asyncio.run(quotation_export.render_quotation_export(db, quotation_id, "xlsx"))
+    with content:
+        sheet = load_workbook(content).active
+    assert [sheet["E8"].value, sheet["E9"].value] == ["300.00", "400.00"]
@@ -0,0 +1,67 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from sqlalchemy.orm import Session
+
+from app.core.price_cache import PriceCache, PriceSnapshot
+from app.models.models import Company, PriceTable
+from app.schemas.price_table import PriceTableUpdate
+from app.services import price_table as price_table_service
+
+def make_snapshot(company_id: int, valid_date: date) -> PriceSnapshot:
+    return PriceSnapshot(company_id, valid_date, [
+        {"id": 1, "name": "A", "unit": "EA", "unit_price": Decimal("100")}
+    ])
+
+def test_price_cache_lru_eviction():
+    """LRU 제거 테스트"""
+    cache = PriceCache(max_entries=2, ttl_seconds=60)
+    for day in (1, 2, 3):
+        cache.put(make_snapshot(1, date(2024, 1, day)), cache.version(1))
+
+    assert cache.get(1, date(2024, 1, 1)) is None
+    assert cache.get(1, date(2024, 1, 3)) is not None
+    assert cache.stats()["evictions"] == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_price_cache_ttl_expiry():
+    """TTL 만료 테스트"""
+    cache = PriceCache(max_entries=2, ttl_seconds=0)
+    cache.put(make_snapshot(1, date(2024, 1, 1)), cache.version(1))
+
+    assert cache.get(1, date(2024, 1, 1)) is None
+
+def test_price_cache_invalidation_discards_stale_put():
+    """무효화 이후 이전 버전 스냅샷 저장 무시 테스트"""
+    cache = PriceCache()
+    version = cache.version(1)
+    cache.invalidate(1)
+    cache.put(make_snapshot(1, date(2024, 1, 1)), version)
+
+    assert cache.get(1, date(2024, 1, 1)) is None
+
+def test_price_snapshot_cached_until_write(db: Session, queries: list):
+    """단가표 변경 시 스냅샷 무효화 테스트"""
+    company = Company(name="Test Company")
+    db.add(company)
+    db.commit()
+    price_table = PriceTable(
+        company_id=company.id, name="A", unit="EA", unit_price=100,
+        valid_from=date(2024, 1, 1)
+    )
+    db.add(price_table)
+    db.commit()
+
+    snapshot = price_table_service.get_price_snapshot(db, company.id, date(2024, 5, 1))
+    assert snapshot.find("A", "EA")["unit_price"] == Decimal("100")
+
+    queries.clear()
+    cached = price_table_service.get_price_snapshot(db, company.id, date(2024, 5, 1))
+    assert cached is snapshot
+    assert queries == []
+
+    price_table_service.update_price_table(
+        db, price_table.id, PriceTableUpdate(unit_price=Decimal("150"))
+    )
+    snapshot = price_table_service.get_price_snapshot(db, company.id, date(2024, 5, 1))
+    assert snapshot.get(price_table.id)["unit_price"] == Decimal("150")
@@ -0,0 +1,322 @@
+import pytest
+import io
+from datetime import date
+from decimal import Decimal
+import pandas as pd
+from openpyxl import Workbook
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.models import Company, PriceTable
+from app.schemas.price_table import PriceTableImport
+from app.services import price_table as price_table_service
+
+def create_test_company(db: Session) -> Company:
+    company = Company(name="Test Company")
+    db.add(company)
+    db.commit()
+    db.refresh(company)
+    return company
+
+def make_rows(count: int) -> list:
+    return [
+        {
+            "Name": f"Item {i}",
+            "Unit": "EA",
+            "Unit price": 1000 + i,
+            "Description": f"Description {i}",
+            "비고": None
+        }
+        for i in range(count)
+    ]
+
+def make_workbook(rows: list) -> bytes:
+    workbook = Workbook()
+    sheet = workbook.active
+    headers = ["Name", "Unit", "Unit price", "Description", "비고"]
+    sheet.append(headers)
+    for row in rows:
+        sheet.append([row[header] for header in headers])
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+def test_import_price_tables_bulk(db: Session):
+    """단가표 일괄 가져오기 테스트"""
+    company = create_test_company(db)
+    import_data = PriceTableImport(
+        company_id=company.id,
+        valid_from=date(2024, 1, 1),
+        file_content=make_rows(2500)
+    )
+
+    commits = []
+    event.listen(db, "after_commit", lambda session: commits.append(session))
+    result = price_table_service.import_price_tables(db, import_data)
+
+    assert result.imported == 2500
+    assert result.errors == []
+    assert len(commits) == 1  # 단일 커밋
+
+    rows = db.query(PriceTable).filter(PriceTable.company_id == company.id)
+    assert rows.count() == 2500
+    first = rows.filter(PriceTable.name == "Item 0").one()
+    assert first.unit_price == Decimal("1000.00")
+    assert first.valid_from == date(2024, 1, 1)
+
+def test_import_price_tables_reports_row_errors(db: Session):
+    """행 단위 오류 보고 테스트"""
+    company = create_test_company(db)
+    rows = make_rows(3)
+    rows[1]["Unit price"] = "abc"
+    rows[2]["Name"] = None
+    import_data = PriceTableImport(
+        company_id=company.id,
+        valid_from=date(2024, 1, 1),
+        file_content=rows
+    )
+
+    result = price_table_service.import_price_tables(db, import_data)
+
+    assert result.imported == 0
+    assert [(e.row, e.field) for e in result.errors] == [
+        (3, "Unit price"),
+        (4, "Name"),
+    ]
+    # 오류가 있으면 아무 행도 저장되지 않아야 함
+    assert db.query(PriceTable).count() == 0
+
+def test_iter_excel_rows_streams_rows():
+    """엑셀 스트리밍 파싱 테스트"""
+    content = make_workbook(make_rows(12))
+
+    rows = price_table_service.iter_excel_rows(content)
+    first = next(rows)
+    assert first["Name"] == "Item 0"
+    assert first["Unit price"] == 1000
+    assert len(list(rows)) == 11
+
+    chunks = list(price_table_service.iter_excel_chunks(content, chunk_size=5))
+    assert [len(chunk) for chunk in chunks] == [5, 5, 2]
+
+    preview = price_table_service.preview_price_table_import(content, limit=3)
+    assert [row["Name"] for row in preview] == ["Item 0", "Item 1", "Item 2"]
+
+def test_import_price_table_chunks_rolls_back_on_late_error(db: Session):
+    """뒤쪽 청크 오류 시 전체 롤백 테스트"""
+    company = create_test_company(db)
+    rows = make_rows(10)
+    rows[8]["Unit price"] = "n/a"
+    content = make_workbook(rows)
+    import_data = PriceTableImport(
+        company_id=company.id,
+        valid_from=date(2024, 1, 1),
+        file_content=[]
+    )
+
+    result = price_table_service.import_price_table_chunks(
+        db,
+        import_data,
+        price_table_service.iter_excel_chunks(content, chunk_size=4)
+    )
+
+    assert result.imported == 0
+    assert [e.row for e in result.errors] == [10]
+    assert db.query(PriceTable).count() == 0
+
+def test_import_errors_use_sheet_rows_after_blank_rows(db: Session):
+    """빈 행 이후 오류 행 번호가 실제 시트 행과 일치하는지 테스트"""
+    company = create_test_company(db)
+    rows = make_rows(6)
+    rows[1] = {header: None for header in rows[1]}  # 시트 3행: 빈 행
+    rows[4]["Unit price"] = "abc"                    # 시트 6행
+    content = make_workbook(rows)
+
+    numbered = list(price_table_service.iter_excel_rows(content, with_row_numbers=True))
+    assert [row_number for row_number, _ in numbered] == [2, 4, 5, 6, 7]
+
+    result = price_table_service.import_price_table_chunks(
+        db,
+        PriceTableImport(company_id=company.id, valid_from=date(2024, 1, 1), file_content=[]),
+        price_table_service.iter_excel_chunks(content, chunk_size=2)
+    )
+    assert [(e.row, e.field) for e in result.errors] == [(6, "Unit price")]
+
+    validation = price_table_service.validate_price_table_file(content, valid_from=date(2024, 1, 1))
+    assert validation.error_rows == [6]
+
+def test_validate_price_table_frame_error_mask():
+    """컬럼 단위 검증 오류 마스크 테스트"""
+    frame = pd.DataFrame.from_records([
+        {"Name": "A", "Unit": "EA", "Unit price": "1,000"},
+        {"Name": "B", "Unit": "EA", "Unit price": "abc"},
+        {"Name": None, "Unit": "EA", "Unit price": 10},
+        {"Name": "A", "Unit": "EA", "Unit price": 20},
+        {"Name": "C", "Unit": "EA", "Unit price": 30,
+         "Valid From": "2024-02-01", "Valid Until": "2024-01-01"},
+    ])
+
+    validation = price_table_service.validate_price_table_frame(
+        frame, valid_from=date(2024, 1, 1)
+    )
+
+    assert validation.mask.tolist() == [
+        0,
+        price_table_service.ROW_INVALID_PRICE,
+        price_table_service.ROW_MISSING_FIELD,
+        price_table_service.ROW_DUPLICATE,
+        price_table_service.ROW_INVALID_DATE,
+    ]
+    assert validation.unit_prices[0] == 1000
+    assert validation.error_rows() == [(3, 2), (4, 1), (5, 16), (6, 8)]
+
+def test_validate_price_table_frame_missing_columns():
+    """필수 컬럼 누락 검증 테스트"""
+    frame = pd.DataFrame.from_records([{"Name": "A", "Unit": "EA"}])
+
+    validation = price_table_service.validate_price_table_frame(frame)
+
+    assert not validation.is_valid
+    assert [(e.row, e.field) for e in validation.errors()] == [(1, "Unit price")]
+
+def test_validate_price_table_data_defaults_valid_from():
+    """Valid From 열 없는 표준 업로드 데이터 검증 테스트"""
+    assert price_table_service.validate_price_table_data(make_rows(3))
+    rows = make_rows(2)
+    rows[1]["Unit price"] = "abc"
+    assert not price_table_service.validate_price_table_data(rows)
+
+def test_diff_import_price_tables(db: Session):
+    """변경분만 반영하는 재가져오기 테스트"""
+    company = create_test_company(db)
+    price_table_service.import_price_tables(db, PriceTableImport(
+        company_id=company.id,
+        valid_from=date(2024, 1, 1),
+        file_content=make_rows(4)
+    ))
+
+    rows = make_rows(4)
+    rows[1]["Unit price"] = 5000          # 가격 변경 -> 마감 후 추가
+    rows[2]["Description"] = "Changed"    # 설명 변경 -> 마감 후 추가
+    del rows[3]                           # 누락 -> 마감
+    rows.append({"Name": "New", "Unit": "EA", "Unit price": 10,
+                 "Description": None, "비고": None})
+    result = price_table_service.diff_import_price_table_chunks(
+        db,
+        PriceTableImport(
+            company_id=company.id,
+            valid_from=date(2024, 7, 1),
+            file_content=[]
+        ),
+        [rows]
+    )
+
+    assert result.errors == []
+    assert (result.inserted, result.updated, result.closed, result.unchanged) == (3, 0, 3, 1)
+    assert db.query(PriceTable).count() == 7
+
+    closed = (
+        db.query(PriceTable)
+        .filter(PriceTable.valid_until == date(2024, 6, 30))
+        .order_by(PriceTable.name)
+        .all()
+    )
+    assert [row.name for row in closed] == ["Item 1", "Item 2", "Item 3"]
+
+    # 같은 파일을 다시 가져오면 변경 없음
+    result = price_table_service.diff_import_price_table_chunks(
+        db,
+        PriceTableImport(
+            company_id=company.id,
+            valid_from=date(2024, 7, 1),
+            file_content=[]
+        ),
+        [rows]
+    )
+    assert (result.inserted, result.updated, result.closed, result.unchanged) == (0, 0, 0, 4)
+
+def test_get_effective_prices(db: Session, queries: list):
+    """유효 단가 조회 테스트"""
+    company = create_test_company(db)
+    db.add_all([
+        PriceTable(company_id=company.id, name="A", unit="EA", unit_price=100,
+                   valid_from=date(2024, 1, 1), valid_until=date(2024, 6, 30)),
+        PriceTable(company_id=company.id, name="A", unit="EA", unit_price=120,
+                   valid_from=date(2024, 7, 1)),
+        PriceTable(company_id=company.id, name="B", unit="EA", unit_price=200,
+                   valid_from=date(2024, 3, 1)),
+    ])
+    db.commit()
+
+    price = price_table_service.get_effective_price(
+        db, company.id, "A", "EA", date(2024, 5, 1)
+    )
+    assert price.unit_price == Decimal("100")
+
+    queries.clear()
+    prices = price_table_service.get_effective_prices(
+        db, company.id, [("A", "EA"), ("B", "EA"), ("C", "EA")], date(2024, 8, 1)
+    )
+    assert len(queries) == 1
+    assert prices[("A", "EA")].unit_price == Decimal("120")
+    assert prices[("B", "EA")].unit_price == Decimal("200")
+    assert ("C", "EA") not in prices
+
+def test_export_price_tables_streams(db: Session):
+    """단가표 CSV/XLSX 스트리밍 내보내기 테스트"""
+    company = create_test_company(db)
+    price_table_service.import_price_tables(db, PriceTableImport(
+        company_id=company.id,
+        valid_from=date(2024, 1, 1),
+        file_content=make_rows(3)
+    ))
+
+    csv_chunks = list(price_table_service.iter_price_tables_csv(db, company.id))
+    lines = b"".join(csv_chunks).decode("utf-8-sig").splitlines()
+    assert lines[0] == "Name,Unit,Unit price,Description,비고,Valid From,Valid Until"
+    assert lines[1] == "Item 0,EA,1000.00,Description 0,,2024-01-01,"
+    assert len(lines) == 4
+
+    content = b"".join(price_table_service.iter_price_tables_xlsx(db, company.id))
+    rows = price_table_service.parse_excel_file(content)
+    assert [row["Name"] for row in rows] == ["Item 0", "Item 1", "Item 2"]
+    assert rows[0]["Valid From"].date() == date(2024, 1, 1)
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_columnar_export_import_round_trip(db: Session, format: str):
+    """Parquet/Arrow 내보내기 후 가져오기 왕복 테스트"""
+    pytest.importorskip("pyarrow")
+    company = create_test_company(db)
+    rows = make_rows(2500)
+    rows[0]["비고"] = "메모"
+    price_table_service.import_price_tables(db, PriceTableImport(
+        company_id=company.id,
+        valid_from=date(2024, 1, 1),
+        valid_until=date(2024, 12, 31),
+        file_content=rows
+    ))
+    exporter = {
+        "parquet": price_table_service.iter_price_tables_parquet,
+        "arrow": price_table_service.iter_price_tables_arrow,
+    }[format]
+    content = b"".join(exporter(db, company.id))
+
+    target = create_test_company(db)
+    result = price_table_service.import_price_table_chunks(
+        db,
+        PriceTableImport(company_id=target.id, valid_from=date(2025, 1, 1), file_content=[]),
+        price_table_service.iter_import_chunks(content, f"price_tables.{format}")
+    )
+
+    assert result.errors == []
+    assert result.imported == 2500
+    copied = (
+        db.query(PriceTable)
+        .filter(PriceTable.company_id == target.id, PriceTable.name == "Item 0")
+        .one()
+    )
+    assert copied.unit_price == Decimal("1000.00")
+    assert copied.notes == "메모"
+    # 파일에 기록된 행별 유효기간 유지
+    assert copied.valid_from == date(2024, 1, 1)
+    assert copied.valid_until == date(2024, 12, 31)
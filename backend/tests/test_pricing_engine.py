@@ -0,0 +1,87 @@
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+from app.utils import pricing_engine
+
+def test_price_lines_exact_fixed_point():
+    """고정소수점 라인/합계 계산 테스트"""
+    result = pricing_engine.price_lines(
+        quantities=[3, 1, 2],
+        unit_prices=[Decimal("0.10"), Decimal("19.99"), "1000.005"],
+        discounts=[None, Decimal("0.99"), 0],
+        discount_amount=Decimal("1.00")
+    )
+
+    # 1000.005는 저장 정밀도(소수 2자리)로 사사오입 -> 1000.01
+    assert result.line_total_decimals() == [Decimal("0.30"), Decimal("19.00"), Decimal("2000.02")]
+    assert result.summary()["subtotal"] == Decimal("2019.32")
+    assert result.summary()["total"] == Decimal("2018.32")
+
+def test_price_lines_vat_and_currency_rounding():
+    """부가세 및 통화 자릿수 반올림 테스트"""
+    result = pricing_engine.price_lines(
+        quantities=[1, 1],
+        unit_prices=["100.50", "200.40"],
+        vat_rate=Decimal("0.1"),
+        currency="KRW"
+    )
+    # 합계에서 한 번 반올림: 300.90 -> 301, 부가세 30.1 -> 30
+    assert result.summary() == {
+        "subtotal": Decimal("301"),
+        "discount": Decimal("0"),
+        "taxable": Decimal("301"),
+        "vat": Decimal("30"),
+        "total": Decimal("331"),
+    }
+
+    # 라인별 반올림: 101 + 200 = 301 (합계와 같지만 라인 값이 정수)
+    result = pricing_engine.price_lines(
+        quantities=[1, 1],
+        unit_prices=["100.50", "200.40"],
+        currency="KRW",
+        round_lines=True
+    )
+    assert result.line_totals.tolist() == [101, 200]
+
+    # 부가세 사사오입: 5 x 0.1 = 0.5 -> 1
+    result = pricing_engine.price_lines([1], ["5"], vat_rate="0.1", currency="KRW")
+    assert result.vat == 1
+
+    with pytest.raises(ValueError):
+        pricing_engine.price_lines([1, 2], ["1"])
+
+def test_price_items_matches_decimal_sum():
+    """ORM 항목 금액 계산이 Decimal 합계와 같은지 테스트"""
+    rng = np.random.default_rng(0)
+    items = [
+        SimpleNamespace(
+            quantity=int(rng.integers(1, 100)),
+            unit_price=Decimal(int(rng.integers(1, 10_000_000))) / 100,
+            discount_amount=Decimal(int(rng.integers(0, 1000))) / 100
+        )
+        for _ in range(500)
+    ]
+    expected = sum(i.unit_price * i.quantity - i.discount_amount for i in items) - Decimal("12.34")
+
+    result = pricing_engine.price_items(items, discount_amount=Decimal("12.34"))
+
+    assert result.to_decimal(result.total) == expected
+
+def test_price_lines_benchmark_10k_lines():
+    """10,000 라인 견적 계산 성능 테스트"""
+    quantities = list(range(1, 10_001))
+    unit_prices = [Decimal(i % 5000) + Decimal("0.99") for i in range(10_000)]
+    discounts = [Decimal("0.50")] * 10_000
+
+    start = time.perf_counter()
+    result = pricing_engine.price_lines(
+        quantities, unit_prices, discounts, vat_rate="0.1", currency="KRW"
+    )
+    elapsed = time.perf_counter() - start
+
+    assert len(result.line_totals) == 10_000
+    # CI 편차를 고려한 넉넉한 상한 (로컬에서는 수 ms)
+    assert elapsed < 0.5
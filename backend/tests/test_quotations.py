@@ -0,0 +1,396 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.main import app
+from app.core.auth import get_current_active_user
+from app.core.config import settings
+from app.core.quote_numbers import QuoteNumberAllocator
+from app.models.models import (
+    User, Company, PriceTable, Quotation, QuotationItem, QuoteNumberSequence
+)
+from app.schemas.quotation import (
+    QuotationCreate, QuotationItemCreate, QuotationItemUpdate, QuotationItemsPatch,
+    QuotationPreviewItem, QuotationPreviewRequest
+)
+from app.services import quotation as quotation_service
+
+def create_test_user(db: Session, username: str = "pm", role: str = "project_manager") -> User:
+    user = User(username=username, email=f"{username}@example.com", role=role)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+def create_test_company(db: Session) -> Company:
+    company = Company(name="Test Company")
+    db.add(company)
+    db.commit()
+    db.refresh(company)
+    return company
+
+def create_test_price_tables(db: Session, company: Company, count: int = 3) -> list:
+    price_tables = [
+        PriceTable(
+            company_id=company.id,
+            name=f"Item {i}",
+            unit="EA",
+            unit_price=Decimal("1000") * (i + 1),
+            valid_from=date(2024, 1, 1)
+        )
+        for i in range(count)
+    ]
+    db.add_all(price_tables)
+    db.commit()
+    return price_tables
+
+def create_test_quotations(db: Session, user: User, company: Company, count: int) -> list:
+    price_tables = create_test_price_tables(db, company)
+    quotations = []
+    for i in range(count):
+        quotation = Quotation(
+            quote_number=f"SO-TEST-{i:03d}",
+            version=1,
+            customer_id=company.id,
+            project_description=f"Project {i}",
+            created_by=user.id,
+            valid_until=date(2024, 12, 31),
+            total_amount=Decimal("0"),
+            discount_amount=Decimal("0"),
+            status="draft",
+            items=[
+                QuotationItem(
+                    price_table_id=price_table.id,
+                    quantity=2,
+                    unit_price=price_table.unit_price,
+                    discount_amount=Decimal("0")
+                )
+                for price_table in price_tables
+            ]
+        )
+        db.add(quotation)
+        quotations.append(quotation)
+    db.commit()
+    return [quotation.id for quotation in quotations]
+
+def test_get_quotations_loads_items_in_fixed_queries(db: Session, queries: list):
+    """견적서 목록 조회 쿼리 수 고정 테스트"""
+    user = create_test_user(db)
+    company = create_test_company(db)
+    user_id = user.id
+    create_test_quotations(db, user, company, 20)
+    db.expunge_all()
+
+    queries.clear()
+    quotations = quotation_service.get_quotations(db, user_id=user_id)
+    assert sum(len(quotation.items) for quotation in quotations) == 60
+
+    # 견적서 1회 + items selectin 1회
+    assert len(queries) == 2
+
+def test_get_quotation_export_loader(db: Session, queries: list):
+    """내보내기용 견적서 조회 쿼리 수 고정 테스트"""
+    user = create_test_user(db)
+    company = create_test_company(db)
+    quotation_id = create_test_quotations(db, user, company, 1)[0]
+    db.expunge_all()
+
+    queries.clear()
+    loaded = quotation_service.get_quotation(db, quotation_id, load="export")
+    assert loaded.customer.name == "Test Company"
+    assert [item.price_table.name for item in loaded.items] == ["Item 0", "Item 1", "Item 2"]
+
+    # 견적서 + customer 조인 1회, items + price_table 조인 1회
+    assert len(queries) == 2
+
+def test_get_quotations_cursor_pagination(db: Session):
+    """견적서 목록 키셋 페이지네이션 테스트"""
+    user = create_test_user(db)
+    company = create_test_company(db)
+    quotation_ids = create_test_quotations(db, user, company, 7)
+    # 같은 작성 시각이 섞여 있어도 id로 순서가 결정되어야 함
+    base = datetime(2024, 1, 1, 9, 0, 0)
+    for i, quotation_id in enumerate(quotation_ids):
+        db.get(Quotation, quotation_id).created_at = base + timedelta(minutes=i // 2)
+    db.commit()
+
+    pages = []
+    cursor = None
+    while True:
+        page = quotation_service.get_quotations(
+            db, user_id=user.id, limit=3, cursor=cursor
+        )
+        pages.append([quotation.id for quotation in page])
+        if len(page) < 3:
+            break
+        cursor = quotation_service.encode_cursor(page[-1])
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sum(pages, []) == list(reversed(quotation_ids))
+
+    with pytest.raises(ValueError):
+        quotation_service.get_quotations(db, user_id=user.id, cursor="not-a-cursor")
+
+def test_cursor_header_exposed_to_browsers():
+    """다른 origin에서 X-Next-Cursor/내보내기 헤더를 읽을 수 있는지 테스트"""
+    response = TestClient(app).get("/health", headers={"Origin": "http://frontend.example.com"})
+    exposed = response.headers["access-control-expose-headers"]
+    assert {"X-Next-Cursor", "ETag", "Content-Disposition"} <= {
+        header.strip() for header in exposed.split(",")
+    }
+
+def test_create_quotations_batch(db: Session, queries: list):
+    """견적서 일괄 생성 테스트"""
+    user = create_test_user(db)
+    company = create_test_company(db)
+    price_tables = create_test_price_tables(db, company)
+    payloads = [
+        QuotationCreate(
+            customer_id=company.id,
+            project_description=f"Renewal {i}",
+            valid_until=date(2024, 12, 31),
+            discount_amount=Decimal("100"),
+            items=[
+                QuotationItemCreate(
+                    price_table_id=price_table.id,
+                    quantity=i + 1,
+                    unit_price=price_table.unit_price
+                )
+                for price_table in price_tables
+            ]
+        )
+        for i in range(50)
+    ]
+    payloads[3] = payloads[3].copy(update={"customer_id": 999})
+    payloads[7].items[0].price_table_id = 998
+
+    queries.clear()
+    result = quotation_service.create_quotations_batch(db, payloads, user_id=user.id)
+
+    assert (result.created, result.failed) == (48, 2)
+    assert [r.index for r in result.results] == list(range(50))
+    assert result.results[3].error == "Customer 999 not found"
+    assert result.results[7].error == "Price table not found: 998"
+    # 1000 + 2000 + 3000 = 6000 (수량 1) - 견적 할인 100
+    assert result.results[0].total_amount == Decimal("5900")
+    # 헤더/항목/최초 버전 모두 건수와 관계없이 한 번씩만 INSERT
+    inserts = [q for q in queries if q.startswith("INSERT INTO quotation")]
+    assert len(inserts) == 3
+
+    assert db.query(Quotation).count() == 48
+    assert db.query(QuotationItem).count() == 48 * 3
+    quote_numbers = [r.quote_number for r in result.results if r.success]
+    assert len(set(quote_numbers)) == 48
+    assert quote_numbers[0].endswith("-001")
+
+def test_create_quotations_batch_endpoint(db: Session):
+    """견적서 일괄 생성 API 테스트"""
+    user = create_test_user(db)
+    company = create_test_company(db)
+    price_table = create_test_price_tables(db, company, count=1)[0]
+    payload = {
+        "customer_id": company.id,
+        "project_description": "Renewal",
+        "valid_until": "2024-12-31",
+        "items": [{"price_table_id": price_table.id, "quantity": 1, "unit_price": "1000"}],
+    }
+    current_user = SimpleNamespace(id=user.id, role="project_manager")
+    app.dependency_overrides[get_current_active_user] = lambda: current_user
+    try:
+        client = TestClient(app)
+        response = client.post("/api/quotations/batch", json={"quotations": [payload] * 3})
+        assert response.status_code == 200
+        assert response.json()["created"] == 3
+
+        too_many = [payload] * (settings.QUOTATION_BATCH_MAX_SIZE + 1)
+        response = client.post("/api/quotations/batch", json={"quotations": too_many})
+        assert response.status_code == 400
+    finally:
+        app.dependency_overrides.pop(get_current_active_user, None)
+
+def test_quote_number_allocator_blocks(db: Session, queries: list):
+    """견적서 번호 블록 예약 테스트"""
+    allocator = QuoteNumberAllocator(block_size=5)
+    day = date(2024, 3, 15)
+
+    queries.clear()
+    numbers = allocator.allocate(db, 3, day=day)
+    numbers += allocator.allocate(db, 2, day=day)
+    assert numbers == [f"SO-240315-{i:03d}" for i in range(1, 6)]
+    # 블록 하나로 처리: 행 보장 + UPDATE ... RETURNING
+    assert len(queries) == 2
+
+    # 블록을 넘는 요청은 필요한 만큼 한 번에 예약
+    numbers = allocator.allocate(db, 7, day=day)
+    assert numbers == [f"SO-240315-{i:03d}" for i in range(6, 13)]
+    # 다른 프로세스의 할당기는 겹치지 않는 구간을 받음
+    other = QuoteNumberAllocator(block_size=5)
+    assert other.allocate(db, day=day) == ["SO-240315-013"]
+    assert allocator.allocate(db, day=day) == ["SO-240315-018"]
+
+def test_quote_number_allocator_concurrent(tmp_path):
+    """여러 워커 동시 할당 시 번호 중복 없음 테스트"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'sequences.db'}")
+    QuoteNumberSequence.__table__.create(engine)
+    Session = sessionmaker(bind=engine)
+    # 워커(프로세스)마다 할당기 하나, 워커 안에서는 스레드 여러 개
+    allocators = [QuoteNumberAllocator(block_size=7) for _ in range(4)]
+
+    def work(allocator):
+        session = Session()
+        try:
+            return [
+                number
+                for _ in range(25)
+                for number in allocator.allocate(session, 2, day=date(2024, 3, 15))
+            ]
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(work, allocators * 2))
+    numbers = [number for result in results for number in result]
+
+    assert len(numbers) == 8 * 25 * 2
+    assert len(set(numbers)) == len(numbers)
+    engine.dispose()
+
+def test_preview_quotation_endpoint(db: Session, queries: list):
+    """견적 미리보기 API 테스트 (DB 쓰기 없음)"""
+    user = create_test_user(db)
+    company = create_test_company(db)
+    price_tables = create_test_price_tables(db, company)
+    payload = {
+        "customer_id": company.id,
+        "price_date": "2024-06-01",
+        "discount_amount": "500",
+        "vat_rate": "0.1",
+        "items": [
+            {"price_table_id": price_tables[0].id, "quantity": 2},
+            {"price_table_id": price_tables[1].id, "quantity": 1,
+             "unit_price": "1500", "discount_amount": "100"},
+        ],
+    }
+    current_user = SimpleNamespace(id=user.id, role="project_manager")
+    app.dependency_overrides[get_current_active_user] = lambda: current_user
+    try:
+        client = TestClient(app)
+        queries.clear()
+        response = client.post("/api/quotations/preview", json=payload)
+        assert response.status_code == 200
+        preview = response.json()
+        assert [line["line_total"] for line in preview["items"]] == ["2000.00", "1400.00"]
+        assert preview["items"][0]["name"] == "Item 0"
+        assert preview["taxable_amount"] == "2900.00"
+        assert preview["vat_amount"] == "290.00"
+        assert preview["total_amount"] == "2900.00"
+        assert preview["total_with_vat"] == "3190.00"
+        assert not [q for q in queries if not q.startswith("SELECT")]
+
+        # 같은 고객사/기준일은 캐시된 단가 스냅샷 사용
+        queries.clear()
+        assert client.post("/api/quotations/preview", json=payload).status_code == 200
+        assert not [q for q in queries if "price_tables" in q]
+
+        payload["items"][0]["price_table_id"] = 999
+        response = client.post("/api/quotations/preview", json=payload)
+        assert response.status_code == 400
+    finally:
+        app.dependency_overrides.pop(get_current_active_user, None)
+    assert db.query(Quotation).count() == 0
+
+def test_preview_total_matches_created_quotation(db: Session):
+    """미리보기 total_amount와 같은 항목으로 저장한 견적서 total_amount 일치 테스트"""
+    user = create_test_user(db)
+    company = create_test_company(db)
+    price_tables = create_test_price_tables(db, company)
+    lines = [
+        (price_tables[0].id, 3, Decimal("1000.50"), Decimal("0")),
+        (price_tables[1].id, 1, Decimal("1500"), Decimal("100")),
+    ]
+
+    preview = quotation_service.preview_quotation(db, QuotationPreviewRequest(
+        customer_id=company.id,
+        price_date=date(2024, 6, 1),
+        discount_amount=Decimal("250"),
+        items=[
+            QuotationPreviewItem(price_table_id=price_table_id, quantity=quantity,
+                                 unit_price=unit_price, discount_amount=discount)
+            for price_table_id, quantity, unit_price, discount in lines
+        ]
+    ))
+    quotation = quotation_service.create_quotation(db, QuotationCreate(
+        customer_id=company.id,
+        project_description="Preview",
+        valid_until=date(2024, 12, 31),
+        discount_amount=Decimal("250"),
+        items=[
+            QuotationItemCreate(price_table_id=price_table_id, quantity=quantity,
+                                unit_price=unit_price, discount_amount=discount)
+            for price_table_id, quantity, unit_price, discount in lines
+        ]
+    ), user_id=user.id)
+
+    assert preview.total_amount == quotation.total_amount == Decimal("4151.50")
+    assert preview.total_with_vat == preview.total_amount + preview.vat_amount
+
+def test_patch_quotation_items(db: Session, queries: list):
+    """견적서 항목 부분 수정 테스트"""
+    user = create_test_user(db)
+    company = create_test_company(db)
+    price_tables = create_test_price_tables(db, company)
+    quotation = quotation_service.create_quotation(db, QuotationCreate(
+        customer_id=company.id,
+        project_description="Large",
+        valid_until=date(2024, 12, 31),
+        items=[
+            QuotationItemCreate(price_table_id=price_tables[0].id, quantity=1, unit_price=Decimal("10"))
+            for _ in range(200)
+        ]
+    ), user_id=user.id)
+    quotation_id, version = quotation.id, quotation.version
+    item_ids = [item.id for item in quotation.items]
+    assert quotation.total_amount == Decimal("2000")
+
+    queries.clear()
+    patched = quotation_service.patch_quotation_items(
+        db, quotation_id,
+        QuotationItemsPatch(update=[QuotationItemUpdate(id=item_ids[5], quantity=3)]),
+        user_id=user.id
+    )
+    assert patched.total_amount == Decimal("2020")
+    assert patched.version == version + 1
+    # 항목 1행 + 버전 카운터 + 견적서 1행 + 버전 델타 1행만 기록
+    writes = [q for q in queries if not q.startswith("SELECT")]
+    assert sorted(" ".join(q.split()[:3]) for q in writes) == [
+        "INSERT INTO quotation_versions",
+        "UPDATE quotation_items SET",
+        "UPDATE quotations SET",
+        "UPDATE quotations SET",
+    ]
+
+    patched = quotation_service.patch_quotation_items(
+        db, quotation_id,
+        QuotationItemsPatch(
+            add=[QuotationItemCreate(price_table_id=price_tables[1].id, quantity=2,
+                                     unit_price=Decimal("50"), discount_amount=Decimal("5"))],
+            remove=item_ids[:10]
+        ),
+        user_id=user.id
+    )
+    assert patched.total_amount == Decimal("2020") - Decimal("120") + Decimal("95")
+    assert len(patched.items) == 191
+    # 증분 계산 결과가 전체 재계산과 같아야 함
+    assert patched.total_amount == quotation_service.calculate_total_amount(
+        patched.items, patched.discount_amount
+    )
+
+    with pytest.raises(ValueError):
+        quotation_service.patch_quotation_items(
+            db, quotation_id, QuotationItemsPatch(remove=[item_ids[0]]), user_id=user.id
+        )
@@ -0,0 +1,463 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.main import app
+from app.core.auth import get_current_active_user, get_current_active_superuser
+from app.core.config import settings
+from app.db.base import Base
+from app.models.models import User, Company, PriceTable, Quotation, QuotationVersion
+from app.schemas.quotation import (
+    QuotationCreate, QuotationItemCreate, QuotationItemUpdate, QuotationItemsPatch, QuotationUpdate
+)
+from app.services import quotation as quotation_service
+from app.services.version_compaction import compact_versions
+from app.services.version_service import VersionService, apply_delta, diff_states
+
+def create_test_quotation(db: Session, lines: int = 3):
+    user = User(username="pm", email="pm@example.com", role="project_manager")
+    company = Company(name="Test Company")
+    db.add_all([user, company])
+    db.commit()
+    price_table = PriceTable(company_id=company.id, name="Item", unit="EA",
+                             unit_price=Decimal("100"), valid_from=date(2024, 1, 1))
+    db.add(price_table)
+    db.commit()
+    quotation = quotation_service.create_quotation(db, QuotationCreate(
+        customer_id=company.id,
+        project_description="Project",
+        valid_until=date(2024, 12, 31),
+        items=[
+            QuotationItemCreate(price_table_id=price_table.id, quantity=1, unit_price=Decimal("100"))
+            for _ in range(lines)
+        ]
+    ), user_id=user.id)
+    return user, quotation
+
+def test_diff_and_apply_delta_round_trip():
+    """상태 차이 계산/적용 왕복 테스트"""
+    old = {
+        "quotation": {"status": "draft", "total_amount": "300"},
+        "items": {"1": {"quantity": 1}, "2": {"quantity": 2}, "3": {"quantity": 3}},
+    }
+    new = {
+        "quotation": {"status": "draft", "total_amount": "500"},
+        "items": {"1": {"quantity": 1}, "2": {"quantity": 5}, "4": {"quantity": 4}},
+    }
+
+    delta = diff_states(old, new)
+
+    assert delta == {
+        "quotation": {"total_amount": "500"},
+        "added": {"4": {"quantity": 4}},
+        "updated": {"2": {"quantity": 5}},
+        "removed": ["3"],
+    }
+    assert apply_delta(old, delta) == new
+    assert diff_states(new, new) == {}
+
+def test_versions_store_deltas_between_snapshots(db: Session, monkeypatch):
+    """델타 저장 및 N 버전마다 스냅샷 테스트"""
+    monkeypatch.setattr(settings, "QUOTATION_SNAPSHOT_INTERVAL", 3)
+    user, quotation = create_test_quotation(db, lines=50)
+    quotation_id = quotation.id
+    item_ids = [item.id for item in quotation.items]
+    service = VersionService(db)
+    states = {1: service.get_state(quotation_id, 1)}
+
+    for quantity in range(2, 8):
+        quotation_service.patch_quotation_items(
+            db, quotation_id,
+            QuotationItemsPatch(update=[QuotationItemUpdate(id=item_ids[0], quantity=quantity)]),
+            user_id=user.id
+        )
+        states[quantity] = service.get_state(quotation_id, quantity)
+    quotation_service.update_quotation_status(db, quotation_id, "pending", user_id=user.id)
+
+    versions = (
+        db.query(QuotationVersion)
+        .filter(QuotationVersion.quotation_id == quotation_id)
+        .order_by(QuotationVersion.version_number)
+        .all()
+    )
+    assert [v.version_number for v in versions] == list(range(1, 9))
+    assert [v.is_snapshot for v in versions] == [
+        True, False, False, True, False, False, True, False
+    ]
+    # 델타는 편집 크기만큼만 저장
+    assert versions[1].changes == {
+        "quotation": {"total_amount": "5100.00"},
+        "updated": {str(item_ids[0]): {
+            "price_table_id": quotation.items[0].price_table_id,
+            "quantity": 2, "unit_price": "100.00", "discount_amount": "0.00",
+        }},
+    }
+    assert versions[-1].changes == {"quotation": {"status": "pending"}}
+
+    # 재구성한 상태가 당시 상태와 같아야 함
+    assert states[1]["items"][str(item_ids[0])]["quantity"] == 1
+    for version_number in range(2, 8):
+        assert service.get_state(quotation_id, version_number) == states[version_number]
+        assert states[version_number]["items"][str(item_ids[0])]["quantity"] == version_number
+    assert service.get_state(quotation_id, 8)["quotation"]["status"] == "pending"
+    assert service.get_state(quotation_id, 9) is None
+
+def test_update_quotation_records_version(db: Session):
+    """견적서 수정 시 버전 기록 테스트"""
+    user, quotation = create_test_quotation(db)
+    quotation_id = quotation.id
+
+    updated = quotation_service.update_quotation(
+        db, quotation_id, QuotationUpdate(project_description="Changed"), user_id=user.id
+    )
+    assert updated.version == 2
+    # 변경이 없으면 버전을 올리지 않음
+    updated = quotation_service.update_quotation(
+        db, quotation_id, QuotationUpdate(project_description="Changed"), user_id=user.id
+    )
+    assert updated.version == 2
+
+    state = VersionService(db).get_state(quotation_id, 2)
+    assert state["quotation"]["project_description"] == "Changed"
+    assert len(state["items"]) == 3
+
+def test_version_diff_endpoint(db: Session, queries: list):
+    """버전 간 차이 조회 API 테스트"""
+    user, quotation = create_test_quotation(db)
+    quotation_id = quotation.id
+    item_ids = [item.id for item in quotation.items]
+    other = PriceTable(company_id=quotation.customer_id, name="Other", unit="EA",
+                       unit_price=Decimal("50"), valid_from=date(2024, 1, 1))
+    db.add(other)
+    db.commit()
+    price_table_id = other.id
+    quotation_service.patch_quotation_items(db, quotation_id, QuotationItemsPatch(
+        update=[QuotationItemUpdate(id=item_ids[0], quantity=4)]
+    ), user_id=user.id)
+    quotation_service.patch_quotation_items(db, quotation_id, QuotationItemsPatch(
+        add=[QuotationItemCreate(price_table_id=price_table_id, quantity=2, unit_price=Decimal("50"))],
+        remove=[item_ids[1]]
+    ), user_id=user.id)
+    quotation_service.update_quotation_status(db, quotation_id, "pending", user_id=user.id)
+
+    current_user = SimpleNamespace(id=user.id, role="project_manager")
+    app.dependency_overrides[get_current_active_user] = lambda: current_user
+    try:
+        client = TestClient(app)
+        queries.clear()
+        response = client.get(f"/api/quotations/{quotation_id}/versions/diff?from=1&to=4")
+        assert response.status_code == 200
+        # 버전 조회는 한 번
+        assert len([q for q in queries if "quotation_versions" in q]) == 1
+        diff = response.json()
+        assert diff["quotation"]["status"] == {"old": "draft", "new": "pending"}
+        assert [line["item_id"] for line in diff["removed"]] == [item_ids[1]]
+        assert diff["added"][0]["line_total"] == "100.00"
+        assert diff["changed"][0]["item_id"] == item_ids[0]
+        assert diff["changed"][0]["fields"] == {"quantity": {"old": 1, "new": 4}}
+        assert diff["total_delta"] == "300.00"
+
+        response = client.get(f"/api/quotations/{quotation_id}/versions/diff?from=4&to=2")
+        assert response.status_code == 400
+        response = client.get(f"/api/quotations/{quotation_id}/versions/diff?from=1&to=9")
+        assert response.status_code == 404
+
+        # 다른 사용자의 견적서는 조회 불가, 관리자는 가능
+        current_user.id = user.id + 1
+        response = client.get(f"/api/quotations/{quotation_id}/versions/diff?from=1&to=4")
+        assert response.status_code == 403
+        current_user.role = "admin"
+        response = client.get(f"/api/quotations/{quotation_id}/versions/diff?from=1&to=4")
+        assert response.status_code == 200
+        response = client.get(f"/api/quotations/{quotation_id + 100}/versions/diff?from=1&to=4")
+        assert response.status_code == 404
+    finally:
+        app.dependency_overrides.pop(get_current_active_user, None)
+
+def test_create_version_allocates_unique_numbers_concurrently(tmp_path):
+    """여러 스레드 동시 버전 생성 시 번호 중복 없음 테스트"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'versions.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30}
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    quotation = Quotation(project_description="Concurrent", version=1, status="draft")
+    session.add(quotation)
+    session.commit()
+    quotation_id = quotation.id
+    session.close()
+
+    def work(worker: int):
+        session = Session()
+        try:
+            return [
+                VersionService(session).create_version(
+                    quotation_id, {"worker": worker, "save": i}, user_id=1
+                ).version_number
+                for i in range(10)
+            ]
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        numbers = [n for result in executor.map(work, range(8)) for n in result]
+
+    assert sorted(numbers) == list(range(2, 82))
+    session = Session()
+    assert session.get(Quotation, quotation_id).version == 81
+    session.close()
+    engine.dispose()
+
+def test_version_number_unique_constraint(db: Session):
+    """(quotation_id, version_number) 중복 차단 테스트"""
+    user, quotation = create_test_quotation(db)
+    db.add(QuotationVersion(quotation_id=quotation.id, version_number=1,
+                            changes={}, created_by=user.id))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+def test_version_history_pagination_and_summary(db: Session, queries: list):
+    """버전 이력 커서 페이지네이션 및 요약 API 테스트"""
+    user, quotation = create_test_quotation(db)
+    quotation_id = quotation.id
+    item_id = quotation.items[0].id
+    for quantity in range(2, 7):
+        quotation_service.patch_quotation_items(db, quotation_id, QuotationItemsPatch(
+            update=[QuotationItemUpdate(id=item_id, quantity=quantity)]
+        ), user_id=user.id)
+
+    current_user = SimpleNamespace(id=user.id, role="project_manager")
+    app.dependency_overrides[get_current_active_user] = lambda: current_user
+    try:
+        client = TestClient(app)
+        pages = []
+        cursor = None
+        while True:
+            params = {"limit": 4}
+            if cursor:
+                params["cursor"] = cursor
+            queries.clear()
+            response = client.get(f"/api/quotations/{quotation_id}/versions/summary", params=params)
+            assert response.status_code == 200
+            # 요약은 changes 컬럼을 읽지 않음
+            assert not [q for q in queries if "quotation_versions.changes" in q]
+            pages.append(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert [[v["version_number"] for v in page] for page in pages] == [[6, 5, 4, 3], [2, 1]]
+        latest = pages[0][0]
+        assert latest["author"] == "pm"
+        # 델타: 총액 + 변경 항목 1개
+        assert (latest["is_snapshot"], latest["change_count"]) == (False, 2)
+        assert (pages[1][1]["is_snapshot"], pages[1][1]["change_count"]) == (True, 3)
+
+        response = client.get(f"/api/quotations/{quotation_id}/versions", params={"limit": 2})
+        assert [v["version_number"] for v in response.json()] == [6, 5]
+        assert response.headers["X-Next-Cursor"] == "5"
+
+        response = client.get(f"/api/quotations/{quotation_id}/versions/6")
+        assert response.status_code == 200
+        assert response.json()["changes"]["updated"][str(item_id)]["quantity"] == 6
+        assert client.get(f"/api/quotations/{quotation_id}/versions/99").status_code == 404
+
+        # 다른 사용자의 견적서 이력은 조회 불가, 관리자는 가능
+        paths = [f"/api/quotations/{quotation_id}/versions{suffix}"
+                 for suffix in ("", "/summary", "/6")]
+        current_user.id = user.id + 1
+        assert [client.get(path).status_code for path in paths] == [403, 403, 403]
+        current_user.role = "admin"
+        assert [client.get(path).status_code for path in paths] == [200, 200, 200]
+    finally:
+        app.dependency_overrides.pop(get_current_active_user, None)
+
+def build_history(db: Session, user, quotation) -> dict:
+    """수량 변경 6회 + 중간 상태 변경 1회 이력 생성 후 버전별 상태 반환"""
+    item_id = quotation.items[0].id
+    for quantity in range(2, 8):
+        quotation_service.patch_quotation_items(db, quotation.id, QuotationItemsPatch(
+            update=[QuotationItemUpdate(id=item_id, quantity=quantity)]
+        ), user_id=user.id)
+        if quantity == 4:
+            quotation_service.update_quotation_status(db, quotation.id, "pending", user_id=user.id)
+    service = VersionService(db)
+    return service.get_states(quotation.id, range(1, quotation.version + 1))
+
+def test_compact_versions(db: Session, monkeypatch):
+    """오래된 견적서 버전 이력 압축 테스트"""
+    monkeypatch.setattr(settings, "QUOTATION_SNAPSHOT_INTERVAL", 4)
+    user, old_quotation = create_test_quotation(db)
+    old_id = old_quotation.id
+    states = build_history(db, user, old_quotation)
+    recent = quotation_service.create_quotation(db, QuotationCreate(
+        customer_id=old_quotation.customer_id,
+        project_description="Recent",
+        valid_until=date(2024, 12, 31),
+        items=[QuotationItemCreate(price_table_id=old_quotation.items[0].price_table_id,
+                                   quantity=1, unit_price=Decimal("100"))]
+    ), user_id=user.id)
+    recent_id = recent.id
+    build_history(db, user, recent)
+    db.get(Quotation, old_id).updated_at = datetime.utcnow() - timedelta(days=400)
+    db.commit()
+
+    progress = []
+    result = compact_versions(db, older_than_days=180, batch_size=1,
+                              on_progress=lambda r: progress.append(r.batches))
+
+    assert result.finished
+    assert progress == [1]
+    # v1(생성) + v5(상태 변경, 이미 스냅샷) + v8(최종)만 남음
+    assert (result.quotations, result.versions_deleted, result.snapshots_written) == (1, 5, 1)
+    service = VersionService(db)
+    versions = (
+        db.query(QuotationVersion)
+        .filter(QuotationVersion.quotation_id == old_id)
+        .order_by(QuotationVersion.version_number)
+        .all()
+    )
+    assert [(v.version_number, v.is_snapshot) for v in versions] == [(1, True), (5, True), (8, True)]
+    for version_number in (1, 5, 8):
+        assert service.get_state(old_id, version_number) == states[version_number]
+    assert service.get_state(old_id, 3) is None
+    # 최근 견적서는 그대로
+    assert db.query(QuotationVersion).filter(QuotationVersion.quotation_id == recent_id).count() == 8
+
+    # 다시 실행해도 변경 없음
+    result = compact_versions(db, older_than_days=180)
+    assert (result.quotations, result.versions_deleted) == (0, 0)
+
+def test_compact_versions_endpoint_requires_admin(db: Session):
+    """버전 압축 관리자 API 테스트"""
+    client = TestClient(app)
+    app.dependency_overrides[get_current_active_superuser] = lambda: SimpleNamespace(id=1, role="admin")
+    try:
+        response = client.post("/api/admin/versions/compact", params={"max_batches": 1})
+        assert response.status_code == 200
+        assert response.json()["finished"] is True
+    finally:
+        app.dependency_overrides.pop(get_current_active_superuser, None)
+
+def test_update_quotation_items_records_changed_lines_only(db: Session):
+    """항목 전체 PUT 시 행을 제자리 수정하고 델타에는 바뀐 라인만 기록"""
+    user, quotation = create_test_quotation(db)
+    quotation_id = quotation.id
+    price_table_id = quotation.items[0].price_table_id
+    item_ids = sorted(item.id for item in quotation.items)
+    other = PriceTable(company_id=quotation.customer_id, name="Other", unit="EA",
+                       unit_price=Decimal("50"), valid_from=date(2024, 1, 1))
+    db.add(other)
+    db.commit()
+    other_id = other.id
+
+    items = [
+        QuotationItemCreate(price_table_id=price_table_id, quantity=1, unit_price=Decimal("100")),
+        QuotationItemCreate(price_table_id=price_table_id, quantity=4, unit_price=Decimal("100")),
+        QuotationItemCreate(price_table_id=price_table_id, quantity=1, unit_price=Decimal("100")),
+    ]
+    updated = quotation_service.update_quotation(
+        db, quotation_id, QuotationUpdate(items=items), user_id=user.id
+    )
+    assert sorted(item.id for item in updated.items) == item_ids
+    assert updated.total_amount == Decimal("600")
+    assert VersionService(db).get_version(quotation_id, 2).changes == {
+        "quotation": {"total_amount": "600.00"},
+        "updated": {str(item_ids[1]): {"quantity": 4}},
+    }
+
+    # 마지막 라인을 다른 단가표 항목으로 바꾸면 삭제 1건 + 추가 1건
+    items[2] = QuotationItemCreate(price_table_id=other_id, quantity=2, unit_price=Decimal("50"))
+    updated = quotation_service.update_quotation(
+        db, quotation_id, QuotationUpdate(items=items), user_id=user.id
+    )
+    changes = VersionService(db).get_version(quotation_id, 3).changes
+    assert changes["removed"] == [str(item_ids[2])]
+    assert [item["price_table_id"] for item in changes["added"].values()] == [other_id]
+    assert "updated" not in changes
+    assert VersionService(db).get_state(quotation_id, 3)["items"] == {
+        str(item.id): {
+            "price_table_id": item.price_table_id, "quantity": item.quantity,
+            "unit_price": str(item.unit_price), "discount_amount": str(item.discount_amount),
+        }
+        for item in updated.items
+    }
+
+def test_free_form_versions_are_not_replayed(db: Session):
+    """자유 형식 버전은 재생/비교/압축에서 건너뛰고 잘못된 델타는 거부"""
+    user, quotation = create_test_quotation(db)
+    quotation_id = quotation.id
+    service = VersionService(db)
+
+    with pytest.raises(ValueError):
+        service.create_version(quotation_id, {"quotation": "x"}, user_id=user.id)
+    with pytest.raises(ValueError):
+        service.create_version(quotation_id, {"updated": {"1": {"quantity": "many"}}}, user_id=user.id)
+    note = service.create_version(quotation_id, {"note": "called customer"}, user_id=user.id)
+    assert (note.version_number, note.change_count) == (2, 1)
+    # 검증 전에 저장된 잘못된 행도 재생에서 건너뜀
+    db.add(QuotationVersion(quotation_id=quotation_id, version_number=3,
+                            changes={"quotation": "x"}, created_by=user.id))
+    db.get(Quotation, quotation_id).version = 3
+    db.commit()
+    service.create_version(quotation_id, {"quotation": {"status": "pending"}}, user_id=user.id)
+
+    states = service.get_states(quotation_id, [1, 2, 3, 4])
+    assert states[1] == states[2] == states[3]
+    assert states[4]["quotation"]["status"] == "pending"
+    diff = service.diff_versions(quotation_id, 1, 4)
+    assert diff["quotation"] == {"status": {"old": "draft", "new": "pending"}}
+
+    current_user = SimpleNamespace(id=user.id, role="project_manager")
+    app.dependency_overrides[get_current_active_user] = lambda: current_user
+    try:
+        client = TestClient(app)
+        url = f"/api/quotations/{quotation_id}/versions"
+        assert client.post(url, json={"changes": {"removed": "all"}}).status_code == 400
+
+        # 다른 사용자는 버전을 기록할 수 없음 (버전 번호, 내보내기 캐시 보호)
+        current_user.id = user.id + 1
+        assert client.post(url, json={"changes": {"note": "x"}}).status_code == 403
+        assert client.post(f"/api/quotations/{quotation_id + 100}/versions",
+                           json={"changes": {"note": "x"}}).status_code == 404
+        assert db.get(Quotation, quotation_id).version == 4
+        current_user.role = "admin"
+        assert client.post(url, json={"changes": {"note": "x"}}).status_code == 200
+    finally:
+        app.dependency_overrides.pop(get_current_active_user, None)
+
+def test_diff_versions_matches_items_with_new_row_ids(db: Session):
+    """항목 행 ID가 바뀐 이력도 단가표 기준으로 같은 라인끼리 비교"""
+    user, quotation = create_test_quotation(db, lines=2)
+    quotation_id = quotation.id
+    service = VersionService(db)
+    state = service.get_state(quotation_id, 1)
+    old_ids = sorted(state["items"], key=int)
+    price_table_id = state["items"][old_ids[0]]["price_table_id"]
+    # 전체 삭제 후 재삽입으로 새 ID를 받은 이력 (PostgreSQL serial)
+    reinserted = {
+        "quotation": state["quotation"],
+        "items": {
+            "101": dict(state["items"][old_ids[0]]),
+            "102": dict(state["items"][old_ids[1]], quantity=5),
+        },
+    }
+    db.add(QuotationVersion(quotation_id=quotation_id, version_number=2, changes=reinserted,
+                            is_snapshot=True, created_by=user.id))
+    db.get(Quotation, quotation_id).version = 2
+    db.commit()
+
+    diff = service.diff_versions(quotation_id, 1, 2)
+    assert (diff["added"], diff["removed"]) == ([], [])
+    assert [(line["item_id"], line["price_table_id"], line["fields"]) for line in diff["changed"]] == [
+        (102, price_table_id, {"quantity": {"old": 1, "new": 5}}),
+    ]